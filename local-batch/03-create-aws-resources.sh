@@ -57,56 +57,16 @@ CACHE_METADATA_TABLE="${TABLE_PREFIX}-cache-metadata"
 
 TABLES=("$PASSAGES_TABLE" "$TOPICS_TABLE" "$CACHE_METADATA_TABLE")
 
-# Function to create DynamoDB table
-create_table() {
-    local table_name=$1
-    local key_schema=$2
-    local attribute_definitions=$3
-    
-    log "📊 Creating table: $table_name"
-    
-    if aws dynamodb describe-table --table-name "$table_name" --region "$AWS_DEFAULT_REGION" &>/dev/null; then
-        log_warning "Table $table_name already exists, skipping creation"
-        return 0
-    fi
-    
-    aws dynamodb create-table \
-        --table-name "$table_name" \
-        --key-schema "$key_schema" \
-        --attribute-definitions "$attribute_definitions" \
-        --billing-mode PAY_PER_REQUEST \
-        --region "$AWS_DEFAULT_REGION" \
-        --no-cli-pager \
-        --output json > /dev/null
-    
-    if [ $? -eq 0 ]; then
-        log_success "Created table: $table_name"
-        
-        # Wait for table to be active
-        log "⏳ Waiting for table $table_name to become active..."
-        aws dynamodb wait table-exists --table-name "$table_name" --region "$AWS_DEFAULT_REGION"
-        log_success "Table $table_name is now active"
-        return 0
-    else
-        log_error "Failed to create table: $table_name"
-        return 1
-    fi
-}
-
-# Create passages table  
-create_table "$PASSAGES_TABLE" \
-    'AttributeName=id,KeyType=HASH' \
-    'AttributeName=id,AttributeType=S'
-
-# Create topics table
-create_table "$TOPICS_TABLE" \
-    'AttributeName=level,KeyType=HASH' \
-    'AttributeName=level,AttributeType=S'
-
-# Create cache metadata table
-create_table "$CACHE_METADATA_TABLE" \
-    'AttributeName=cache_key,KeyType=HASH' \
-    'AttributeName=cache_key,AttributeType=S'
+# Create all tables at once and wait for them in parallel.
+# Schemas are declared in table_lifecycle.py (shared with postgres-to-dynamodb-unified.py)
+log "📊 Creating tables: ${TABLES[*]}"
+TABLE_LIST=$(IFS=,; echo "${TABLES[*]}")
+if python3 "$SCRIPT_DIR/table_lifecycle.py" create "$AWS_DEFAULT_REGION" --tables "$TABLE_LIST"; then
+    log_success "Tables created or already present"
+else
+    log_error "Failed to create tables"
+    exit 1
+fi
 
 echo ""
 log "📋 Verifying all tables are created and active..."
@@ -68,12 +68,13 @@ CACHE_METADATA_TABLE="${TABLE_PREFIX}-cache-metadata"
 TABLES=("$PASSAGES_TABLE" "$TOPICS_TABLE" "$CACHE_METADATA_TABLE")
 
 echo ""
-log "📊 Checking table status and item counts..."
+log "📊 Checking table status..."
 
-# Function to get table item count
+# Approximate item count from DescribeTable (refreshed by DynamoDB roughly every six hours);
+# verify-migration.py reports the exact counts
 get_item_count() {
     local table_name=$1
-    local count=$(aws dynamodb scan --table-name "$table_name" --region "$AWS_DEFAULT_REGION" --select "COUNT" --query "Count" --output text 2>/dev/null || echo "0")
+    local count=$(aws dynamodb describe-table --table-name "$table_name" --region "$AWS_DEFAULT_REGION" --query "Table.ItemCount" --output text 2>/dev/null || echo "0")
     echo "$count"
 }
 
@@ -95,9 +96,9 @@ for table in "${TABLES[@]}"; do
         TOTAL_ITEMS=$((TOTAL_ITEMS + count))
         
         if [[ "$count" -gt 0 ]]; then
-            log_success "📊 $table: $count items"
+            log_success "📊 $table: ~$count items"
         else
-            log_warning "📊 $table: $count items (table is empty)"
+            log_warning "📊 $table: ~$count items (count not refreshed yet or table is empty)"
         fi
     else
         log_error "📊 $table: $status"
@@ -111,74 +112,29 @@ if [[ "$verification_failed" == true ]]; then
 fi
 
 echo ""
-log "🔍 Running data integrity checks..."
+log "🔍 Running data integrity checks (PostgreSQL vs DynamoDB, passage by passage)..."
 
-# Create verification script
-python3 << EOF
-import boto3
-import sys
-from botocore.exceptions import ClientError
-
-dynamodb = boto3.resource('dynamodb', region_name='$AWS_DEFAULT_REGION')
+# Exact missing/extra/mismatched passages from parallel segmented scans and PostgreSQL-side hashes
+VERIFY_ARGS=("$ENVIRONMENT" --output "$SCRIPT_DIR/verify-migration.$ENVIRONMENT.json")
+if [[ -n "$VERIFY_SEGMENTS" ]]; then
+    VERIFY_ARGS+=(--segments "$VERIFY_SEGMENTS")
+fi
+if [[ "$VERIFY_DEEP" == "true" ]]; then
+    VERIFY_ARGS+=(--deep)
+fi
 
-def verify_table_structure(table_name, expected_keys):
-    try:
-        table = dynamodb.Table(table_name)
-        response = table.scan(Limit=1)
-        
-        if response['Items']:
-            item = response['Items'][0]
-            missing_keys = [key for key in expected_keys if key not in item]
-            if missing_keys:
-                print(f"❌ {table_name}: Missing required keys: {missing_keys}")
-                return False
-            else:
-                print(f"✅ {table_name}: Schema validation passed")
-                return True
-        else:
-            if table_name.endswith('lesson-progress'):
-                print(f"⚠️  {table_name}: Empty table (normal for progress)")
-                return True
-            else:
-                print(f"⚠️  {table_name}: No items to verify")
-                return True
-    except Exception as e:
-        print(f"❌ {table_name}: Verification failed: {e}")
-        return False
-
-# Verify table structures
-verification_results = []
-
-# Passages table  
-verification_results.append(verify_table_structure('$PASSAGES_TABLE', ['id', 'passage_content', 'questions']))
-
-# Topics table
-verification_results.append(verify_table_structure('$TOPICS_TABLE', ['level', 'topics']))
-
-# Cache metadata table
-verification_results.append(verify_table_structure('$CACHE_METADATA_TABLE', ['cache_key', 'created_at']))
-
-# Overall verification result
-if all(verification_results):
-    print("\n✅ All table structure verifications passed")
-    sys.exit(0)
-else:
-    print("\n❌ Some table structure verifications failed")
-    sys.exit(1)
-EOF
-
-if [ $? -eq 0 ]; then
-    log_success "Data structure validation passed"
+if python3 "$SCRIPT_DIR/verify-migration.py" "${VERIFY_ARGS[@]}"; then
+    log_success "Data integrity verification passed"
 else
-    log_error "Data structure validation failed"
+    log_error "Data integrity verification failed (details: verify-migration.$ENVIRONMENT.json)"
     exit 1
 fi
 
 echo ""
 log "📈 Migration Verification Summary:"
 log "   ✅ All tables are ACTIVE"
-log "   ✅ Data structure validation passed"
-log "   📊 Total items migrated: $TOTAL_ITEMS"
+log "   ✅ Every publishable passage present and matching PostgreSQL"
+log "   📊 Total items (approximate): $TOTAL_ITEMS"
 log "   🌐 Region: $AWS_DEFAULT_REGION"
 log "   🎯 Environment: $ENVIRONMENT"
 
@@ -191,7 +147,7 @@ echo ""
 log "📋 What's been created:"
 for table in "${TABLES[@]}"; do
     count=$(get_item_count "$table")
-    log "   📊 $table ($count items)"
+    log "   📊 $table (~$count items)"
 done
 
 echo ""
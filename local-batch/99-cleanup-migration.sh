@@ -6,6 +6,8 @@
 
 set -e
 
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+
 # Disable AWS CLI pager
 export AWS_PAGER=""
 
@@ -103,6 +105,11 @@ if [[ "$CONFIRM" != true ]]; then
     fi
 fi
 
+# Use the migration virtual environment (boto3) when it exists
+if [[ -f "$SCRIPT_DIR/.venv/bin/activate" ]]; then
+    source "$SCRIPT_DIR/.venv/bin/activate"
+fi
+
 echo
 log "🗂️  Checking existing tables..."
 
@@ -125,37 +132,13 @@ else
     echo
     log "🗑️  Deleting DynamoDB tables..."
     
-    for table in "${EXISTING_TABLES[@]}"; do
-        log "Deleting table: $table"
-        aws dynamodb delete-table --table-name "$table"
-        success "Delete request sent for: $table"
-    done
-    
-    echo
-    log "⏳ Waiting for tables to be deleted..."
-    
-    for table in "${EXISTING_TABLES[@]}"; do
-        log "Waiting for $table to be deleted..."
-        
-        # Wait for table to be deleted (with timeout)
-        TIMEOUT=300  # 5 minutes
-        ELAPSED=0
-        
-        while [[ $ELAPSED -lt $TIMEOUT ]]; do
-            if ! aws dynamodb describe-table --table-name "$table" > /dev/null 2>&1; then
-                success "Table deleted: $table"
-                break
-            fi
-            
-            sleep 10
-            ELAPSED=$((ELAPSED + 10))
-            echo -n "."
-        done
-        
-        if [[ $ELAPSED -ge $TIMEOUT ]]; then
-            error "Timeout waiting for $table to be deleted"
-        fi
-    done
+    # All delete requests are sent at once, then every table is awaited in parallel
+    DELETE_LIST=$(IFS=,; echo "${EXISTING_TABLES[*]}")
+    if python3 "$SCRIPT_DIR/table_lifecycle.py" delete "$AWS_DEFAULT_REGION" --tables "$DELETE_LIST"; then
+        success "Tables deleted: ${EXISTING_TABLES[*]}"
+    else
+        error "Some tables could not be deleted"
+    fi
 fi
 
 echo
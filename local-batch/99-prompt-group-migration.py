@@ -6,16 +6,29 @@ Single SQL query to export category, title, content grouped by category as YAML
 
 import sys
 import os
+import json
 import configparser
-from datetime import datetime
+import select
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import argparse
 
+# Shared prompt bundle helpers live next to the Lambda version of this exporter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'prompt-group'))
+
 try:
     import psycopg2
     import psycopg2.extras
-    import yaml
     import boto3
     from botocore.exceptions import ClientError, NoCredentialsError
+    # Imported here so a missing PyYAML (needed by prompt_bundle) gets the message below
+    from prompt_bundle import (
+        DIGEST_METADATA_KEY, JSON_CONTENT_TYPE, YAML_CONTENT_TYPE, TemplateError, build_template_bundle,
+        compute_prompt_digest, compute_prompt_digests, encode_prompt_json, get_published_digest, group_prompt_rows,
+        publish_category_shards, publish_prompt_version, write_prompts_yaml
+    )
 except ImportError as e:
     missing_module = str(e).split("'")[1] if "'" in str(e) else str(e)
     if missing_module == "psycopg2":
@@ -31,6 +44,24 @@ except ImportError as e:
         print(f"❌ Required module '{missing_module}' is not installed.")
     sys.exit(1)
 
+ENVIRONMENTS = ['dev', 'prod']
+
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+def get_s3_client():
+    """One S3 client per run - boto3 clients are thread-safe, creating them from the default session is not"""
+    global _s3_client
+    with _s3_client_lock:
+        if _s3_client is None:
+            _s3_client = boto3.client('s3')
+        return _s3_client
+
+def get_database_name(environment):
+    """Database for an environment: PG_DATABASE_DEV/PG_DATABASE_PROD, then PG_DATABASE, then the default"""
+    return (os.getenv(f'PG_DATABASE_{environment.upper()}') or os.getenv('PG_DATABASE')
+            or ('genaicoe_postgresql' if environment == 'dev' else 'prod'))
+
 def get_database_config(environment):
     """Get database configuration from AWS credentials file"""
     aws_creds_path = os.path.expanduser('~/.aws/credentials')
@@ -56,25 +87,33 @@ def get_database_config(environment):
         print(f"❌ Missing PostgreSQL credential: {e}")
         sys.exit(1)
     
-    # Set database name based on environment
-    pg_database = 'genaicoe_postgresql' if environment == 'dev' else 'prod'
-    
     return {
         'host': pg_host,
-        'database': pg_database,
+        'database': get_database_name(environment),
         'user': pg_user,
         'password': pg_password,
         'port': int(pg_port)
     }
 
-def upload_to_s3(filename, environment):
-    """Upload the generated YAML file to S3 with proper permissions"""
+def upload_to_s3(filename, environment, digest):
+    """Upload the generated YAML file to S3 with proper permissions, unless the published digest matches
+    
+    Returns 'uploaded', 'unchanged' or 'failed'.
+    """
     bucket_name = 'pi-app-data'
     s3_key = f"prompts.{environment}.yaml"  # Put directly in root, no folder
     
     try:
         # Initialize S3 client
-        s3_client = boto3.client('s3')
+        s3_client = get_s3_client()
+        
+        # Compare payload digests so unchanged prompts keep their ETag
+        try:
+            if get_published_digest(s3_client, bucket_name, s3_key) == digest:
+                print(f"⏭️  Prompts unchanged (digest {digest[:12]}) - upload to s3://{bucket_name}/{s3_key} avoided")
+                return 'unchanged'
+        except ClientError as e:
+            print(f"⚠️  Could not read published digest, uploading anyway: {e}")
         
         # Upload file with specific ACL
         print(f"📤 Uploading {filename} to s3://{bucket_name}/{s3_key}...")
@@ -88,7 +127,8 @@ def upload_to_s3(filename, environment):
                 'Metadata': {
                     'uploaded-by': 'prompt-migration-script',
                     'environment': environment,
-                    'upload-timestamp': datetime.now().isoformat()
+                    'upload-timestamp': datetime.now().isoformat(),
+                    DIGEST_METADATA_KEY: digest
                 }
             }
         )
@@ -96,11 +136,11 @@ def upload_to_s3(filename, environment):
         print(f"✅ Successfully uploaded to s3://{bucket_name}/{s3_key}")
         print(f"🔗 URL: https://{bucket_name}.s3.amazonaws.com/{s3_key}")
         
-        return True
+        return 'uploaded'
         
     except NoCredentialsError:
         print("❌ AWS credentials not found. Please configure AWS CLI or set environment variables.")
-        return False
+        return 'failed'
     except ClientError as e:
         error_code = e.response['Error']['Code']
         if error_code == 'NoSuchBucket':
@@ -109,76 +149,572 @@ def upload_to_s3(filename, environment):
             print(f"❌ Access denied to bucket '{bucket_name}'. Check your permissions.")
         else:
             print(f"❌ AWS error: {e}")
-        return False
+        return 'failed'
     except Exception as e:
         print(f"❌ Upload failed: {e}")
+        return 'failed'
+
+def publish_version(filename, json_filename, templates_filename, environment, digest):
+    """Publish the YAML and JSON exports as an immutable content-addressed version and update the pointer manifest"""
+    bucket_name = 'pi-app-data'
+    
+    try:
+        with open(filename, 'rb') as f:
+            yaml_body = f.read()
+        with open(json_filename, 'rb') as f:
+            json_body = f.read()
+        with open(templates_filename, 'rb') as f:
+            templates_body = f.read()
+        
+        result = publish_prompt_version(
+            get_s3_client(),
+            bucket_name,
+            environment,
+            digest,
+            {
+                'yaml': (yaml_body, YAML_CONTENT_TYPE),
+                'json': (json_body, JSON_CONTENT_TYPE),
+                'templates.json': (templates_body, JSON_CONTENT_TYPE)
+            },
+            'prompt-migration-script'
+        )
+        
+        for key in result['uploaded']:
+            print(f"📦 Published immutable version: s3://{bucket_name}/{key}")
+        if not result['uploaded']:
+            print(f"⏭️  Version {digest[:16]} already published")
+        if result['pointer_updated']:
+            print(f"📌 Pointer updated: s3://{bucket_name}/{result['pointer_key']} -> {digest[:16]}")
+        return True
+        
+    except (NoCredentialsError, ClientError) as e:
+        print(f"❌ Versioned publish failed: {e}")
         return False
 
+def publish_shards(yaml_data, environment):
+    """Publish one object per category plus an index, uploading only changed categories"""
+    bucket_name = 'pi-app-data'
+    
+    try:
+        result = publish_category_shards(
+            get_s3_client(),
+            bucket_name,
+            environment,
+            yaml_data,
+            'prompt-migration-script'
+        )
+        
+        for key in result['uploaded']:
+            print(f"📦 Published category shard: s3://{bucket_name}/{key}")
+        print(f"📊 Category shards: {len(result['uploaded'])} uploaded, {result['unchanged']} unchanged")
+        if result['index_updated']:
+            print(f"📌 Index updated: s3://{bucket_name}/{result['index_key']}")
+        return True
+        
+    except (NoCredentialsError, ClientError) as e:
+        print(f"❌ Category shard publish failed: {e}")
+        return False
+
+# Single SQL query - only category, title, content
+PROMPTS_QUERY = """
+SELECT 
+    pg.category,
+    pg.title,
+    p.content
+FROM practise_improve_pilot.prompt_groups pg
+INNER JOIN practise_improve_pilot.prompts p ON pg.id = p.group_id
+WHERE pg.is_active = true 
+  AND p.is_active = true{category_filter}
+ORDER BY pg.category, pg.title, pg.id, p.version, p.id;
+"""
+
+def write_and_publish(yaml_data, environment, skip_upload=False, duplicates=()):
+    """Write the YAML/JSON/templates files and publish them unless skip_upload"""
+    categories = [category for category in yaml_data if category != 'metadata']
+    total_prompts = yaml_data['metadata']['total_prompts']
+    
+    for category, title in duplicates:
+        print(f"⚠️  Duplicate active prompt title '{category} / {title}' - last row by group id and version kept")
+    if duplicates:
+        print("💡 Run with --mode by-id for a lossless export of every active prompt")
+    
+    # Write to YAML file
+    filename = f"prompts.{environment}.yaml"
+    
+    # Pre-parse templates; fails the export before any file is written
+    templates = build_template_bundle(yaml_data)
+    
+    with open(filename, 'w', encoding='utf-8') as f:
+        write_prompts_yaml(yaml_data, f)
+    
+    # Compact JSON twin of the YAML for consumers that load prompts at startup
+    json_filename = f"prompts.{environment}.json"
+    with open(json_filename, 'wb') as f:
+        f.write(encode_prompt_json(yaml_data))
+    
+    # Placeholder list and literal/field segments for each template
+    templates_filename = f"prompts.{environment}.templates.json"
+    with open(templates_filename, 'wb') as f:
+        f.write(encode_prompt_json(templates))
+    
+    print(f"✅ Exported {total_prompts} prompts to {filename}, {json_filename} and {templates_filename}")
+    print(f"📂 Categories: {categories}")
+    
+    # Upload to S3 unless skipped
+    if not skip_upload:
+        digest = compute_prompt_digest(yaml_data)
+        upload_status = upload_to_s3(filename, environment, digest)
+        if upload_status == 'failed':
+            print("⚠️  Local file created successfully, but S3 upload failed.")
+        elif upload_status == 'unchanged':
+            print("📊 Uploads avoided: 1 (published prompts already match)")
+        
+        publish_version(filename, json_filename, templates_filename, environment, digest)
+        publish_shards(yaml_data, environment)
+    else:
+        print("⏭️  S3 upload skipped.")
+
 def export_prompts(environment, skip_upload=False):
-    """Single SQL query to fetch and export prompts as YAML"""
+    """Single SQL query to fetch and export prompts as YAML; returns the exported structure"""
     
     # Get database config and connect
     db_config = get_database_config(environment)
     
     try:
         connection = psycopg2.connect(**db_config)
+        # Server-side cursor so rows stream in batches instead of one fetchall list
+        cursor = connection.cursor(name='prompt_export')
+        cursor.itersize = 500
+        
+        print(f"🔍 Fetching prompts from {environment} environment...")
+        cursor.execute(PROMPTS_QUERY.format(category_filter=''))
+        
+        # Group rows as they stream from the cursor (metadata first, categories sorted)
+        duplicates = []
+        yaml_data = group_prompt_rows(cursor, environment, duplicates)
+        
+        write_and_publish(yaml_data, environment, skip_upload, duplicates)
+        return yaml_data
+        
+    except psycopg2.Error as e:
+        print(f"❌ Database error: {e}")
+        sys.exit(1)
+    except TemplateError as e:
+        print(f"❌ Invalid prompt templates - nothing exported:\n{e}")
+        sys.exit(1)
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+PROMPT_CHANNEL = 'prompt_changes'
+
+# Each changed row NOTIFYs its category (old and new, if it moved); pg_notify
+# collapses identical payloads within one transaction
+PROMPT_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION practise_improve_pilot.notify_prompt_change() RETURNS trigger AS $$
+DECLARE
+    changed_category text;
+BEGIN
+    IF TG_TABLE_NAME = 'prompt_groups' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM pg_notify('prompt_changes', OLD.category::text);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM pg_notify('prompt_changes', NEW.category::text);
+        END IF;
+    ELSE
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            SELECT category::text INTO changed_category
+            FROM practise_improve_pilot.prompt_groups WHERE id = OLD.group_id;
+            IF changed_category IS NOT NULL THEN
+                PERFORM pg_notify('prompt_changes', changed_category);
+            END IF;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            SELECT category::text INTO changed_category
+            FROM practise_improve_pilot.prompt_groups WHERE id = NEW.group_id;
+            IF changed_category IS NOT NULL THEN
+                PERFORM pg_notify('prompt_changes', changed_category);
+            END IF;
+        END IF;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prompt_groups_notify ON practise_improve_pilot.prompt_groups;
+CREATE TRIGGER prompt_groups_notify
+    AFTER INSERT OR UPDATE OR DELETE ON practise_improve_pilot.prompt_groups
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.notify_prompt_change();
+
+DROP TRIGGER IF EXISTS prompts_notify ON practise_improve_pilot.prompts;
+CREATE TRIGGER prompts_notify
+    AFTER INSERT OR UPDATE OR DELETE ON practise_improve_pilot.prompts
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.notify_prompt_change();
+"""
+
+# updated_at only has a CURRENT_TIMESTAMP default; history mode and the fingerprint
+# need it to move on in-place edits as well
+UPDATED_AT_TRIGGERS_SQL = """
+CREATE OR REPLACE FUNCTION practise_improve_pilot.set_updated_at() RETURNS trigger AS $$
+BEGIN
+    IF NEW IS DISTINCT FROM OLD THEN
+        NEW.updated_at := CURRENT_TIMESTAMP;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prompt_groups_set_updated_at ON practise_improve_pilot.prompt_groups;
+CREATE TRIGGER prompt_groups_set_updated_at
+    BEFORE UPDATE ON practise_improve_pilot.prompt_groups
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.set_updated_at();
+
+DROP TRIGGER IF EXISTS prompts_set_updated_at ON practise_improve_pilot.prompts;
+CREATE TRIGGER prompts_set_updated_at
+    BEFORE UPDATE ON practise_improve_pilot.prompts
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.set_updated_at();
+"""
+
+def install_prompt_triggers(environment):
+    """Create (or replace) the NOTIFY and updated_at triggers on prompts and prompt_groups"""
+    db_config = get_database_config(environment)
+    
+    try:
+        connection = psycopg2.connect(**db_config)
+        with connection, connection.cursor() as cursor:
+            cursor.execute(PROMPT_TRIGGERS_SQL)
+            cursor.execute(UPDATED_AT_TRIGGERS_SQL)
+        print(f"✅ Installed NOTIFY triggers on prompts and prompt_groups ({environment}, channel '{PROMPT_CHANNEL}')")
+        print(f"✅ Installed BEFORE UPDATE triggers maintaining updated_at ({environment})")
+    except psycopg2.Error as e:
+        print(f"❌ Trigger installation failed: {e}")
+        sys.exit(1)
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+def prompt_triggers_installed(cursor):
+    """True when both NOTIFY triggers exist"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'practise_improve_pilot'
+          AND t.tgname IN ('prompt_groups_notify', 'prompts_notify')
+          AND NOT t.tgisinternal;
+    """)
+    return cursor.fetchone()[0] == 2
+
+def updated_at_triggers_installed(cursor):
+    """True when both BEFORE UPDATE triggers maintaining updated_at exist"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM pg_trigger t
+        JOIN pg_class c ON c.oid = t.tgrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'practise_improve_pilot'
+          AND t.tgname IN ('prompt_groups_set_updated_at', 'prompts_set_updated_at')
+          AND NOT t.tgisinternal;
+    """)
+    return cursor.fetchone()[0] == 2
+
+def fetch_category_rows(cursor, categories=None):
+    """Fetch active prompt rows grouped by category - all categories, or only the given ones"""
+    if categories:
+        cursor.execute(PROMPTS_QUERY.format(category_filter="\n  AND pg.category::text = ANY(%s)"),
+                       (sorted(categories),))
+    else:
+        cursor.execute(PROMPTS_QUERY.format(category_filter=''))
+    
+    rows_by_category = {}
+    for row in cursor.fetchall():
+        rows_by_category.setdefault(row[0], []).append(row)
+    return rows_by_category
+
+def watch_prompts(environment, skip_upload=False, debounce=2.0, max_delay=10.0):
+    """LISTEN for prompt changes and re-export only the affected categories after a quiet period"""
+    db_config = get_database_config(environment)
+    
+    try:
+        connection = psycopg2.connect(**db_config)
+        connection.autocommit = True
         cursor = connection.cursor()
         
-        # Single SQL query - only category, title, content
-        query = """
-        SELECT 
-            pg.category,
-            pg.title,
-            p.content
-        FROM practise_improve_pilot.prompt_groups pg
-        INNER JOIN practise_improve_pilot.prompts p ON pg.id = p.group_id
-        WHERE pg.is_active = true 
-          AND p.is_active = true
-        ORDER BY pg.category, pg.title;
-        """
+        if not prompt_triggers_installed(cursor):
+            print("❌ NOTIFY triggers are not installed on prompts/prompt_groups.")
+            print(f"   Install them with: {sys.argv[0]} {environment} --install-triggers")
+            sys.exit(1)
         
-        print(f"🔍 Fetching prompts from {environment} environment...")
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        # Group by category
-        categories = {}
-        for category, title, content in results:
-            if category not in categories:
-                categories[category] = {}
-            # Use title as key and content as value
-            categories[category][title] = content
-        
-        # Write to YAML file
-        filename = f"prompts.{environment}.yaml"
-        
-        # Prepare YAML structure with metadata first, then categories
-        yaml_data = {
-            'metadata': {
-                'environment': environment.upper(),
-                'export_timestamp': datetime.now().isoformat(),
-                'total_categories': len(categories),
-                'total_prompts': len(results)
-            }
+        # LISTEN before the initial export so no change slips in between
+        cursor.execute(f"LISTEN {PROMPT_CHANNEL};")
+        
+        print(f"🔍 Initial export of {environment}...")
+        rows_by_category = fetch_category_rows(cursor)
+        duplicates = []
+        write_and_publish(
+            group_prompt_rows((row for rows in rows_by_category.values() for row in rows), environment, duplicates),
+            environment, skip_upload, duplicates
+        )
+        
+        print(f"👀 Watching channel '{PROMPT_CHANNEL}' (debounce {debounce}s, max delay {max_delay}s) - Ctrl+C to stop")
+        
+        pending = set()
+        refresh_all = False
+        first_change = last_change = None
+        while True:
+            if pending or refresh_all:
+                now = time.monotonic()
+                timeout = max(0, min(last_change + debounce, first_change + max_delay) - now)
+            else:
+                timeout = 60
+            
+            if select.select([connection], [], [], timeout) != ([], [], []):
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    if notify.payload:
+                        pending.add(notify.payload)
+                    else:
+                        refresh_all = True  # bare NOTIFY prompt_changes - re-export everything
+                    last_change = time.monotonic()
+                    first_change = first_change or last_change
+            
+            if not (pending or refresh_all):
+                continue
+            
+            # Wait for a quiet period, but never longer than max_delay after the first change
+            now = time.monotonic()
+            if now - last_change < debounce and now - first_change < max_delay:
+                continue
+            
+            affected = None if refresh_all else set(pending)
+            pending.clear()
+            refresh_all = False
+            first_change = last_change = None
+            
+            start_time = time.monotonic()
+            print(f"\n🔔 [{datetime.now().strftime('%H:%M:%S')}] Changes in: {', '.join(sorted(affected)) if affected else 'all categories'}")
+            
+            fetched = fetch_category_rows(cursor, affected)
+            if affected is None:
+                rows_by_category = fetched
+            else:
+                for category in affected:
+                    if category in fetched:
+                        rows_by_category[category] = fetched[category]
+                    else:
+                        rows_by_category.pop(category, None)
+            
+            duplicates = []
+            yaml_data = group_prompt_rows(
+                (row for rows in rows_by_category.values() for row in rows), environment, duplicates
+            )
+            try:
+                write_and_publish(yaml_data, environment, skip_upload, duplicates)
+            except TemplateError as e:
+                print(f"❌ Invalid prompt templates - nothing published, still watching:\n{e}")
+                continue
+            print(f"⏱️  Republished in {time.monotonic() - start_time:.2f}s")
+        
+    except KeyboardInterrupt:
+        print("\n👋 Watch stopped")
+    except psycopg2.Error as e:
+        print(f"❌ Database error: {e}")
+        sys.exit(1)
+    finally:
+        if 'connection' in locals():
+            connection.close()
+
+def diff_environments(exports):
+    """Compare per-prompt digests between dev and prod exports"""
+    dev = compute_prompt_digests(exports['dev'])
+    prod = compute_prompt_digests(exports['prod'])
+    
+    only_dev = sorted(set(dev) - set(prod))
+    only_prod = sorted(set(prod) - set(dev))
+    changed = sorted(key for key in set(dev) & set(prod) if dev[key] != prod[key])
+    identical = len(set(dev) & set(prod)) - len(changed)
+    
+    print("\n🔀 Dev vs prod prompt diff (by content digest)")
+    print("=" * 60)
+    for label, keys in (('Only in dev', only_dev), ('Only in prod', only_prod), ('Content differs', changed)):
+        print(f"{label}: {len(keys)}")
+        for category, title in keys:
+            print(f"   • {category} / {title}")
+    print(f"Identical: {identical}")
+    
+    return {'only_dev': only_dev, 'only_prod': only_prod, 'changed': changed, 'identical': identical}
+
+def export_all_environments(skip_upload=False):
+    """Export and publish dev and prod concurrently, then diff them"""
+    databases = {env: get_database_name(env) for env in ENVIRONMENTS}
+    if len(set(databases.values())) < len(ENVIRONMENTS):
+        # e.g. PG_DATABASE set for local testing: both exports would read the same database
+        print(f"❌ All environments resolve to the same database ({', '.join(f'{env}={db}' for env, db in databases.items())}); "
+              f"unset PG_DATABASE or set PG_DATABASE_DEV and PG_DATABASE_PROD to different databases")
+        sys.exit(1)
+    
+    start_time = datetime.now()
+    
+    if not skip_upload:
+        get_s3_client()  # created once, before the workers start
+    
+    print(f"🚀 Exporting {', '.join(ENVIRONMENTS)} concurrently...")
+    with ThreadPoolExecutor(max_workers=len(ENVIRONMENTS)) as executor:
+        futures = {env: executor.submit(export_prompts, env, skip_upload) for env in ENVIRONMENTS}
+        exports = {env: future.result() for env, future in futures.items()}
+    
+    duration = (datetime.now() - start_time).total_seconds()
+    print(f"\n⏱️  Exported {len(ENVIRONMENTS)} environments in {duration:.2f}s")
+    
+    return diff_environments(exports)
+
+# Lossless export: every prompt row with its id and version, in a deterministic order
+PROMPT_RECORDS_QUERY = """
+SELECT 
+    p.id::text AS prompt_id,
+    p.version,
+    pg.id::text AS group_id,
+    pg.category::text AS category,
+    pg.title,
+    (pg.is_active AND p.is_active) AS is_active,
+    GREATEST(p.updated_at, pg.updated_at) AS updated_at,
+    p.content
+FROM practise_improve_pilot.prompt_groups pg
+INNER JOIN practise_improve_pilot.prompts p ON pg.id = p.group_id
+{where}
+ORDER BY pg.category, pg.title, pg.id, p.version, p.id;
+"""
+
+# Minutes re-read before the saved history watermark (longest expected prompt-editing transaction)
+HISTORY_OVERLAP_MINUTES = 10
+
+def get_history_state_file(environment):
+    """Local file holding the updated_at watermark of the last history export"""
+    return f".prompts.{environment}.history-state.json"
+
+def build_prompt_records(rows):
+    """Key rows by prompt id and version, preserving the query order"""
+    records = {}
+    for row in rows:
+        record = dict(row)
+        record['updated_at'] = record['updated_at'].isoformat()
+        records[f"{record['prompt_id']}@v{record['version']}"] = record
+    return records
+
+def find_duplicate_titles(records):
+    """Active prompts sharing a category and title - the bundle export keeps only the last one"""
+    by_title = {}
+    for key, record in records.items():
+        if record['is_active']:
+            by_title.setdefault((record['category'], record['title']), []).append(key)
+    
+    return [
+        {
+            'category': category,
+            'title': title,
+            'prompts': keys,
+            'kept_in_bundle': keys[-1]
         }
-        # Add categories in sorted order after metadata
-        for category in sorted(categories.keys()):
-            yaml_data[category] = categories[category]
+        for (category, title), keys in by_title.items()
+        if len(keys) > 1
+    ]
+
+def export_prompt_records(environment, mode, since=None, overlap_minutes=HISTORY_OVERLAP_MINUTES):
+    """Export prompts keyed by id and version (mode 'by-id') or only those changed since the last run (mode 'history')
+    
+    History mode sees inserts and updates through updated_at only: hard-deleted prompts or
+    groups are never reported, and edits are missed unless updated_at changes on UPDATE
+    (see --install-triggers). The saved watermark is re-read with an overlap window to
+    catch late-committing transactions; an explicit --since is used as given.
+    """
+    
+    db_config = get_database_config(environment)
+    state_file = get_history_state_file(environment)
+    exported = {}
+    from_state = False
+    
+    if mode == 'history' and since is None and os.path.exists(state_file):
+        with open(state_file) as f:
+            state = json.load(f)
+        since = state.get('watermark')
+        exported = state.get('exported', {})
+        from_state = True
+    
+    try:
+        connection = psycopg2.connect(**db_config)
+        cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            yaml.dump(yaml_data, f, default_flow_style=False, allow_unicode=True, 
-                     sort_keys=False, width=100, indent=2)
+        if mode == 'history':
+            with connection.cursor() as check_cursor:
+                if not updated_at_triggers_installed(check_cursor):
+                    print("⚠️  No BEFORE UPDATE triggers maintain updated_at on prompts/prompt_groups - "
+                          "in-place edits may be missed. Run with --install-triggers to add them.")
+        
+        if mode == 'by-id':
+            cursor.execute(PROMPT_RECORDS_QUERY.format(
+                where="WHERE pg.is_active = true AND p.is_active = true"
+            ))
+        elif since:
+            # Deactivated prompts are changes too, so history includes inactive rows.
+            # updated_at is the transaction start, so a transaction committing after the last
+            # export can carry an older timestamp; re-read an overlap window and drop the
+            # versions already exported with the same updated_at.
+            since_from = since
+            if from_state:
+                since_from = datetime.fromisoformat(since) - timedelta(minutes=overlap_minutes)
+            cursor.execute(PROMPT_RECORDS_QUERY.format(
+                where="WHERE GREATEST(p.updated_at, pg.updated_at) > %s"
+            ), (since_from,))
+        else:
+            cursor.execute(PROMPT_RECORDS_QUERY.format(where=""))
+        
+        records = build_prompt_records(cursor.fetchall())
+        if mode == 'history':
+            # Overlap rows are older than since, so they must not move the watermark back
+            watermark = max([r['updated_at'] for r in records.values()] + ([since] if since else []), default=None)
+            # Versions inside the next overlap window, remembered so that run can skip them
+            cutoff = datetime.fromisoformat(watermark) - timedelta(minutes=overlap_minutes) if watermark else None
+            seen = {**exported, **{key: r['updated_at'] for key, r in records.items()}}
+            recent = {key: updated_at for key, updated_at in seen.items()
+                      if cutoff and datetime.fromisoformat(updated_at) > cutoff}
+            records = {key: r for key, r in records.items() if exported.get(key) != r['updated_at']}
+        duplicates = find_duplicate_titles(records) if mode == 'by-id' else []
         
-        print(f"✅ Exported {len(results)} prompts to {filename}")
-        print(f"📂 Categories: {sorted(categories.keys())}")
+        metadata = {
+            'environment': environment.upper(),
+            'export_timestamp': datetime.now().isoformat(),
+            'mode': mode,
+            'total_prompts': len(records)
+        }
+        if mode == 'by-id':
+            metadata['duplicate_titles'] = len(duplicates)
+            filename = f"prompts.{environment}.by-id.yaml"
+        else:
+            metadata['since'] = since
+            metadata['watermark'] = watermark
+            filename = f"prompts.{environment}.history.yaml"
+        
+        export_data = {'metadata': metadata}
+        if duplicates:
+            export_data['duplicates'] = duplicates
+        export_data['prompts'] = records
+        
+        with open(filename, 'w', encoding='utf-8') as f:
+            write_prompts_yaml(export_data, f)
         
-        # Upload to S3 unless skipped
-        if not skip_upload:
-            upload_success = upload_to_s3(filename, environment)
-            if not upload_success:
-                print("⚠️  Local file created successfully, but S3 upload failed.")
+        if mode == 'history':
+            # Advance the watermark only after the export file is written
+            with open(state_file, 'w') as f:
+                json.dump({'watermark': watermark, 'exported': recent, 'updated': datetime.now().isoformat()}, f)
+            print(f"✅ Exported {len(records)} prompt versions changed since {since or 'the beginning'} to {filename}")
+            print(f"📌 Watermark: {watermark}")
         else:
-            print("⏭️  S3 upload skipped.")
+            print(f"✅ Exported {len(records)} prompts keyed by id and version to {filename}")
+            for duplicate in duplicates:
+                print(f"⚠️  Duplicate title '{duplicate['category']} / {duplicate['title']}': "
+                      f"{len(duplicate['prompts'])} active prompts, bundle keeps {duplicate['kept_in_bundle']}")
+            print(f"📊 Duplicate titles: {len(duplicates)}")
         
     except psycopg2.Error as e:
         print(f"❌ Database error: {e}")
@@ -189,11 +725,57 @@ def export_prompts(environment, skip_upload=False):
 
 def main():
     parser = argparse.ArgumentParser(description='Export prompts as YAML using single SQL query')
-    parser.add_argument('environment', choices=['dev', 'prod'], help='Environment (dev or prod)')
+    parser.add_argument('environment', nargs='?', choices=ENVIRONMENTS, help='Environment (dev or prod)')
+    parser.add_argument('--all-environments', action='store_true',
+                        help='Export dev and prod concurrently and print a digest-based diff between them')
     parser.add_argument('--skip-upload', action='store_true', help='Skip S3 upload, only create local file')
+    parser.add_argument('--mode', choices=['bundle', 'by-id', 'history'], default='bundle',
+                        help='bundle: category/title YAML (default); by-id: lossless export keyed by prompt id '
+                             'and version with a duplicate-title report; history: prompts changed since the last history export')
+    parser.add_argument('--since', help='History mode: ISO timestamp to export changes after (overrides the saved watermark)')
+    parser.add_argument('--overlap-minutes', type=int, default=HISTORY_OVERLAP_MINUTES,
+                        help=f'History mode: minutes re-read before the saved watermark (default: {HISTORY_OVERLAP_MINUTES})')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running: LISTEN for prompt changes and republish affected categories')
+    parser.add_argument('--install-triggers', action='store_true',
+                        help='Install the NOTIFY triggers on prompts and prompt_groups that --watch relies on')
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help='Watch mode: seconds without changes before republishing (default: 2)')
+    parser.add_argument('--max-delay', type=float, default=10.0,
+                        help='Watch mode: republish at most this many seconds after the first change (default: 10)')
     args = parser.parse_args()
     
-    export_prompts(args.environment, args.skip_upload)
+    if args.all_environments:
+        if args.mode != 'bundle':
+            parser.error('--all-environments only supports --mode bundle')
+        # One-shot bundle export only: reject options it would otherwise silently ignore
+        ignored = [flag for flag, given in (
+            ('--watch', args.watch),
+            ('--install-triggers', args.install_triggers),
+            ('--since', args.since is not None),
+            ('--overlap-minutes', args.overlap_minutes != parser.get_default('overlap_minutes')),
+            ('--debounce', args.debounce != parser.get_default('debounce')),
+            ('--max-delay', args.max_delay != parser.get_default('max_delay'))
+        ) if given]
+        if ignored:
+            parser.error(f"--all-environments cannot be combined with {', '.join(ignored)}")
+        export_all_environments(args.skip_upload)
+        return
+    if not args.environment:
+        parser.error('environment is required unless --all-environments is given')
+    
+    if args.install_triggers:
+        install_prompt_triggers(args.environment)
+        if not args.watch:
+            return
+    if args.watch:
+        watch_prompts(args.environment, args.skip_upload, args.debounce, args.max_delay)
+        return
+    
+    if args.mode == 'bundle':
+        export_prompts(args.environment, args.skip_upload)
+    else:
+        export_prompt_records(args.environment, args.mode, args.since, args.overlap_minutes)
 
 if __name__ == "__main__":
     main()
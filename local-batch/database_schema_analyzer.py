@@ -5,20 +5,40 @@ Generates a comprehensive analysis of the database schema including:
 - Table structures and relationships
 - Schema analysis and potential issues
 - Data quality assessment
+- Index usage, bloat and vacuum/analyze health
 - Recommendations for improvements
+
+Each run writes a JSON catalog snapshot (database_schema_snapshot_<database>.json). The
+next run re-runs the data quality scan only for tables whose pg_stat counters or DDL
+changed, and reports growth, column and index changes (database_schema_diff_<timestamp>.json).
+
+Usage:
+    python3 database_schema_analyzer.py [--jobs 8]
+    python3 database_schema_analyzer.py --full [--snapshot path/to/snapshot.json]
+    python3 database_schema_analyzer.py --sample-percent 1 [--sample-method bernoulli] [--exact-threshold 100000]
+    python3 database_schema_analyzer.py --audit-queries
+    python3 database_schema_analyzer.py --benchmark-quality [--bench-columns 100] [--bench-rows 50000] [--sample-percent 1]
 """
 
 import os
 import json
+import math
+import hashlib
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 import configparser
 from tabulate import tabulate
 from collections import defaultdict
 import datetime
 
 class DatabaseSchemaAnalyzer:
-    def __init__(self):
+    def __init__(self, jobs=1, sample_percent=None, sample_method='system', exact_threshold=100000,
+                 previous_snapshot=None):
         # Load PostgreSQL credentials from ~/.aws/credentials
         aws_creds_path = os.path.expanduser('~/.aws/credentials')
         profile = 'postgres-creds'
@@ -33,13 +53,52 @@ class DatabaseSchemaAnalyzer:
             'password': config.get(profile, 'pg_password')
         }
         
+        self._local = threading.local()
         self.conn = None
         self.report = []
+        self.jobs = jobs
+        self.pool = None
+        self._columns_cache = {}
+        self.sample_percent = sample_percent
+        self.sample_method = sample_method
+        self.exact_threshold = exact_threshold
+        self.previous_snapshot = previous_snapshot
+        self.snapshot = {'tables': {}}
+        self.snapshot_diff = None
+    
+    @property
+    def conn(self):
+        """The worker thread's pooled connection when running with --jobs, else the main connection"""
+        return getattr(self._local, 'conn', None) or self._conn
+    
+    @conn.setter
+    def conn(self, value):
+        self._conn = value
+    
+    def _run_pooled(self, func, *args):
+        """Run func on a connection borrowed from the pool"""
+        conn = self.pool.getconn()
+        self._local.conn = conn
+        try:
+            return func(*args)
+        finally:
+            self._local.conn = None
+            conn.rollback()
+            self.pool.putconn(conn)
+    
+    def _map(self, func, items):
+        """Apply func to each item, concurrently when jobs > 1; results keep input order"""
+        if self.jobs <= 1:
+            return [func(*item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            return list(executor.map(lambda item: self._run_pooled(func, *item), items))
         
     def connect(self):
         """Connect to PostgreSQL database"""
         try:
             self.conn = psycopg2.connect(**self.pg_config)
+            if self.jobs > 1:
+                self.pool = ThreadedConnectionPool(1, self.jobs, **self.pg_config)
             self.add_to_report(f"✅ Connected to PostgreSQL database: {self.pg_config['database']}")
             return True
         except Exception as e:
@@ -76,6 +135,9 @@ class DatabaseSchemaAnalyzer:
             pg_stat_get_tuples_deleted(c.oid) as deletes,
             pg_stat_get_live_tuples(c.oid) as live_tuples,
             pg_stat_get_dead_tuples(c.oid) as dead_tuples,
+            c.reltuples::bigint as estimated_rows,
+            c.relfilenode,
+            pg_total_relation_size(c.oid) as size_bytes,
             obj_description(c.oid) as table_comment
         FROM information_schema.tables t
         LEFT JOIN pg_class c ON c.relname = t.table_name
@@ -206,8 +268,406 @@ class DatabaseSchemaAnalyzer:
             cursor.execute(query, (schema_name,))
             return cursor.fetchall()
     
-    def analyze_data_quality(self, schema_name, table_name):
-        """Analyze data quality for a table"""
+    def get_table_usage(self, schema_name):
+        """Scan counts, maintenance times and I/O counters per table, with the pg_stats row width"""
+        query = """
+        SELECT
+            s.relname as table_name,
+            s.seq_scan,
+            s.seq_tup_read,
+            COALESCE(s.idx_scan, 0) as idx_scan,
+            s.n_live_tup,
+            s.n_dead_tup,
+            s.last_vacuum,
+            s.last_autovacuum,
+            s.last_analyze,
+            s.last_autoanalyze,
+            COALESCE(io.heap_blks_read, 0) as heap_blks_read,
+            COALESCE(io.heap_blks_hit, 0) as heap_blks_hit,
+            c.relpages,
+            c.reltuples,
+            pg_relation_size(s.relid) as table_bytes,
+            (SELECT COUNT(*) FROM pg_attribute a
+             WHERE a.attrelid = s.relid AND a.attnum > 0 AND NOT a.attisdropped) as column_count,
+            (SELECT COUNT(*) FROM pg_stats st
+             WHERE st.schemaname = s.schemaname AND st.tablename = s.relname) as stats_columns,
+            (SELECT SUM(st.avg_width) FROM pg_stats st
+             WHERE st.schemaname = s.schemaname AND st.tablename = s.relname) as row_width
+        FROM pg_stat_user_tables s
+        JOIN pg_statio_user_tables io ON io.relid = s.relid
+        JOIN pg_class c ON c.oid = s.relid
+        WHERE s.schemaname = %s
+        ORDER BY s.relname;
+        """
+        
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, (schema_name,))
+            return cursor.fetchall()
+    
+    def get_index_usage(self, schema_name):
+        """Scan counts, I/O counters, sizes and key definitions per index"""
+        query = """
+        SELECT
+            s.relname as table_name,
+            s.indexrelname as index_name,
+            s.idx_scan,
+            COALESCE(io.idx_blks_read, 0) as idx_blks_read,
+            COALESCE(io.idx_blks_hit, 0) as idx_blks_hit,
+            i.indisunique,
+            i.indisprimary,
+            i.indrelid,
+            i.indkey::text as indkey,
+            i.indclass::text as indclass,
+            pg_get_expr(i.indexprs, i.indrelid) as expressions,
+            pg_get_expr(i.indpred, i.indrelid) as predicate,
+            am.amname,
+            pg_relation_size(s.indexrelid) as index_bytes,
+            c.relpages,
+            c.reltuples,
+            (SELECT SUM(st.avg_width) FROM pg_attribute a
+             JOIN pg_stats st ON st.schemaname = s.schemaname AND st.tablename = s.relname AND st.attname = a.attname
+             WHERE a.attrelid = i.indrelid AND a.attnum = ANY (i.indkey)) as key_width
+        FROM pg_stat_user_indexes s
+        JOIN pg_statio_user_indexes io ON io.indexrelid = s.indexrelid
+        JOIN pg_index i ON i.indexrelid = s.indexrelid
+        JOIN pg_class c ON c.oid = s.indexrelid
+        JOIN pg_am am ON am.oid = c.relam
+        WHERE s.schemaname = %s
+        ORDER BY s.relname, s.indexrelname;
+        """
+        
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, (schema_name,))
+            return cursor.fetchall()
+    
+    def get_stats_context(self):
+        """Block size and when the usage counters were last reset"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT current_setting('block_size')::int, "
+                           "(SELECT stats_reset FROM pg_stat_database WHERE datname = current_database())")
+            return cursor.fetchone()
+    
+    @staticmethod
+    def format_bytes(size):
+        """Human readable byte count"""
+        for unit in ('bytes', 'kB', 'MB', 'GB'):
+            if abs(size) < 1024 or unit == 'GB':
+                return f"{size:,.0f} {unit}" if unit == 'bytes' else f"{size:,.1f} {unit}"
+            size /= 1024
+    
+    @staticmethod
+    def estimate_bloat_bytes(relpages, reltuples, data_width, block_size, tuple_header, page_overhead, fill):
+        """Bytes beyond what reltuples rows of data_width would need
+        
+        Uses the planner's avg_width, 8-byte alignment and 4-byte line pointers; ignores
+        TOAST and per-table fillfactor overrides, so treat the result as an estimate.
+        """
+        if data_width is None or reltuples is None or reltuples < 0 or not relpages:
+            return None
+        tuple_bytes = -(-(tuple_header + float(data_width)) // 8) * 8 + 4
+        usable = (block_size - page_overhead) * fill
+        expected_pages = math.ceil(reltuples * tuple_bytes / usable) if reltuples else 0
+        return max(0, relpages - expected_pages) * block_size
+    
+    def analyze_performance(self, schema_name):
+        """Table access, index usage and bloat for a schema, with findings ranked by expected I/O saving
+        
+        Each finding carries the bytes it would stop reading, writing or caching: index
+        size for unused or duplicate indexes, bloat times full scans for table bloat, and
+        bytes read by sequential scans for scan-heavy tables (an upper bound). Each index
+        gets at most one finding, the strongest of never scanned > duplicate > prefix > bloat.
+        """
+        block_size, stats_reset = self.get_stats_context()
+        tables = self.get_table_usage(schema_name)
+        indexes = self.get_index_usage(schema_name)
+        findings = []
+        
+        table_rows = []
+        table_bloat = {}
+        for table in tables:
+            name = table['table_name']
+            scans = table['seq_scan'] + table['idx_scan']
+            seq_ratio = table['seq_scan'] / scans if scans else 0
+            heap_reads = table['heap_blks_read'] + table['heap_blks_hit']
+            hit_ratio = table['heap_blks_hit'] / heap_reads if heap_reads else None
+            
+            width = table['row_width'] if table['stats_columns'] and table['stats_columns'] >= table['column_count'] else None
+            bloat = self.estimate_bloat_bytes(table['relpages'], table['reltuples'], width, block_size,
+                                              tuple_header=24, page_overhead=24, fill=1.0)
+            table_bloat[name] = bloat
+            
+            last_vacuum = max(filter(None, [table['last_vacuum'], table['last_autovacuum']]), default=None)
+            last_analyze = max(filter(None, [table['last_analyze'], table['last_autoanalyze']]), default=None)
+            
+            table_rows.append([
+                name,
+                f"{table['seq_scan']:,}",
+                f"{table['idx_scan']:,}",
+                f"{seq_ratio:.0%}" if scans else '-',
+                f"{hit_ratio:.1%}" if hit_ratio is not None else '-',
+                f"{table['n_dead_tup']:,}",
+                self.format_bytes(bloat) if bloat is not None else 'n/a',
+                last_vacuum.strftime('%Y-%m-%d %H:%M') if last_vacuum else 'never',
+                last_analyze.strftime('%Y-%m-%d %H:%M') if last_analyze else 'never'
+            ])
+            
+            # Sequential scans over tables big enough for an index to matter
+            if table['relpages'] >= 128 and table['seq_scan'] > table['idx_scan']:
+                scanned = table['seq_scan'] * table['table_bytes']
+                rows_per_scan = table['seq_tup_read'] // max(table['seq_scan'], 1)
+                findings.append((scanned, '⚠️', f"`{name}`: {seq_ratio:.0%} of scans are sequential "
+                                 f"({table['seq_scan']:,} seq vs {table['idx_scan']:,} index, ~{rows_per_scan:,} rows each) - "
+                                 f"check the query-plan audit (--audit-queries) for missing indexes"))
+            
+            if bloat and table['table_bytes'] and bloat / table['table_bytes'] > 0.2 and bloat >= 8 * block_size:
+                findings.append((bloat * max(table['seq_scan'], 1), '⚠️',
+                                 f"`{name}`: ~{self.format_bytes(bloat)} estimated bloat "
+                                 f"({bloat / table['table_bytes']:.0%} of {self.format_bytes(table['table_bytes'])}) - "
+                                 f"VACUUM FULL or pg_repack `{schema_name}.{name}`"))
+            
+            live_dead = table['n_live_tup'] + table['n_dead_tup']
+            if live_dead and table['n_dead_tup'] / live_dead > 0.2:
+                dead_bytes = table['table_bytes'] * table['n_dead_tup'] // live_dead
+                findings.append((dead_bytes, '⚠️', f"`{name}`: {table['n_dead_tup'] / live_dead:.0%} dead tuples, "
+                                 f"last vacuum {last_vacuum.strftime('%Y-%m-%d') if last_vacuum else 'never'} - "
+                                 f"VACUUM (ANALYZE) `{schema_name}.{name}` and review autovacuum_vacuum_scale_factor"))
+            
+            if table['n_live_tup'] and not last_analyze:
+                findings.append((0, 'ℹ️', f"`{name}`: never analyzed - planner estimates and pg_stats are missing; "
+                                 f"run ANALYZE `{schema_name}.{name}`"))
+        
+        index_rows = []
+        by_definition = defaultdict(list)
+        # Strongest finding per index: 0 never scanned, 1 duplicate, 2 prefix of another, 3 bloat
+        index_findings = {}
+        
+        def flag(index, rank, finding):
+            current = index_findings.get(index['index_name'])
+            if current is None or rank < current[0]:
+                index_findings[index['index_name']] = (rank, finding)
+        
+        for index in indexes:
+            bloat = None
+            if index['amname'] == 'btree' and not index['expressions']:
+                # 8-byte index tuple header, 16-byte btree special space, 90% leaf fillfactor, metapage
+                bloat = self.estimate_bloat_bytes(max(index['relpages'] - 1, 0), index['reltuples'], index['key_width'],
+                                                  block_size, tuple_header=8, page_overhead=40, fill=0.9)
+            reads = index['idx_blks_read'] + index['idx_blks_hit']
+            
+            index_rows.append([
+                index['table_name'],
+                index['index_name'],
+                f"{index['idx_scan']:,}",
+                self.format_bytes(index['index_bytes']),
+                self.format_bytes(bloat) if bloat is not None else 'n/a',
+                f"{index['idx_blks_hit'] / reads:.1%}" if reads else '-'
+            ])
+            
+            by_definition[(index['indrelid'], index['amname'], index['indkey'], index['indclass'],
+                           index['expressions'], index['predicate'])].append(index)
+            
+            if index['idx_scan'] == 0 and not (index['indisunique'] or index['indisprimary']):
+                flag(index, 0, (index['index_bytes'], '❌', f"`{index['index_name']}` on `{index['table_name']}` has "
+                                f"never been scanned ({self.format_bytes(index['index_bytes'])}, still maintained on every write) - "
+                                f"DROP INDEX CONCURRENTLY `{schema_name}.{index['index_name']}`"))
+            
+            if bloat and index['index_bytes'] and bloat / index['index_bytes'] > 0.3 and bloat >= 8 * block_size:
+                flag(index, 3, (bloat, '⚠️', f"`{index['index_name']}`: ~{self.format_bytes(bloat)} estimated bloat "
+                                f"({bloat / index['index_bytes']:.0%}) - REINDEX INDEX CONCURRENTLY `{schema_name}.{index['index_name']}`"))
+        
+        # Identical definitions: keep the constraint-backing or most-scanned one
+        for group in by_definition.values():
+            if len(group) < 2:
+                continue
+            keep = max(group, key=lambda index: (index['indisprimary'], index['indisunique'], index['idx_scan']))
+            for index in group:
+                if index is not keep and not (index['indisprimary'] or index['indisunique']):
+                    flag(index, 1, (index['index_bytes'], '❌', f"`{index['index_name']}` duplicates "
+                                    f"`{keep['index_name']}` on `{index['table_name']}` - "
+                                    f"DROP INDEX CONCURRENTLY `{schema_name}.{index['index_name']}`"))
+        
+        # Plain btree whose columns are a leading prefix of another btree with the same predicate.
+        # The covering index must not itself be up for removal, or following both pieces of
+        # advice would drop every index on those columns.
+        dropped = {name for name, (rank, _) in index_findings.items() if rank <= 1}
+        for index in indexes:
+            if index['amname'] != 'btree' or index['expressions'] or index['indisunique'] or index['indisprimary']:
+                continue
+            columns = index['indkey'].split()
+            for other in indexes:
+                if (other is not index and other['index_name'] not in dropped
+                        and other['indrelid'] == index['indrelid'] and other['amname'] == 'btree'
+                        and not other['expressions'] and other['predicate'] == index['predicate']
+                        and len(other['indkey'].split()) > len(columns)
+                        and other['indkey'].split()[:len(columns)] == columns
+                        and other['indclass'].split()[:len(columns)] == index['indclass'].split()):
+                    flag(index, 2, (index['index_bytes'], '⚠️', f"`{index['index_name']}` is a leading prefix of "
+                                    f"`{other['index_name']}` on `{index['table_name']}` - likely redundant"))
+                    break
+        
+        # One finding per index, so its size is counted once in the ranking
+        findings.extend(finding for _, finding in index_findings.values())
+        
+        findings.sort(key=lambda finding: -finding[0])
+        return {
+            'stats_reset': stats_reset,
+            'table_rows': table_rows,
+            'index_rows': index_rows,
+            'findings': findings
+        }
+    
+    @staticmethod
+    def quote_ident(name):
+        """Quote a PostgreSQL identifier"""
+        return '"' + name.replace('"', '""') + '"'
+    
+    @staticmethod
+    def wilson_interval(hits, sample_size, z=1.96):
+        """95% Wilson score interval for a proportion observed in a sample"""
+        if sample_size == 0:
+            return 0.0, 1.0
+        p = hits / sample_size
+        denominator = 1 + z * z / sample_size
+        centre = (p + z * z / (2 * sample_size)) / denominator
+        margin = z * math.sqrt(p * (1 - p) / sample_size + z * z / (4 * sample_size * sample_size)) / denominator
+        return max(0.0, centre - margin), min(1.0, centre + margin)
+    
+    def build_data_quality_query(self, schema_name, table_name, columns, sample_percent=None):
+        """One aggregate query covering every data quality check for a table
+        
+        Returns the SQL and a list of (alias, check, column) in report order.
+        With sample_percent the scan reads a repeatable TABLESAMPLE of the table.
+        """
+        expressions = ['COUNT(*) AS total']
+        checks = []
+        
+        for i, col in enumerate(columns):
+            col_name = col['column_name']
+            quoted = self.quote_ident(col_name)
+            
+            # NULL values in NOT NULL columns
+            if col['is_nullable'] == 'NO':
+                expressions.append(f'COUNT(*) FILTER (WHERE {quoted} IS NULL) AS null_{i}')
+                checks.append((f'null_{i}', 'null', col_name))
+            
+            # Empty strings in text columns
+            if col['data_type'] in ['text', 'varchar', 'character varying']:
+                expressions.append(f"COUNT(*) FILTER (WHERE {quoted} = '') AS empty_{i}")
+                checks.append((f'empty_{i}', 'empty', col_name))
+            
+            # Duplicate values in primary key columns
+            if col['is_primary_key'] == 'YES':
+                expressions.append(f'COUNT(DISTINCT {quoted}) AS distinct_{i}')
+                checks.append((f'distinct_{i}', 'distinct', col_name))
+        
+        query = (f'SELECT {", ".join(expressions)} '
+                 f'FROM {self.quote_ident(schema_name)}.{self.quote_ident(table_name)}')
+        if sample_percent:
+            query += f' TABLESAMPLE {self.sample_method.upper()} ({float(sample_percent)}) REPEATABLE (0)'
+        return query, checks
+    
+    def get_column_stats(self, schema_name, table_name):
+        """Planner statistics (null_frac, n_distinct) per column from pg_stats, if the table was analyzed"""
+        query = """
+        SELECT attname, null_frac, n_distinct
+        FROM pg_stats
+        WHERE schemaname = %s AND tablename = %s;
+        """
+        
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, (schema_name, table_name))
+            return {row['attname']: row for row in cursor.fetchall()}
+    
+    def should_sample(self, estimated_rows):
+        """Sample only when sampling is enabled and the table is above the exact-count threshold"""
+        return bool(self.sample_percent) and (estimated_rows or 0) > self.exact_threshold
+    
+    def analyze_data_quality(self, schema_name, table_name, columns=None, estimated_rows=None):
+        """Analyze data quality for a table in a single scan"""
+        issues = []
+        
+        if columns is None:
+            columns = self.get_columns_info(schema_name, table_name)
+        
+        if self.should_sample(estimated_rows):
+            return self.analyze_data_quality_sampled(schema_name, table_name, columns, estimated_rows)
+        
+        query, checks = self.build_data_quality_query(schema_name, table_name, columns)
+        
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query)
+            result = cursor.fetchone()
+        
+        total_rows = result['total']
+        if total_rows == 0:
+            issues.append("⚠️ Table is empty")
+            return issues, total_rows
+        
+        for alias, check, col_name in checks:
+            value = result[alias]
+            if check == 'null' and value > 0:
+                issues.append(f"❌ Column '{col_name}' (NOT NULL) has {value} NULL values")
+            elif check == 'empty' and value > 0:
+                issues.append(f"⚠️ Column '{col_name}' has {value} empty strings")
+            elif check == 'distinct' and value != total_rows:
+                issues.append(f"❌ Primary key column '{col_name}' has duplicate values")
+        
+        return issues, total_rows
+    
+    def analyze_data_quality_sampled(self, schema_name, table_name, columns, estimated_rows):
+        """Estimate data quality from a TABLESAMPLE scan plus pg_stats
+        
+        Counts are scaled to the planner's row estimate and reported with 95% Wilson
+        bounds. SYSTEM samples whole pages, so clustered problems widen the real
+        interval beyond the reported one; BERNOULLI samples rows independently.
+        """
+        issues = []
+        query, checks = self.build_data_quality_query(schema_name, table_name, columns, self.sample_percent)
+        
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query)
+            result = cursor.fetchone()
+        stats = self.get_column_stats(schema_name, table_name)
+        
+        sample_size = result['total']
+        if sample_size == 0:
+            issues.append("⚠️ Sample returned no rows - raise --sample-percent or --exact-threshold")
+            return issues, estimated_rows
+        
+        def estimate(hits, what):
+            low, high = self.wilson_interval(hits, sample_size)
+            return (f"~{round(hits / sample_size * estimated_rows):,} {what} "
+                    f"(95% CI {math.floor(low * estimated_rows):,}–{math.ceil(high * estimated_rows):,}, "
+                    f"{hits:,}/{sample_size:,} sampled)")
+        
+        for alias, check, col_name in checks:
+            value = result[alias]
+            col_stats = stats.get(col_name)
+            if check == 'null':
+                null_frac = col_stats['null_frac'] if col_stats else 0
+                if value > 0:
+                    issues.append(f"❌ Column '{col_name}' (NOT NULL) has {estimate(value, 'NULL values')}")
+                elif null_frac:
+                    issues.append(f"❌ Column '{col_name}' (NOT NULL) has ~{round(null_frac * estimated_rows):,} "
+                                  f"NULL values (pg_stats null_frac {null_frac:.4f})")
+            elif check == 'empty' and value > 0:
+                issues.append(f"⚠️ Column '{col_name}' has {estimate(value, 'empty strings')}")
+            elif check == 'distinct':
+                n_distinct = col_stats['n_distinct'] if col_stats else None
+                if value != sample_size:
+                    issues.append(f"❌ Primary key column '{col_name}' has duplicate values "
+                                  f"({sample_size - value:,} within the sample)")
+                elif n_distinct is not None and n_distinct != -1:
+                    # Negative n_distinct is a fraction of the row count, positive an absolute count
+                    distinct = -n_distinct * estimated_rows if n_distinct < 0 else n_distinct
+                    if distinct < estimated_rows * 0.99:
+                        issues.append(f"⚠️ Primary key column '{col_name}' may have duplicate values "
+                                      f"(pg_stats n_distinct ~{round(distinct):,} of ~{estimated_rows:,} rows)")
+        
+        return issues, estimated_rows
+    
+    def _analyze_data_quality_per_column(self, schema_name, table_name):
+        """Original per-column data quality checks (one scan per check) - kept for --benchmark-quality"""
         issues = []
         
         with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
@@ -249,6 +709,133 @@ class DatabaseSchemaAnalyzer:
         
         return issues, total_rows
     
+    def table_signature(self, table, columns, indexes, constraints, estimated_rows):
+        """Hash of everything that can change a table's data quality result
+        
+        Write counters and relfilenode (TRUNCATE, VACUUM FULL) cover the data; columns,
+        indexes and constraints cover the DDL; the sampling settings cover how it is scanned.
+        """
+        payload = {
+            'counters': [table['inserts'], table['updates'], table['deletes'], table.get('relfilenode')],
+            'columns': columns,
+            'indexes': sorted(index['indexdef'] for index in indexes),
+            'constraints': sorted((c['constraint_name'], c['constraint_type'], c['column_name'] or '',
+                                   c['check_clause'] or '') for c in constraints),
+            'sampling': [self.sample_percent, self.sample_method] if self.should_sample(estimated_rows) else None
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def render_table_section(self, schema_name, table, indexes=(), constraints=()):
+        """Markdown lines for one table: statistics, columns and data quality"""
+        lines = []
+        table_name = table['table_name']
+        lines.append(f"### Table: `{table_name}`")
+        
+        if table['table_comment']:
+            lines.append(f"**Description:** {table['table_comment']}")
+        
+        # Table statistics
+        stats_data = [
+            ['Size', table['size'] or '0 bytes'],
+            ['Live Tuples', f"{table['live_tuples'] or 0:,}"],
+            ['Dead Tuples', f"{table['dead_tuples'] or 0:,}"],
+            ['Inserts', f"{table['inserts'] or 0:,}"],
+            ['Updates', f"{table['updates'] or 0:,}"],
+            ['Deletes', f"{table['deletes'] or 0:,}"]
+        ]
+        
+        lines.append(tabulate(
+            stats_data,
+            headers=['Metric', 'Value'],
+            tablefmt='pipe'
+        ))
+        lines.append("")
+        
+        # Column information
+        columns = self.get_columns_info(schema_name, table_name)
+        self._columns_cache[(schema_name, table_name)] = columns
+        
+        lines.append(f"#### Columns")
+        
+        column_data = []
+        for col in columns:
+            data_type_display = col['data_type']
+            if col['character_maximum_length']:
+                data_type_display += f"({col['character_maximum_length']})"
+            elif col['numeric_precision']:
+                if col['numeric_scale']:
+                    data_type_display += f"({col['numeric_precision']},{col['numeric_scale']})"
+                else:
+                    data_type_display += f"({col['numeric_precision']})"
+            
+            flags = []
+            if col['is_primary_key'] == 'YES':
+                flags.append('PK')
+            if col['is_foreign_key'] == 'YES':
+                flags.append('FK')
+            if col['is_nullable'] == 'NO':
+                flags.append('NOT NULL')
+            
+            column_data.append([
+                col['column_name'],
+                data_type_display,
+                ' | '.join(flags) if flags else '-',
+                col['column_default'] or '-',
+                col['column_comment'] or '-'
+            ])
+        
+        lines.append(tabulate(
+            column_data,
+            headers=['Column', 'Type', 'Constraints', 'Default', 'Description'],
+            tablefmt='pipe'
+        ))
+        lines.append("")
+        
+        # Data quality analysis
+        lines.append(f"#### Data Quality Analysis")
+        estimated_rows = max(table['live_tuples'] or 0, table.get('estimated_rows') or 0)
+        if self.should_sample(estimated_rows):
+            lines.append(f"ℹ️ Sampled {self.sample_percent}% ({self.sample_method.upper()}) of ~{estimated_rows:,} rows - "
+                         f"counts are estimates with 95% confidence bounds")
+        # Reuse the previous run's result when nothing that affects it has changed
+        signature = self.table_signature(table, columns, indexes, constraints, estimated_rows)
+        cached = ((self.previous_snapshot or {}).get('tables') or {}).get(f"{schema_name}.{table_name}")
+        if cached and cached.get('signature') == signature:
+            issues = cached['data_quality']
+            lines.append(f"ℹ️ Unchanged since {self.previous_snapshot['generated_at']} - data quality result reused")
+        else:
+            issues, row_count = self.analyze_data_quality(schema_name, table_name, columns, estimated_rows)
+        
+        self.snapshot['tables'][f"{schema_name}.{table_name}"] = {
+            'signature': signature,
+            'live_tuples': table['live_tuples'] or 0,
+            'dead_tuples': table['dead_tuples'] or 0,
+            'size_bytes': table.get('size_bytes') or 0,
+            'columns': {
+                col['column_name']: {
+                    'data_type': col['data_type'],
+                    'max_length': col['character_maximum_length'],
+                    'nullable': col['is_nullable'],
+                    'default': col['column_default']
+                }
+                for col in columns
+            },
+            'indexes': {index['indexname']: index['indexdef'] for index in indexes},
+            'data_quality': issues,
+            'reused': bool(cached and cached.get('signature') == signature)
+        }
+        
+        if not issues:
+            lines.append("✅ No data quality issues detected")
+        else:
+            for issue in issues:
+                lines.append(issue)
+        
+        lines.append("")
+        
+        return lines
+    
     def generate_markdown_report(self):
         """Generate comprehensive markdown report"""
         self.add_to_report(f"# PostgreSQL Database Schema Analysis Report")
@@ -308,81 +895,20 @@ class DatabaseSchemaAnalyzer:
             self.add_to_report(f"**Total Rows:** {total_rows:,}")
             self.add_to_report("")
             
-            # Detailed table analysis
-            for table in tables:
-                table_name = table['table_name']
-                self.add_to_report(f"### Table: `{table_name}`")
-                
-                if table['table_comment']:
-                    self.add_to_report(f"**Description:** {table['table_comment']}")
-                
-                # Table statistics
-                stats_data = [
-                    ['Size', table['size'] or '0 bytes'],
-                    ['Live Tuples', f"{table['live_tuples'] or 0:,}"],
-                    ['Dead Tuples', f"{table['dead_tuples'] or 0:,}"],
-                    ['Inserts', f"{table['inserts'] or 0:,}"],
-                    ['Updates', f"{table['updates'] or 0:,}"],
-                    ['Deletes', f"{table['deletes'] or 0:,}"]
-                ]
-                
-                self.add_to_report(tabulate(
-                    stats_data,
-                    headers=['Metric', 'Value'],
-                    tablefmt='pipe'
-                ))
-                self.add_to_report("")
-                
-                # Column information
-                columns = self.get_columns_info(schema_name, table_name)
-                
-                self.add_to_report(f"#### Columns")
-                
-                column_data = []
-                for col in columns:
-                    data_type_display = col['data_type']
-                    if col['character_maximum_length']:
-                        data_type_display += f"({col['character_maximum_length']})"
-                    elif col['numeric_precision']:
-                        if col['numeric_scale']:
-                            data_type_display += f"({col['numeric_precision']},{col['numeric_scale']})"
-                        else:
-                            data_type_display += f"({col['numeric_precision']})"
-                    
-                    flags = []
-                    if col['is_primary_key'] == 'YES':
-                        flags.append('PK')
-                    if col['is_foreign_key'] == 'YES':
-                        flags.append('FK')
-                    if col['is_nullable'] == 'NO':
-                        flags.append('NOT NULL')
-                    
-                    column_data.append([
-                        col['column_name'],
-                        data_type_display,
-                        ' | '.join(flags) if flags else '-',
-                        col['column_default'] or '-',
-                        col['column_comment'] or '-'
-                    ])
-                
-                self.add_to_report(tabulate(
-                    column_data,
-                    headers=['Column', 'Type', 'Constraints', 'Default', 'Description'],
-                    tablefmt='pipe'
-                ))
-                self.add_to_report("")
-                
-                # Data quality analysis
-                self.add_to_report(f"#### Data Quality Analysis")
-                issues, row_count = self.analyze_data_quality(schema_name, table_name)
-                
-                if not issues:
-                    self.add_to_report("✅ No data quality issues detected")
-                else:
-                    for issue in issues:
-                        self.add_to_report(issue)
-                
-                self.add_to_report("")
+            # Indexes and constraints feed the per-table DDL signature as well as their sections
+            indexes = self.get_indexes(schema_name)
+            constraints = self.get_constraints(schema_name)
+            
+            # Detailed table analysis (concurrent with --jobs, emitted in table order)
+            sections = self._map(self.render_table_section, [
+                (schema_name, table,
+                 [index for index in indexes if index['tablename'] == table['table_name']],
+                 [constraint for constraint in constraints if constraint['table_name'] == table['table_name']])
+                for table in tables
+            ])
+            for lines in sections:
+                for line in lines:
+                    self.add_to_report(line)
             
             # Foreign Key Relationships
             foreign_keys = self.get_foreign_keys(schema_name)
@@ -408,8 +934,6 @@ class DatabaseSchemaAnalyzer:
                 self.add_to_report("")
             
             # Indexes
-            indexes = self.get_indexes(schema_name)
-            
             if indexes:
                 self.add_to_report(f"### Indexes")
                 
@@ -430,8 +954,6 @@ class DatabaseSchemaAnalyzer:
                 self.add_to_report("")
             
             # Constraints
-            constraints = self.get_constraints(schema_name)
-            
             if constraints:
                 self.add_to_report(f"### Constraints")
                 
@@ -451,6 +973,40 @@ class DatabaseSchemaAnalyzer:
                     tablefmt='pipe'
                 ))
                 self.add_to_report("")
+            
+            # Index usage, bloat and maintenance
+            performance = self.analyze_performance(schema_name)
+            stats_reset = performance['stats_reset']
+            
+            self.add_to_report("### Index Usage & Bloat")
+            self.add_to_report(f"**Usage counters since:** {stats_reset.strftime('%Y-%m-%d %H:%M') if stats_reset else 'server start'}")
+            self.add_to_report("")
+            
+            self.add_to_report("#### Table Access & Maintenance")
+            self.add_to_report(tabulate(
+                performance['table_rows'],
+                headers=['Table', 'Seq Scans', 'Index Scans', 'Seq %', 'Cache Hit', 'Dead Tuples',
+                         'Est. Bloat', 'Last Vacuum', 'Last Analyze'],
+                tablefmt='pipe'
+            ))
+            self.add_to_report("")
+            
+            if performance['index_rows']:
+                self.add_to_report("#### Index Usage")
+                self.add_to_report(tabulate(
+                    performance['index_rows'],
+                    headers=['Table', 'Index', 'Scans', 'Size', 'Est. Bloat', 'Cache Hit'],
+                    tablefmt='pipe'
+                ))
+                self.add_to_report("")
+            
+            self.add_to_report("#### Findings (ranked by estimated I/O saving)")
+            if not performance['findings']:
+                self.add_to_report("✅ No unused or duplicate indexes, bloat or scan-heavy tables detected")
+            for i, (saving, icon, text) in enumerate(performance['findings'], 1):
+                estimate = f" _(~{self.format_bytes(saving)})_" if saving else ''
+                self.add_to_report(f"{i}. {icon} {text}{estimate}")
+            self.add_to_report("")
         
         # Schema Analysis and Recommendations
         self.add_to_report("## Schema Analysis & Recommendations")
@@ -467,7 +1023,7 @@ class DatabaseSchemaAnalyzer:
             # Check for tables without primary keys
             for table in tables:
                 table_name = table['table_name']
-                columns = self.get_columns_info(schema_name, table_name)
+                columns = self._columns_cache.get((schema_name, table_name)) or self.get_columns_info(schema_name, table_name)
                 has_pk = any(col['is_primary_key'] == 'YES' for col in columns)
                 
                 if not has_pk:
@@ -524,6 +1080,192 @@ class DatabaseSchemaAnalyzer:
         self.add_to_report("4. Regular VACUUM and ANALYZE operations")
         self.add_to_report("5. Monitor database size and plan for scaling")
         self.add_to_report("")
+        
+        self.snapshot['generated_at'] = datetime.datetime.now().isoformat(timespec='seconds')
+        self.snapshot['database'] = self.pg_config['database']
+        if self.previous_snapshot:
+            self.snapshot_diff = self.diff_snapshots(self.previous_snapshot, self.snapshot)
+            self.render_snapshot_diff(self.snapshot_diff)
+    
+    @staticmethod
+    def load_snapshot(path):
+        """Previous run's catalog snapshot, or None"""
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    def save_snapshot(self, path):
+        """Persist this run's catalog snapshot"""
+        with open(path, 'w') as f:
+            json.dump(self.snapshot, f, indent=2, sort_keys=True, default=str)
+        
+        print(f"🗂️ Snapshot saved to: {path}")
+    
+    @staticmethod
+    def diff_snapshots(previous, current):
+        """Table growth, column and index changes between two snapshots"""
+        elapsed_days = (datetime.datetime.fromisoformat(current['generated_at']) -
+                        datetime.datetime.fromisoformat(previous['generated_at'])).total_seconds() / 86400
+        before, after = previous.get('tables', {}), current.get('tables', {})
+        
+        diff = {
+            'from': previous['generated_at'],
+            'to': current['generated_at'],
+            'elapsed_days': round(elapsed_days, 3),
+            'tables_added': sorted(set(after) - set(before)),
+            'tables_dropped': sorted(set(before) - set(after)),
+            'tables_reanalyzed': sorted(name for name, table in after.items() if not table.get('reused')),
+            'growth': [],
+            'columns': [],
+            'indexes': []
+        }
+        
+        for name in sorted(set(before) & set(after)):
+            old, new = before[name], after[name]
+            
+            row_delta = new['live_tuples'] - old['live_tuples']
+            size_delta = new['size_bytes'] - old['size_bytes']
+            if row_delta or size_delta:
+                growth = {
+                    'table': name,
+                    'rows_before': old['live_tuples'],
+                    'rows_after': new['live_tuples'],
+                    'row_delta': row_delta,
+                    'size_bytes_before': old['size_bytes'],
+                    'size_bytes_after': new['size_bytes'],
+                    'size_delta_bytes': size_delta
+                }
+                if elapsed_days > 0:
+                    growth['rows_per_day'] = round(row_delta / elapsed_days, 1)
+                    growth['bytes_per_day'] = round(size_delta / elapsed_days)
+                    growth['projected_rows_90d'] = max(0, round(new['live_tuples'] + growth['rows_per_day'] * 90))
+                    growth['projected_size_bytes_90d'] = max(0, new['size_bytes'] + growth['bytes_per_day'] * 90)
+                diff['growth'].append(growth)
+            
+            for column in sorted(set(new['columns']) - set(old['columns'])):
+                diff['columns'].append({'table': name, 'column': column, 'change': 'added', 'after': new['columns'][column]})
+            for column in sorted(set(old['columns']) - set(new['columns'])):
+                diff['columns'].append({'table': name, 'column': column, 'change': 'dropped', 'before': old['columns'][column]})
+            for column in sorted(set(old['columns']) & set(new['columns'])):
+                if old['columns'][column] != new['columns'][column]:
+                    diff['columns'].append({'table': name, 'column': column, 'change': 'altered',
+                                            'before': old['columns'][column], 'after': new['columns'][column]})
+            
+            for index in sorted(set(new['indexes']) - set(old['indexes'])):
+                diff['indexes'].append({'table': name, 'index': index, 'change': 'added', 'after': new['indexes'][index]})
+            for index in sorted(set(old['indexes']) - set(new['indexes'])):
+                diff['indexes'].append({'table': name, 'index': index, 'change': 'dropped', 'before': old['indexes'][index]})
+            for index in sorted(set(old['indexes']) & set(new['indexes'])):
+                if old['indexes'][index] != new['indexes'][index]:
+                    diff['indexes'].append({'table': name, 'index': index, 'change': 'altered',
+                                            'before': old['indexes'][index], 'after': new['indexes'][index]})
+        
+        diff['growth'].sort(key=lambda growth: -abs(growth['size_delta_bytes']))
+        return diff
+    
+    def render_snapshot_diff(self, diff):
+        """Markdown summary of a snapshot diff"""
+        self.add_to_report("## Changes Since Last Snapshot")
+        self.add_to_report(f"**Previous snapshot:** {diff['from']} ({diff['elapsed_days']:.1f} days ago)")
+        self.add_to_report(f"**Re-analyzed tables:** {len(diff['tables_reanalyzed'])} "
+                           f"(others reused the previous data quality result)")
+        self.add_to_report("")
+        
+        for label, key in (('New tables', 'tables_added'), ('Dropped tables', 'tables_dropped')):
+            if diff[key]:
+                self.add_to_report(f"**{label}:** {', '.join(f'`{name}`' for name in diff[key])}")
+                self.add_to_report("")
+        
+        if diff['growth']:
+            self.add_to_report("### Growth")
+            self.add_to_report(tabulate(
+                [[
+                    growth['table'],
+                    f"{growth['rows_before']:,} → {growth['rows_after']:,}",
+                    f"{growth['row_delta']:+,}",
+                    f"{self.format_bytes(growth['size_bytes_before'])} → {self.format_bytes(growth['size_bytes_after'])}",
+                    f"{growth['rows_per_day']:+,.1f}" if 'rows_per_day' in growth else '-',
+                    f"{growth['projected_rows_90d']:,}" if 'projected_rows_90d' in growth else '-'
+                ] for growth in diff['growth']],
+                headers=['Table', 'Rows', 'Δ Rows', 'Size', 'Rows/Day', 'Rows in 90d'],
+                tablefmt='pipe'
+            ))
+            self.add_to_report("")
+        
+        if diff['columns'] or diff['indexes']:
+            self.add_to_report("### DDL Changes")
+            for change in diff['columns']:
+                self.add_to_report(f"- Column `{change['table']}.{change['column']}` {change['change']}")
+            for change in diff['indexes']:
+                self.add_to_report(f"- Index `{change['index']}` on `{change['table']}` {change['change']}")
+            self.add_to_report("")
+        
+        if not (diff['growth'] or diff['columns'] or diff['indexes'] or diff['tables_added'] or diff['tables_dropped']):
+            self.add_to_report("✅ No growth or DDL changes")
+            self.add_to_report("")
+    
+    def benchmark_data_quality(self, column_count=100, row_count=50000):
+        """Compare per-column and single-pass data quality checks on a wide synthetic temp table"""
+        table_name = 'schema_analyzer_quality_bench'
+        
+        # Mix of NOT NULL text, nullable text and integer columns with some empties
+        column_defs = ['id integer PRIMARY KEY']
+        select_exprs = ['g']
+        for i in range(column_count):
+            kind = i % 4
+            if kind in (0, 1):
+                column_defs.append(f'c{i} text NOT NULL')
+                select_exprs.append(f"CASE WHEN g % {i + 7} = 0 THEN '' ELSE md5((g + {i})::text) END")
+            elif kind == 2:
+                column_defs.append(f'c{i} text')
+                select_exprs.append(f"CASE WHEN g % {i + 3} = 0 THEN NULL ELSE md5(g::text) END")
+            else:
+                column_defs.append(f'c{i} integer')
+                select_exprs.append(f'g % {i + 11}')
+        
+        with self.conn.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS pg_temp.{table_name}')
+            cursor.execute(f'CREATE TEMP TABLE {table_name} ({", ".join(column_defs)})')
+            cursor.execute(f'INSERT INTO {table_name} SELECT {", ".join(select_exprs)} '
+                           f'FROM generate_series(1, %s) AS g', (row_count,))
+            cursor.execute(f'ANALYZE {table_name}')
+            cursor.execute('SELECT nspname FROM pg_namespace WHERE oid = pg_my_temp_schema()')
+            schema_name = cursor.fetchone()[0]
+        
+        print(f"🧪 Synthetic table: {column_count + 1} columns x {row_count:,} rows")
+        
+        start = time.perf_counter()
+        legacy_issues, _ = self._analyze_data_quality_per_column(schema_name, table_name)
+        legacy_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        issues, _ = self.analyze_data_quality(schema_name, table_name)
+        single_pass_time = time.perf_counter() - start
+        
+        rows = [
+            ['Per-column scans', f"{legacy_time:.3f}", len(legacy_issues)],
+            ['Single pass', f"{single_pass_time:.3f}", len(issues)]
+        ]
+        
+        if self.sample_percent:
+            start = time.perf_counter()
+            sampled_issues, _ = self.analyze_data_quality_sampled(
+                schema_name, table_name, self.get_columns_info(schema_name, table_name), row_count)
+            sampled_time = time.perf_counter() - start
+            rows.append([f"Sampled {self.sample_percent}% ({self.sample_method.upper()})",
+                         f"{sampled_time:.3f}", len(sampled_issues)])
+        
+        print(tabulate(
+            rows,
+            headers=['Method', 'Seconds', 'Issues'],
+            tablefmt='pipe'
+        ))
+        print(f"⚡ Speedup: {legacy_time / single_pass_time:.1f}x")
+        
+        identical = issues == legacy_issues
+        print(f"{'✅' if identical else '❌'} Issue lists {'identical' if identical else 'differ'}")
+        return identical
     
     def save_report(self, filename):
         """Save the report to a file"""
@@ -544,15 +1286,75 @@ class DatabaseSchemaAnalyzer:
             self.add_to_report(f"❌ Error during analysis: {e}")
             return False
         finally:
+            if self.pool:
+                self.pool.closeall()
             if self.conn:
                 self.conn.close()
 
 def main():
-    analyzer = DatabaseSchemaAnalyzer()
+    parser = argparse.ArgumentParser(description='PostgreSQL database schema analyzer')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Analyze tables concurrently on a pool of N connections (default: 1)')
+    parser.add_argument('--sample-percent', type=float,
+                        help='Estimate data quality from a TABLESAMPLE of this percentage on large tables')
+    parser.add_argument('--sample-method', choices=['system', 'bernoulli'], default='system',
+                        help='TABLESAMPLE method: system (pages, fastest) or bernoulli (rows) (default: system)')
+    parser.add_argument('--exact-threshold', type=int, default=100000,
+                        help='Tables with at most this many estimated rows are always checked exactly (default: 100000)')
+    parser.add_argument('--snapshot',
+                        help='Catalog snapshot path (default: database_schema_snapshot_<database>.json)')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the previous snapshot and re-analyze every table')
+    parser.add_argument('--audit-queries', action='store_true',
+                        help='EXPLAIN ANALYZE the migration extraction queries and recommend indexes (query_plan_auditor.py)')
+    parser.add_argument('--benchmark-quality', action='store_true',
+                        help='Time per-column vs single-pass data quality checks on a wide synthetic temp table')
+    parser.add_argument('--bench-columns', type=int, default=100, help='Synthetic table width (default: 100)')
+    parser.add_argument('--bench-rows', type=int, default=50000, help='Synthetic table rows (default: 50000)')
+    args = parser.parse_args()
+    
+    if args.sample_percent is not None and not 0 < args.sample_percent <= 100:
+        parser.error('--sample-percent must be in (0, 100]')
+    
+    analyzer = DatabaseSchemaAnalyzer(
+        jobs=1 if args.benchmark_quality or args.audit_queries else max(1, args.jobs),
+        sample_percent=args.sample_percent,
+        sample_method=args.sample_method,
+        exact_threshold=args.exact_threshold
+    )
+    
+    if args.audit_queries:
+        from query_plan_auditor import QueryPlanAuditor
+        
+        if not analyzer.connect():
+            return
+        try:
+            auditor = QueryPlanAuditor(analyzer.conn)
+            auditor.run()
+        finally:
+            analyzer.conn.close()
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        auditor.save_report(f"query_plan_audit_{timestamp}.md")
+        return
+    
+    if args.benchmark_quality:
+        if not analyzer.connect():
+            return
+        try:
+            analyzer.benchmark_data_quality(args.bench_columns, args.bench_rows)
+        finally:
+            analyzer.conn.close()
+        return
+    
+    snapshot_path = args.snapshot or f"database_schema_snapshot_{analyzer.pg_config['database']}.json"
+    if not args.full:
+        analyzer.previous_snapshot = analyzer.load_snapshot(snapshot_path)
     
     print("🔍 Starting PostgreSQL Database Schema Analysis...")
     print(f"Database: {analyzer.pg_config['database']}")
     print(f"Host: {analyzer.pg_config['host']}")
+    if analyzer.previous_snapshot:
+        print(f"Incremental: reusing results for tables unchanged since {analyzer.previous_snapshot['generated_at']}")
     print("=" * 60)
     
     if analyzer.run_analysis():
@@ -560,6 +1362,13 @@ def main():
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = f"database_schema_analysis_{timestamp}.md"
         analyzer.save_report(filename)
+        analyzer.save_snapshot(snapshot_path)
+        
+        if analyzer.snapshot_diff:
+            diff_filename = f"database_schema_diff_{timestamp}.json"
+            with open(diff_filename, 'w') as f:
+                json.dump(analyzer.snapshot_diff, f, indent=2, default=str)
+            print(f"📈 Snapshot diff saved to: {diff_filename}")
         
         print("\n✅ Analysis completed successfully!")
         print(f"📊 Full report saved to: {filename}")
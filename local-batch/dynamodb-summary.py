@@ -1,33 +1,234 @@
 #!/usr/bin/env python3
 """
-Summarize all DynamoDB tables in the current AWS account/region using the dynamodb_rw_user profile.
+DynamoDB Inventory
+Summarizes every DynamoDB table in us-east-1 and eu-west-1 (or --regions) as JSON.
+
+list_tables is paginated and all describe_table calls run concurrently across regions.
+Per table: status, billing mode, provisioned throughput, item count and size, GSI/LSI
+sizes, and the auto-scaling targets/policies applied by OPTIMIZE.sh. The JSON file is
+timestamped so successive runs can be compared to track table growth.
+
+Usage:
+    python3 dynamodb-summary.py
+    python3 dynamodb-summary.py --regions eu-west-1 --profile dynamodb_rw_user
+    python3 dynamodb-summary.py --output -        # JSON to stdout only
 """
-import boto3
+
 import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+DEFAULT_REGIONS = ['us-east-1', 'eu-west-1']
+
+
+def format_bytes(size: int) -> str:
+    """Human readable byte size"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def key_schema(description: Dict[str, Any]) -> List[str]:
+    """Key schema as ['lesson_id (HASH, N)', ...]"""
+    types = {a['AttributeName']: a['AttributeType'] for a in description.get('AttributeDefinitions', [])}
+    return [f"{k['AttributeName']} ({k['KeyType']}, {types.get(k['AttributeName'], '?')})"
+            for k in description.get('KeySchema', [])]
+
+
+def throughput(description: Dict[str, Any]) -> Dict[str, int]:
+    provisioned = description.get('ProvisionedThroughput', {})
+    return {
+        'read_capacity_units': provisioned.get('ReadCapacityUnits', 0),
+        'write_capacity_units': provisioned.get('WriteCapacityUnits', 0)
+    }
+
+
+def list_table_names(client) -> List[str]:
+    """All table names in a region, following LastEvaluatedTableName"""
+    names = []
+    for page in client.get_paginator('list_tables').paginate():
+        names.extend(page.get('TableNames', []))
+    return names
+
+
+def get_auto_scaling(client) -> Dict[str, Dict[str, Any]]:
+    """Scalable targets and target-tracking policies per resource ('table/x' or 'table/x/index/y')"""
+    scaling = {}
+    for page in client.get_paginator('describe_scalable_targets').paginate(ServiceNamespace='dynamodb'):
+        for target in page['ScalableTargets']:
+            dimension = target['ScalableDimension'].rsplit(':', 1)[-1]
+            scaling.setdefault(target['ResourceId'], {})[dimension] = {
+                'min_capacity': target['MinCapacity'],
+                'max_capacity': target['MaxCapacity']
+            }
+    for page in client.get_paginator('describe_scaling_policies').paginate(ServiceNamespace='dynamodb'):
+        for policy in page['ScalingPolicies']:
+            dimension = policy['ScalableDimension'].rsplit(':', 1)[-1]
+            settings = scaling.setdefault(policy['ResourceId'], {}).setdefault(dimension, {})
+            tracking = policy.get('TargetTrackingScalingPolicyConfiguration', {})
+            settings['policy_name'] = policy['PolicyName']
+            settings['target_utilization'] = tracking.get('TargetValue')
+    return scaling
+
+
+def describe(client, region: str, table_name: str) -> Dict[str, Any]:
+    """Inventory entry for one table"""
+    try:
+        table = client.describe_table(TableName=table_name)['Table']
+    except ClientError as e:
+        return {'region': region, 'table_name': table_name, 'error': e.response['Error']['Code']}
+
+    indexes = []
+    for index_type, key in (('GSI', 'GlobalSecondaryIndexes'), ('LSI', 'LocalSecondaryIndexes')):
+        for index in table.get(key, []):
+            entry = {
+                'name': index['IndexName'],
+                'type': index_type,
+                'key_schema': key_schema({'KeySchema': index['KeySchema'],
+                                          'AttributeDefinitions': table.get('AttributeDefinitions', [])}),
+                'projection': index.get('Projection', {}).get('ProjectionType'),
+                'item_count': index.get('ItemCount', 0),
+                'size_bytes': index.get('IndexSizeBytes', 0)
+            }
+            if index_type == 'GSI':
+                entry['status'] = index.get('IndexStatus')
+                entry['provisioned_throughput'] = throughput(index)
+            indexes.append(entry)
+
+    stream = table.get('StreamSpecification', {})
+    return {
+        'region': region,
+        'table_name': table_name,
+        'status': table['TableStatus'],
+        'billing_mode': table.get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED'),
+        'table_class': table.get('TableClassSummary', {}).get('TableClass', 'STANDARD'),
+        'provisioned_throughput': throughput(table),
+        'item_count': table.get('ItemCount', 0),
+        'size_bytes': table.get('TableSizeBytes', 0),
+        'index_size_bytes': sum(index['size_bytes'] for index in indexes),
+        'key_schema': key_schema(table),
+        'indexes': indexes,
+        'stream': stream.get('StreamViewType') if stream.get('StreamEnabled') else None,
+        'deletion_protection': table.get('DeletionProtectionEnabled', False),
+        'created': table['CreationDateTime'].isoformat(),
+        'arn': table['TableArn']
+    }
+
+
+def collect_inventory(session, regions: List[str], workers: int) -> Dict[str, Any]:
+    """List every region, then describe all tables and read auto-scaling concurrently"""
+    config = Config(max_pool_connections=workers, retries={'max_attempts': 10, 'mode': 'adaptive'})
+    dynamodb = {region: session.client('dynamodb', region_name=region, config=config) for region in regions}
+    autoscaling = {region: session.client('application-autoscaling', region_name=region, config=config)
+                   for region in regions}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scaling_futures = {region: executor.submit(get_auto_scaling, autoscaling[region]) for region in regions}
+        name_futures = {region: executor.submit(list_table_names, dynamodb[region]) for region in regions}
+
+        describe_futures = []
+        for region in regions:
+            for table_name in name_futures[region].result():
+                describe_futures.append(executor.submit(describe, dynamodb[region], region, table_name))
+        tables = [future.result() for future in describe_futures]
+
+        scaling = {}
+        for region, future in scaling_futures.items():
+            try:
+                scaling[region] = future.result()
+            except ClientError as e:
+                print(f"⚠️  Could not read auto scaling in {region}: {e.response['Error']['Code']}", file=sys.stderr)
+                scaling[region] = {}
+
+    for table in tables:
+        if 'error' in table:
+            continue
+        region_scaling = scaling[table['region']]
+        table['auto_scaling'] = region_scaling.get(f"table/{table['table_name']}", {})
+        for index in table['indexes']:
+            if index['type'] == 'GSI':
+                index['auto_scaling'] = region_scaling.get(f"table/{table['table_name']}/index/{index['name']}", {})
+
+    regions_summary = {}
+    for region in regions:
+        region_tables = [t for t in tables if t['region'] == region and 'error' not in t]
+        regions_summary[region] = {
+            'table_count': len(region_tables),
+            'item_count': sum(t['item_count'] for t in region_tables),
+            'size_bytes': sum(t['size_bytes'] for t in region_tables),
+            'index_size_bytes': sum(t['index_size_bytes'] for t in region_tables)
+        }
+
+    return {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'regions': regions_summary,
+        'tables': sorted(tables, key=lambda t: (t['region'], t['table_name']))
+    }
+
+
+def print_summary(inventory: Dict[str, Any]):
+    """Compact human readable view of the inventory"""
+    for region, totals in inventory['regions'].items():
+        print(f"\n🌍 {region}: {totals['table_count']} tables, {totals['item_count']:,} items, "
+              f"{format_bytes(totals['size_bytes'])} (+{format_bytes(totals['index_size_bytes'])} indexes)")
+        for table in (t for t in inventory['tables'] if t['region'] == region):
+            if 'error' in table:
+                print(f"  - {table['table_name']}: ❌ {table['error']}")
+                continue
+            capacity = ''
+            if table['billing_mode'] == 'PROVISIONED':
+                pt = table['provisioned_throughput']
+                capacity = f" {pt['read_capacity_units']}R/{pt['write_capacity_units']}W"
+                for dimension, settings in sorted(table['auto_scaling'].items()):
+                    short = 'R' if dimension.startswith('Read') else 'W'
+                    target = f" @{settings['target_utilization']:.0f}%" if settings.get('target_utilization') else ''
+                    capacity += f" [{short} {settings.get('min_capacity')}-{settings.get('max_capacity')}{target}]"
+            print(f"  - {table['table_name']} ({table['status']}, {table['billing_mode']}{capacity}): "
+                  f"{table['item_count']:,} items, {format_bytes(table['size_bytes'])}")
+            for index in table['indexes']:
+                print(f"      {index['type']} {index['name']}: {index['item_count']:,} items, "
+                      f"{format_bytes(index['size_bytes'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent DynamoDB inventory across regions')
+    parser.add_argument('--regions', default=','.join(DEFAULT_REGIONS),
+                        help=f"Comma-separated regions (default: {','.join(DEFAULT_REGIONS)})")
+    parser.add_argument('--profile', default=os.getenv('AWS_PROFILE'),
+                        help='AWS profile (default: $AWS_PROFILE or the default credential chain)')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent API calls (default: 16)')
+    parser.add_argument('--output', help="JSON file (default: dynamodb-summary_<timestamp>.json, '-' for stdout)")
+    args = parser.parse_args()
 
-aws_profile = 'dynamodb_rw_user'
-region = 'eu-west-1'
+    regions = [r.strip() for r in args.regions.split(',') if r.strip()]
+    session = boto3.Session(profile_name=args.profile) if args.profile else boto3.Session()
 
-session = boto3.Session(profile_name=aws_profile, region_name=region)
-dynamodb_client = session.client('dynamodb', region_name=region)
+    start = time.time()
+    inventory = collect_inventory(session, regions, max(1, args.workers))
+    inventory['profile'] = args.profile
 
-print(f"Using AWS profile: {aws_profile} in region: {region}\n")
+    if args.output == '-':
+        print(json.dumps(inventory, indent=2))
+        return
 
-response = dynamodb_client.list_tables()
-tables = response.get('TableNames', [])
+    print(f"Using AWS profile: {args.profile or 'default'} in regions: {', '.join(regions)}")
+    print_summary(inventory)
+    output = args.output or f"dynamodb-summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(inventory, f, indent=2)
+    print(f"\n📄 Inventory of {len(inventory['tables'])} tables saved to {output} ({time.time() - start:.1f}s)")
 
-if not tables:
-    print("No DynamoDB tables found.")
-    exit(0)
 
-print(f"Found {len(tables)} DynamoDB tables:")
-for table_name in tables:
-    print(f"- {table_name}")
-    desc = dynamodb_client.describe_table(TableName=table_name)['Table']
-    print(f"  Status: {desc['TableStatus']}")
-    print(f"  Item count: {desc.get('ItemCount', 'N/A')}")
-    print(f"  Size (bytes): {desc.get('TableSizeBytes', 'N/A')}")
-    print(f"  ARN: {desc['TableArn']}")
-    print(f"  Created: {desc['CreationDateTime']}")
-    print(f"  Key schema: {desc['KeySchema']}")
-    print()
+if __name__ == "__main__":
+    main()
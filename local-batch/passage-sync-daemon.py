@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Passage Sync Daemon (change data capture)
+- Triggers on lessons, passages and questions append the affected keys to an outbox table
+- The daemon drains the outbox in batches and rebuilds only the affected pni-passages items
+- Items have the same shape as postgres-to-dynamodb-unified.py writes them
+- Drained rows are deleted in the same transaction that read them, so a crash or
+  restart simply re-processes the last batch (rebuilds are idempotent)
+- Several daemons may drain the same outbox: rows are claimed with SKIP LOCKED and
+  each passage is rebuilt under a transaction-level advisory lock, so writes to one
+  passage land in commit order
+
+Usage:
+    python3 passage-sync-daemon.py prod --install      # create outbox, state table and triggers
+    python3 passage-sync-daemon.py prod                # run until Ctrl+C
+    python3 passage-sync-daemon.py prod --once         # drain what is queued, then exit
+"""
+
+import os
+import sys
+import time
+import select
+import argparse
+import configparser
+from typing import Dict, List, Any, Set, Tuple
+
+import boto3
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+# Item cleaning is shared with the passage Lambda
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'passage'))
+from passage_sinks import clean_passage_item
+
+PASSAGES_TABLE = 'pni-passages'
+TOPICS_TABLE = 'pni-topics'
+CACHE_METADATA_TABLE = 'pni-cache-metadata'
+
+ENVIRONMENT_REGIONS = {
+    'dev': 'us-east-1',
+    'prod': 'eu-west-1'
+}
+
+SYNC_CHANNEL = 'passage_sync'
+
+# Proficiency level prefix -> pni-passages proficiency category
+PROFICIENCY_CATEGORIES = {
+    'A': 'beginner',
+    'B': 'intermediate',
+    'C': 'advanced'
+}
+
+OUTBOX_SQL = """
+CREATE TABLE IF NOT EXISTS practise_improve_pilot.passage_sync_outbox (
+    id          BIGSERIAL PRIMARY KEY,
+    source      TEXT NOT NULL,
+    lesson_id   BIGINT,
+    passage_id  TEXT,
+    changed_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS practise_improve_pilot.passage_sync_state (
+    consumer      TEXT PRIMARY KEY,
+    last_id       BIGINT NOT NULL DEFAULT 0,
+    drained_rows  BIGINT NOT NULL DEFAULT 0,
+    updated_at    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- lessons: lesson_id only (every passage of the lesson is rebuilt)
+-- passages: lesson_id + passage_id, old and new if the passage moved
+-- questions: passage_id only, old and new if the question moved
+CREATE OR REPLACE FUNCTION practise_improve_pilot.passage_sync_capture() RETURNS trigger AS $$
+BEGIN
+    IF TG_TABLE_NAME = 'lessons' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, lesson_id) VALUES (TG_TABLE_NAME, OLD.id);
+        END IF;
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, lesson_id) VALUES (TG_TABLE_NAME, NEW.id);
+        END IF;
+    ELSIF TG_TABLE_NAME = 'passages' THEN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, lesson_id, passage_id)
+            VALUES (TG_TABLE_NAME, OLD.lesson_id, OLD.id::text);
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.lesson_id IS DISTINCT FROM OLD.lesson_id) THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, lesson_id, passage_id)
+            VALUES (TG_TABLE_NAME, NEW.lesson_id, NEW.id::text);
+        END IF;
+    ELSE
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, passage_id) VALUES (TG_TABLE_NAME, OLD.passage_id);
+        END IF;
+        IF TG_OP = 'INSERT' OR (TG_OP = 'UPDATE' AND NEW.passage_id IS DISTINCT FROM OLD.passage_id) THEN
+            INSERT INTO practise_improve_pilot.passage_sync_outbox (source, passage_id) VALUES (TG_TABLE_NAME, NEW.passage_id);
+        END IF;
+    END IF;
+    PERFORM pg_notify('passage_sync', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS lessons_passage_sync ON practise_improve_pilot.lessons;
+CREATE TRIGGER lessons_passage_sync
+    AFTER INSERT OR UPDATE OR DELETE ON practise_improve_pilot.lessons
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.passage_sync_capture();
+
+DROP TRIGGER IF EXISTS passages_passage_sync ON practise_improve_pilot.passages;
+CREATE TRIGGER passages_passage_sync
+    AFTER INSERT OR UPDATE OR DELETE ON practise_improve_pilot.passages
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.passage_sync_capture();
+
+DROP TRIGGER IF EXISTS questions_passage_sync ON practise_improve_pilot.questions;
+CREATE TRIGGER questions_passage_sync
+    AFTER INSERT OR UPDATE OR DELETE ON practise_improve_pilot.questions
+    FOR EACH ROW EXECUTE FUNCTION practise_improve_pilot.passage_sync_capture();
+"""
+
+# Same columns as fetch_passages_with_questions in postgres-to-dynamodb-unified.py,
+# without the approval filters so unpublished passages can be removed
+PASSAGES_QUERY = """
+SELECT
+    l.id as lesson_id,
+    l.title as lesson_title,
+    l.description as lesson_description,
+    l.topic as lesson_topic,
+    l.proficiency_level as lesson_proficiency,
+    l.estimated_duration as lesson_estimated_duration,
+    l.approval_status as lesson_approval_status,
+
+    p.id as passage_id,
+    p.title as passage_title,
+    p.content as passage_content,
+    p.sort_order as passage_sort_order,
+    p.approval_status as passage_approval_status,
+    p.word_count as passage_word_count,
+    p.reading_level as passage_reading_level,
+    p.source as passage_source
+
+FROM practise_improve_pilot.lessons l
+INNER JOIN practise_improve_pilot.passages p ON p.lesson_id = l.id
+WHERE p.id::text = ANY(%s)
+"""
+
+QUESTIONS_QUERY = """
+SELECT
+    q.passage_id,
+    q.id as question_id,
+    q.question_text as question,
+    q.question_type as type,
+    q.options,
+    q.correct_answer_index as correct,
+    q.correct_answer as "correctAnswer",
+    q.acceptable_answers as "acceptableAnswers",
+    q.word_limit as "wordLimit",
+    q.placeholder,
+    q.sort_order,
+    q.points,
+    q.approval_status as question_approval_status
+FROM practise_improve_pilot.questions q
+WHERE q.passage_id = ANY(%s)
+    AND q.approval_status = 'approved'
+ORDER BY q.passage_id, q.sort_order, q.id
+"""
+
+
+def print_progress(message: str, level: str = "INFO"):
+    """Print formatted progress messages"""
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def get_postgres_config(environment: str) -> Dict[str, Any]:
+    """PostgreSQL credentials from ~/.aws/credentials, database by environment"""
+    config = configparser.ConfigParser()
+    config.read(os.path.expanduser('~/.aws/credentials'))
+    profile = os.getenv('PG_AWS_PROFILE', 'postgres-creds')
+
+    return {
+        'host': config.get(profile, 'pg_host'),
+        'port': config.get(profile, 'pg_port', fallback='5432'),
+        'database': os.getenv('PG_DATABASE') or ('genaicoe_postgresql' if environment == 'dev' else 'prod'),
+        'user': config.get(profile, 'pg_user'),
+        'password': config.get(profile, 'pg_password')
+    }
+
+
+def install(conn):
+    """Create the outbox, the state table and the capture triggers"""
+    with conn.cursor() as cursor:
+        cursor.execute(OUTBOX_SQL)
+    conn.commit()
+    print_progress("Installed passage_sync_outbox, passage_sync_state and triggers on lessons, passages, questions")
+
+
+def resolve_keys(cursor, rows: List[Dict]) -> Set[Tuple[int, str]]:
+    """Turn outbox rows into the (lesson_id, passage_id) item keys that may have changed"""
+    keys = set()
+    lesson_ids = set()
+    question_passage_ids = set()
+
+    for row in rows:
+        if row['passage_id'] is not None and row['lesson_id'] is not None:
+            keys.add((int(row['lesson_id']), row['passage_id']))
+        elif row['lesson_id'] is not None:
+            lesson_ids.add(int(row['lesson_id']))
+        elif row['passage_id'] is not None:
+            question_passage_ids.add(row['passage_id'])
+
+    # Lesson changes touch every passage of the lesson
+    if lesson_ids:
+        cursor.execute("""
+            SELECT lesson_id, id::text AS passage_id FROM practise_improve_pilot.passages
+            WHERE lesson_id = ANY(%s)
+        """, (list(lesson_ids),))
+        keys.update((int(r['lesson_id']), r['passage_id']) for r in cursor.fetchall())
+
+    # Question changes touch their passage; a deleted passage has its own outbox row
+    if question_passage_ids:
+        cursor.execute("""
+            SELECT lesson_id, id::text AS passage_id FROM practise_improve_pilot.passages
+            WHERE id::text = ANY(%s)
+        """, (list(question_passage_ids),))
+        keys.update((int(r['lesson_id']), r['passage_id']) for r in cursor.fetchall())
+
+    return keys
+
+
+def lock_passages(cursor, keys: Set[Tuple[int, str]]):
+    """Serialize rebuilds per passage across daemons until this transaction ends.
+
+    Without it, daemon A could rebuild a passage from an older snapshot and overwrite
+    the newer item daemon B wrote first. The lock is held through the DynamoDB writes
+    (released at commit/rollback), and whoever rebuilds next reads the committed state
+    after it. Locks are taken in hash order, so two daemons cannot deadlock.
+    """
+    cursor.execute("""
+        SELECT pg_advisory_xact_lock(h)
+        FROM (SELECT DISTINCT hashtext(k) AS h FROM unnest(%s::text[]) AS k) AS keys
+        ORDER BY h
+    """, ([f"{lesson_id}:{passage_id}" for lesson_id, passage_id in keys],))
+
+
+def rebuild_items(cursor, keys: Set[Tuple[int, str]]) -> Tuple[List[Dict], Set[Tuple[int, str]]]:
+    """Rebuild the current pni-passages items for the keys; returns (items to put, keys to delete)"""
+    passage_ids = sorted({passage_id for _, passage_id in keys})
+    cursor.execute(PASSAGES_QUERY, (passage_ids,))
+    passages = {str(p['passage_id']): dict(p) for p in cursor.fetchall()}
+
+    cursor.execute(QUESTIONS_QUERY, (passage_ids,))
+    questions_by_passage = {}
+    for question in cursor.fetchall():
+        question = dict(question)
+        questions_by_passage.setdefault(question.pop('passage_id'), []).append(question)
+
+    items = []
+    published = set()
+    for passage_id, passage in passages.items():
+        proficiency = PROFICIENCY_CATEGORIES.get((passage['lesson_proficiency'] or '')[:1])
+        questions = questions_by_passage.get(passage_id, [])
+
+        # Same publication rules as the full migration
+        if (passage['lesson_approval_status'] != 'approved' or passage['passage_approval_status'] != 'approved'
+                or not proficiency or not questions):
+            continue
+
+        passage['proficiency'] = proficiency
+        passage['questions'] = questions
+        passage['question_count'] = len(questions)
+        passage['total_points'] = sum(q.get('points', 0) or 0 for q in questions)
+        items.append(clean_passage_item(passage))
+        published.add((int(passage['lesson_id']), passage_id))
+
+    return items, keys - published
+
+
+class PassageSyncDaemon:
+    """Drains passage_sync_outbox into pni-passages"""
+
+    def __init__(self, environment: str, batch_size: int = 200):
+        self.environment = environment
+        self.batch_size = batch_size
+        self.region = ENVIRONMENT_REGIONS[environment]
+        self.consumer = f"{PASSAGES_TABLE}@{self.region}"
+
+        session = boto3.Session(profile_name=os.getenv('AWS_PROFILE', 'default'))
+        self.dynamodb = session.resource('dynamodb', region_name=self.region)
+        self.conn = psycopg2.connect(**get_postgres_config(environment))
+
+    def drain_batch(self) -> int:
+        """Process one batch; returns the number of outbox rows drained"""
+        try:
+            return self._drain_batch()
+        except Exception:
+            # Releases the row locks; the batch stays queued for the next attempt
+            if not self.conn.closed:
+                self.conn.rollback()
+            raise
+
+    def _drain_batch(self) -> int:
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            # SKIP LOCKED only keeps two daemons from draining the same outbox row;
+            # ordering per passage comes from lock_passages() below
+            cursor.execute("""
+                SELECT id, source, lesson_id, passage_id
+                FROM practise_improve_pilot.passage_sync_outbox
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (self.batch_size,))
+            rows = cursor.fetchall()
+            if not rows:
+                self.conn.rollback()
+                return 0
+
+            keys = resolve_keys(cursor, rows)
+            if keys:
+                lock_passages(cursor, keys)
+            items, deletes = rebuild_items(cursor, keys) if keys else ([], set())
+            topics = {item['lesson_topic'] for item in items if str(item.get('lesson_topic', '')).strip()}
+
+            # DynamoDB first; the outbox rows are only removed once the writes succeeded
+            table = self.dynamodb.Table(PASSAGES_TABLE)
+            with table.batch_writer(overwrite_by_pkeys=['lesson_id', 'passage_id']) as batch_writer:
+                for item in items:
+                    batch_writer.put_item(Item=item)
+                for lesson_id, passage_id in deletes:
+                    batch_writer.delete_item(Key={'lesson_id': lesson_id, 'passage_id': passage_id})
+
+            if topics:
+                with self.dynamodb.Table(TOPICS_TABLE).batch_writer() as batch_writer:
+                    for topic in topics:
+                        batch_writer.put_item(Item={'topic': topic.strip()})
+
+            if items or deletes:
+                self.dynamodb.Table(CACHE_METADATA_TABLE).update_item(
+                    Key={'cache_type': 'lesson_cache'},
+                    UpdateExpression='SET lastUpdated = :now, #src = :src',
+                    ExpressionAttributeNames={'#src': 'source'},
+                    ExpressionAttributeValues={':now': int(time.time() * 1000), ':src': 'passage-sync-daemon'}
+                )
+
+            last_id = rows[-1]['id']
+            cursor.execute("DELETE FROM practise_improve_pilot.passage_sync_outbox WHERE id = ANY(%s)",
+                           ([r['id'] for r in rows],))
+            cursor.execute("""
+                INSERT INTO practise_improve_pilot.passage_sync_state (consumer, last_id, drained_rows, updated_at)
+                VALUES (%s, %s, %s, now())
+                ON CONFLICT (consumer) DO UPDATE
+                SET last_id = GREATEST(passage_sync_state.last_id, EXCLUDED.last_id),
+                    drained_rows = passage_sync_state.drained_rows + EXCLUDED.drained_rows,
+                    updated_at = now()
+            """, (self.consumer, last_id, len(rows)))
+        self.conn.commit()
+
+        print_progress(f"Drained {len(rows)} outbox rows (up to id {last_id}): "
+                       f"{len(items)} items rebuilt, {len(deletes)} removed")
+        return len(rows)
+
+    def drain(self) -> int:
+        """Drain until the outbox is empty"""
+        total = 0
+        while True:
+            drained = self.drain_batch()
+            total += drained
+            if drained < self.batch_size:
+                return total
+
+    def position(self) -> Dict[str, Any]:
+        """Last drained outbox id for this consumer and the current backlog"""
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute("SELECT last_id, drained_rows, updated_at FROM practise_improve_pilot.passage_sync_state WHERE consumer = %s",
+                           (self.consumer,))
+            state = cursor.fetchone() or {'last_id': 0, 'drained_rows': 0, 'updated_at': None}
+            cursor.execute("SELECT COUNT(*) AS backlog FROM practise_improve_pilot.passage_sync_outbox")
+            state = dict(state, backlog=cursor.fetchone()['backlog'])
+        self.conn.rollback()
+        return state
+
+    def run(self, poll_interval: float = 5.0):
+        """Drain on every NOTIFY, and at least every poll_interval seconds"""
+        state = self.position()
+        print_progress(f"Resuming {self.consumer} after outbox id {state['last_id']} ({state['backlog']} rows queued)")
+
+        listener = psycopg2.connect(**get_postgres_config(self.environment))
+        listener.autocommit = True
+        listener.cursor().execute(f"LISTEN {SYNC_CHANNEL};")
+
+        try:
+            while True:
+                try:
+                    self.drain()
+                except Exception as e:
+                    print_progress(f"Drain failed, retrying in {poll_interval}s: {e}", "ERROR")
+                    if self.conn.closed:
+                        self.conn = psycopg2.connect(**get_postgres_config(self.environment))
+                if select.select([listener], [], [], poll_interval) != ([], [], []):
+                    listener.poll()
+                    listener.notifies.clear()
+        except KeyboardInterrupt:
+            print_progress("Sync daemon stopped")
+        finally:
+            listener.close()
+            self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync changed passages from PostgreSQL to pni-passages')
+    parser.add_argument('environment', choices=list(ENVIRONMENT_REGIONS), help='Environment (dev or prod)')
+    parser.add_argument('--install', action='store_true', help='Create the outbox, state table and triggers, then exit')
+    parser.add_argument('--once', action='store_true', help='Drain the current backlog and exit')
+    parser.add_argument('--status', action='store_true', help='Print the stored position and backlog, then exit')
+    parser.add_argument('--batch-size', type=int, default=200, help='Outbox rows per batch (default: 200)')
+    parser.add_argument('--poll-interval', type=float, default=5.0,
+                        help='Seconds between outbox checks when no NOTIFY arrives (default: 5)')
+    args = parser.parse_args()
+
+    if args.install:
+        conn = psycopg2.connect(**get_postgres_config(args.environment))
+        try:
+            install(conn)
+        finally:
+            conn.close()
+        return
+
+    daemon = PassageSyncDaemon(args.environment, args.batch_size)
+
+    if args.status:
+        state = daemon.position()
+        print_progress(f"{daemon.consumer}: last id {state['last_id']}, {state['drained_rows']} rows drained, "
+                       f"{state['backlog']} queued, updated {state['updated_at']}")
+    elif args.once:
+        total = daemon.drain()
+        print_progress(f"Drained {total} outbox rows")
+    else:
+        daemon.run(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
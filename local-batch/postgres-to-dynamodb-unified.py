@@ -14,13 +14,15 @@ import json
 import time
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 import boto3
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from botocore.exceptions import ClientError
 import configparser
 
+from table_lifecycle import TableLifecycle
+
 
 # Load PostgreSQL credentials from ~/.aws/credentials
 aws_creds_path = os.path.expanduser('~/.aws/credentials')
@@ -45,8 +47,8 @@ POSTGRES_CONFIG = {
 
 import sys
 
-# Get environment from command line argument
-environment = sys.argv[1] if len(sys.argv) > 1 else 'prod'
+# Get environment from command line argument (flags such as --targets may follow it)
+environment = sys.argv[1] if len(sys.argv) > 1 and not sys.argv[1].startswith('-') else 'prod'
 
 if environment == 'dev':
     AWS_REGION = 'us-east-1'
@@ -65,6 +67,11 @@ PASSAGES_TABLE = 'pni-passages'
 TOPICS_TABLE = 'pni-topics'
 CACHE_METADATA_TABLE = 'pni-cache-metadata'
 
+# Region per environment, used to resolve fan-out targets such as 'dev,prod'
+ENVIRONMENT_REGIONS = {
+    'dev': 'us-east-1',
+    'prod': 'eu-west-1'
+}
 
 
 # DynamoDB and PostgreSQL clients (use AWS CLI credentials file)
@@ -89,10 +96,10 @@ def print_progress(message: str, level: str = "INFO"):
     timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {level}: {message}")
 
-def verify_table_exists(table_name: str) -> bool:
+def verify_table_exists(table_name: str, dynamodb_resource=None) -> bool:
     """Verify that a DynamoDB table exists and is active"""
     try:
-        table = dynamodb.Table(table_name)
+        table = (dynamodb_resource or dynamodb).Table(table_name)
         table.load()
         if table.table_status == 'ACTIVE':
             print_progress(f"✅ Table {table_name} exists and is active")
@@ -107,101 +114,6 @@ def verify_table_exists(table_name: str) -> bool:
         print_progress(f"❌ Error checking table {table_name}: {e}", "ERROR")
         return False
 
-def create_passages_table():
-    """Create passages table with lesson_id as partition key and passage_id as sort key"""
-    try:
-        table = dynamodb.create_table(
-            TableName=PASSAGES_TABLE,
-            KeySchema=[
-                {'AttributeName': 'lesson_id', 'KeyType': 'HASH'},  # Partition key
-                {'AttributeName': 'passage_id', 'KeyType': 'RANGE'}  # Sort key
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'lesson_id', 'AttributeType': 'N'},
-                {'AttributeName': 'passage_id', 'AttributeType': 'S'},  # Changed to String for UUIDs
-                {'AttributeName': 'proficiency', 'AttributeType': 'S'}
-            ],
-            GlobalSecondaryIndexes=[
-                {
-                    'IndexName': 'proficiency-index',
-                    'KeySchema': [
-                        {'AttributeName': 'proficiency', 'KeyType': 'HASH'}
-                    ],
-                    'Projection': {'ProjectionType': 'ALL'}
-                }
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        
-        # Wait for table to be created
-        print_progress(f"Creating table {PASSAGES_TABLE}...")
-        table.wait_until_exists()
-        print_progress(f"Table {PASSAGES_TABLE} created successfully")
-        return True
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceInUseException':
-            print_progress(f"Table {PASSAGES_TABLE} already exists")
-            return True
-        else:
-            print_progress(f"Error creating table {PASSAGES_TABLE}: {e}", "ERROR")
-            return False
-
-def create_topics_table():
-    """Create topics table"""
-    try:
-        table = dynamodb.create_table(
-            TableName=TOPICS_TABLE,
-            KeySchema=[
-                {'AttributeName': 'topic', 'KeyType': 'HASH'}  # Partition key
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'topic', 'AttributeType': 'S'}
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        
-        print_progress(f"Creating table {TOPICS_TABLE}...")
-        table.wait_until_exists()
-        print_progress(f"Table {TOPICS_TABLE} created successfully")
-        return True
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceInUseException':
-            print_progress(f"Table {TOPICS_TABLE} already exists")
-            return True
-        else:
-            print_progress(f"Error creating table {TOPICS_TABLE}: {e}", "ERROR")
-            return False
-
-def create_cache_metadata_table():
-    """Create cache metadata table"""
-    try:
-        table = dynamodb.create_table(
-            TableName=CACHE_METADATA_TABLE,
-            KeySchema=[
-                {'AttributeName': 'cache_type', 'KeyType': 'HASH'}  # Partition key
-            ],
-            AttributeDefinitions=[
-                {'AttributeName': 'cache_type', 'AttributeType': 'S'}
-            ],
-            BillingMode='PAY_PER_REQUEST'
-        )
-        
-        print_progress(f"Creating table {CACHE_METADATA_TABLE}...")
-        table.wait_until_exists()
-        print_progress(f"Table {CACHE_METADATA_TABLE} created successfully")
-        return True
-        
-    except ClientError as e:
-        if e.response['Error']['Code'] == 'ResourceInUseException':
-            print_progress(f"Table {CACHE_METADATA_TABLE} already exists")
-            return True
-        else:
-            print_progress(f"Error creating table {CACHE_METADATA_TABLE}: {e}", "ERROR")
-            return False
-
-
 def get_postgres_connection():
     """Create PostgreSQL connection"""
     print_progress(f"Postgres connection parameters: {json.dumps(POSTGRES_CONFIG, indent=2)}", "DEBUG")
@@ -272,7 +184,7 @@ def fetch_lessons_with_questions(conn, proficiency: str) -> List[Dict]:
                         FROM practise_improve_pilot.questions q
                         JOIN practise_improve_pilot.passages p ON q.passage_id = p.id::text
                         WHERE p.lesson_id = %s
-                        ORDER BY q.sort_order
+                        ORDER BY q.sort_order, q.id
                     """, (lesson['id'],))
                     
                     questions = cursor.fetchall()
@@ -356,7 +268,7 @@ def fetch_passages_with_questions(conn, proficiency: str) -> List[Dict]:
                         FROM practise_improve_pilot.questions q
                         WHERE q.passage_id = %s::text
                             AND q.approval_status = 'approved'
-                        ORDER BY q.sort_order
+                        ORDER BY q.sort_order, q.id
                     """, (passage['passage_id'],))
                     
                     questions = cursor.fetchall()
@@ -390,6 +302,27 @@ def fetch_topics(conn) -> List[str]:
         print_progress(f"Error fetching topics: {e}", "ERROR")
         raise
 
+def clean_passage_item(passage: Dict) -> Dict:
+    """Clean up the passage data and ensure proper types for DynamoDB"""
+    clean_passage = {}
+    for k, v in passage.items():
+        if v is not None:
+            # Ensure numeric fields are numbers
+            if k in ['lesson_id', 'passage_word_count', 'question_count', 'total_points']:
+                clean_passage[k] = int(v) if v != '' else 0
+            # passage_id should remain as string (UUID)
+            elif k == 'passage_id':
+                clean_passage[k] = str(v)
+            # Ensure string fields are strings
+            elif k in ['proficiency', 'lesson_title', 'passage_title']:
+                clean_passage[k] = str(v)
+            # Convert empty strings to None (skip them)
+            elif v == '':
+                continue
+            else:
+                clean_passage[k] = v
+    return clean_passage
+
 def batch_write_passages(passages: List[Dict], table_name: str):
     """Write passages to DynamoDB in batches"""
     table = dynamodb.Table(table_name)
@@ -406,26 +339,7 @@ def batch_write_passages(passages: List[Dict], table_name: str):
         try:
             with table.batch_writer() as batch_writer:
                 for passage in batch:
-                    # Clean up the passage data and ensure proper types
-                    clean_passage = {}
-                    for k, v in passage.items():
-                        if v is not None:
-                            # Ensure numeric fields are numbers
-                            if k in ['lesson_id', 'passage_word_count', 'question_count', 'total_points']:
-                                clean_passage[k] = int(v) if v != '' else 0
-                            # passage_id should remain as string (UUID)
-                            elif k == 'passage_id':
-                                clean_passage[k] = str(v)
-                            # Ensure string fields are strings
-                            elif k in ['proficiency', 'lesson_title', 'passage_title']:
-                                clean_passage[k] = str(v)
-                            # Convert empty strings to None (skip them)
-                            elif v == '':
-                                continue
-                            else:
-                                clean_passage[k] = v
-                    
-                    batch_writer.put_item(Item=clean_passage)
+                    batch_writer.put_item(Item=clean_passage_item(passage))
                     successful_writes += 1
                     
             print_progress(f"Batch {i//batch_size + 1}: Wrote {len(batch)} passages")
@@ -437,9 +351,9 @@ def batch_write_passages(passages: List[Dict], table_name: str):
     
     print_progress(f"Successfully wrote {successful_writes} passages to {table_name}")
 
-def batch_write_topics(topics: List[str]):
+def batch_write_topics(topics: List[str], dynamodb_resource=None):
     """Write topics to DynamoDB"""
-    table = dynamodb.Table(TOPICS_TABLE)
+    table = (dynamodb_resource or dynamodb).Table(TOPICS_TABLE)
     
     # Filter out empty or None topics
     valid_topics = [topic for topic in topics if topic and topic.strip()]
@@ -454,9 +368,9 @@ def batch_write_topics(topics: List[str]):
     
     print_progress(f"Written {len(valid_topics)} topics to DynamoDB (filtered from {len(topics)} total)")
 
-def write_cache_metadata():
+def write_cache_metadata(dynamodb_resource=None, passages_table: str = PASSAGES_TABLE):
     """Write cache metadata"""
-    table = dynamodb.Table(CACHE_METADATA_TABLE)
+    table = (dynamodb_resource or dynamodb).Table(CACHE_METADATA_TABLE)
     
     metadata = {
         'cache_type': 'lesson_cache',
@@ -464,7 +378,7 @@ def write_cache_metadata():
         'source': 'postgres-migration',
         'migrationTimestamp': int(time.time() * 1000),
         'tables': {
-            'passages': PASSAGES_TABLE,
+            'passages': passages_table,
             'topics': TOPICS_TABLE
         },
         'structure': {
@@ -475,14 +389,105 @@ def write_cache_metadata():
     table.put_item(Item=metadata)
     print_progress("Cache metadata written to DynamoDB")
 
+def fetch_all_data(conn) -> Tuple[List[Dict], List[str]]:
+    """Fetch passages for every proficiency level plus topics in a single extraction pass"""
+    print_progress("Fetching data from PostgreSQL...")
+    
+    # Use ThreadPoolExecutor for parallel fetching
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        # Fetch passages for all proficiency levels in parallel (passage-focused approach)
+        beginner_passages_future = executor.submit(fetch_passages_with_questions, conn, 'beginner')
+        intermediate_passages_future = executor.submit(fetch_passages_with_questions, conn, 'intermediate')
+        advanced_passages_future = executor.submit(fetch_passages_with_questions, conn, 'advanced')
+        
+        topics_future = executor.submit(fetch_topics, conn)
+        
+        # Get results
+        beginner_passages = beginner_passages_future.result()
+        intermediate_passages = intermediate_passages_future.result()
+        advanced_passages = advanced_passages_future.result()
+        
+        topics = topics_future.result()
+    
+    print_progress(f"Fetched {len(beginner_passages)} beginner, {len(intermediate_passages)} intermediate, {len(advanced_passages)} advanced passages")
+    print_progress(f"Fetched {len(topics)} topics")
+    
+    return beginner_passages + intermediate_passages + advanced_passages, topics
+
+def parse_fanout_targets(spec: str) -> List[Dict[str, str]]:
+    """Parse a fan-out target list such as 'dev,prod' or 'us-east-1:pni-passages,eu-west-1:pni-passages'"""
+    targets = []
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if entry in ENVIRONMENT_REGIONS:
+            region, table_name = ENVIRONMENT_REGIONS[entry], PASSAGES_TABLE
+        elif ':' in entry:
+            region, table_name = entry.split(':', 1)
+        else:
+            region, table_name = entry, PASSAGES_TABLE
+        
+        target = {'name': f"{region}/{table_name}", 'region': region, 'passages_table': table_name}
+        if target not in targets:
+            targets.append(target)
+    
+    if not targets:
+        raise ValueError(f"No fan-out targets found in '{spec}'")
+    return targets
+
+def write_passage_chunk(region: str, table_name: str, items: List[Dict]) -> int:
+    """Write one chunk of cleaned passage items with its own session (boto3 resources are not thread-safe)"""
+    worker_session = boto3.Session(profile_name=aws_profile)
+    table = worker_session.resource('dynamodb', region_name=region).Table(table_name)
+    
+    with table.batch_writer() as batch_writer:
+        for item in items:
+            batch_writer.put_item(Item=item)
+    
+    return len(items)
+
+def write_to_target(target: Dict[str, str], passages: List[Dict], topics: List[str], writers: int) -> Dict[str, Any]:
+    """Write already-cleaned passage items and topics to one region/table target using a dedicated writer pool"""
+    start_time = time.time()
+    print_progress(f"[{target['name']}] Writing {len(passages)} passages with {writers} writers...")
+    
+    # Split into one contiguous chunk per writer, rounded up to whole 25-item batches
+    batch_size = 25
+    chunk_size = max(batch_size, -(-len(passages) // (writers * batch_size)) * batch_size)
+    
+    with ThreadPoolExecutor(max_workers=writers) as writer_pool:
+        futures = [
+            writer_pool.submit(write_passage_chunk, target['region'], target['passages_table'], passages[i:i + chunk_size])
+            for i in range(0, len(passages), chunk_size)
+        ]
+        passages_written = sum(future.result() for future in futures)
+    
+    target_session = boto3.Session(profile_name=aws_profile)
+    target_dynamodb = target_session.resource('dynamodb', region_name=target['region'])
+    batch_write_topics(topics, dynamodb_resource=target_dynamodb)
+    write_cache_metadata(dynamodb_resource=target_dynamodb, passages_table=target['passages_table'])
+    
+    duration = time.time() - start_time
+    print_progress(f"[{target['name']}] Wrote {passages_written} passages in {duration:.2f} seconds")
+    
+    return {
+        'target': target['name'],
+        'passages': passages_written,
+        'topics': len([topic for topic in topics if topic and topic.strip()]),
+        'duration': duration,
+        'items_per_second': passages_written / duration if duration > 0 else 0.0
+    }
+
 def main():
     """Main migration function"""
     start_time = time.time()
     print_progress("Starting PostgreSQL to DynamoDB migration")
     
-    # Create tables (lessons table excluded - not used by application)
+    # Create tables concurrently (lessons table excluded - not used by application)
     print_progress("Creating DynamoDB tables...")
-    if not (create_passages_table() and create_topics_table() and create_cache_metadata_table()):
+    lifecycle = TableLifecycle([AWS_REGION], [PASSAGES_TABLE, TOPICS_TABLE, CACHE_METADATA_TABLE], session)
+    if not lifecycle.create():
         print_progress("Failed to create tables", "ERROR")
         return
     
@@ -500,28 +505,8 @@ def main():
     
     try:
         # Fetch data from PostgreSQL
-        print_progress("Fetching data from PostgreSQL...")
-        
-        # Use ThreadPoolExecutor for parallel fetching
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            # Fetch passages for all proficiency levels in parallel (passage-focused approach)
-            beginner_passages_future = executor.submit(fetch_passages_with_questions, conn, 'beginner')
-            intermediate_passages_future = executor.submit(fetch_passages_with_questions, conn, 'intermediate')
-            advanced_passages_future = executor.submit(fetch_passages_with_questions, conn, 'advanced')
-            
-            topics_future = executor.submit(fetch_topics, conn)
-            
-            # Get results
-            beginner_passages = beginner_passages_future.result()
-            intermediate_passages = intermediate_passages_future.result()
-            advanced_passages = advanced_passages_future.result()
-            
-            topics = topics_future.result()
-        
-        total_passages = len(beginner_passages) + len(intermediate_passages) + len(advanced_passages)
-        
-        print_progress(f"Fetched {len(beginner_passages)} beginner, {len(intermediate_passages)} intermediate, {len(advanced_passages)} advanced passages")
-        print_progress(f"Fetched {len(topics)} topics")
+        all_passages, topics = fetch_all_data(conn)
+        total_passages = len(all_passages)
         
         # Write to DynamoDB in parallel
         print_progress("Writing data to DynamoDB...")
@@ -531,7 +516,6 @@ def main():
         
         with ThreadPoolExecutor(max_workers=3) as executor:
             # Write passages to the passages table
-            all_passages = beginner_passages + intermediate_passages + advanced_passages
             passages_future = executor.submit(batch_write_passages, all_passages, PASSAGES_TABLE)
             
             topics_future = executor.submit(batch_write_topics, topics)
@@ -557,6 +541,53 @@ def main():
         conn.close()
         print_progress("PostgreSQL connection closed")
 
+def run_fanout_migration(targets: List[Dict[str, str]], writers_per_target: int):
+    """Extract once from PostgreSQL and write concurrently to several region/table targets"""
+    start_time = time.time()
+    print_progress(f"Starting fan-out migration from {environment} to {len(targets)} targets: {', '.join(t['name'] for t in targets)}")
+    
+    # Verify every target table before extracting anything
+    print_progress("Verifying target tables are ready...")
+    for target in targets:
+        target_dynamodb = session.resource('dynamodb', region_name=target['region'])
+        if not (verify_table_exists(target['passages_table'], target_dynamodb) and
+                verify_table_exists(TOPICS_TABLE, target_dynamodb) and
+                verify_table_exists(CACHE_METADATA_TABLE, target_dynamodb)):
+            print_progress(f"Target {target['name']} is not ready", "ERROR")
+            return
+    
+    print_progress("Connecting to PostgreSQL...")
+    conn = get_postgres_connection()
+    
+    try:
+        all_passages, topics = fetch_all_data(conn)
+        # Clean items once; every target receives the same prepared items
+        passage_items = [clean_passage_item(passage) for passage in all_passages]
+        extraction_duration = time.time() - start_time
+        
+        # Each target gets its own thread, and each thread its own writer pool
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            futures = [executor.submit(write_to_target, target, passage_items, topics, writers_per_target) for target in targets]
+            results = [future.result() for future in futures]
+        
+        duration = time.time() - start_time
+        
+        print_progress("Fan-out migration completed successfully!")
+        print_progress(f"Extraction: {len(all_passages)} passages, {len(topics)} topics in {extraction_duration:.2f} seconds (single pass)")
+        for result in results:
+            print_progress(
+                f"  {result['target']}: {result['passages']} passages, {result['topics']} topics "
+                f"in {result['duration']:.2f}s ({result['items_per_second']:.1f} passages/s)"
+            )
+        print_progress(f"Migration duration: {duration:.2f} seconds")
+        
+    except Exception as e:
+        print_progress(f"Fan-out migration failed: {e}", "ERROR")
+        raise
+    finally:
+        conn.close()
+        print_progress("PostgreSQL connection closed")
+
 if __name__ == "__main__":
     # Load environment variables from .env file if it exists
     env_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), '.env')
@@ -567,4 +598,18 @@ if __name__ == "__main__":
                     key, value = line.strip().split('=', 1)
                     os.environ[key] = value
     
-    main()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Migrate passages from PostgreSQL to DynamoDB')
+    parser.add_argument('environment', nargs='?', default='prod', choices=['dev', 'prod'],
+                        help='Source environment (PostgreSQL database and default target region)')
+    parser.add_argument('--targets',
+                        help="Extract once and fan out to several targets, e.g. 'dev,prod' or 'us-east-1:pni-passages,eu-west-1:pni-passages'")
+    parser.add_argument('--writers-per-target', type=int, default=4,
+                        help='Concurrent batch writers per fan-out target (default: 4)')
+    args = parser.parse_args()
+    
+    if args.targets:
+        run_fanout_migration(parse_fanout_targets(args.targets), max(1, args.writers_per_target))
+    else:
+        main()
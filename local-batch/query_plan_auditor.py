@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Query Plan Auditor
+Runs EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) on the registered migration extraction
+queries and reports:
+- Sequential scans (with the filter they applied and rows thrown away)
+- Casts on join/filter columns that stop an index on the column being used
+- Sorts and hashes that spilled to disk
+- Candidate indexes (partial, text_pattern_ops, expression) derived from the plans
+
+When the hypopg extension is installed every candidate is also costed as a
+hypothetical index (plain EXPLAIN, nothing is built). Without hypopg the runtime of
+the scan a candidate replaces is shown as an upper bound on the saving.
+
+Usage:
+    python3 database_schema_analyzer.py --audit-queries
+"""
+
+import os
+import re
+import sys
+import json
+import datetime
+from psycopg2.extras import RealDictCursor
+from tabulate import tabulate
+
+# The Lambda's extraction query is imported, not copied, so the audited plan cannot drift
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'passage'))
+from passage_queries import DYNAMODB_PASSAGE_LIMIT, complete_passages_query
+
+SCHEMA = 'practise_improve_pilot'
+
+# Mirrors of the extraction SQL in postgres-to-dynamodb-unified.py and get-approved-passages.py -
+# keep them in step when those queries change (passage-migration.py's query is shared).
+# Per-lesson/per-passage queries take a representative value from param_sql.
+EXTRACTION_QUERIES = [
+    {
+        'name': 'lessons_by_level',
+        'source': 'postgres-to-dynamodb-unified.py fetch_lessons_with_questions',
+        'sql': f"""
+            SELECT
+                l.id, l.title, l.description,
+                COALESCE(STRING_AGG(p.content, E'\\n\\n---\\n\\n' ORDER BY p.sort_order), l.text) as text,
+                l.topic, l.proficiency_level, l.estimated_duration, l.approval_status
+            FROM {SCHEMA}.lessons l
+            LEFT JOIN {SCHEMA}.passages p ON p.lesson_id = l.id
+                AND p.approval_status = 'approved'
+            WHERE l.approval_status = 'approved' AND proficiency_level LIKE 'A%'
+            GROUP BY l.id, l.title, l.description, l.text, l.topic, l.proficiency_level, l.estimated_duration, l.approval_status
+            ORDER BY l.topic, l.id
+        """
+    },
+    {
+        'name': 'lesson_questions',
+        'source': 'postgres-to-dynamodb-unified.py fetch_lessons_with_questions (per lesson)',
+        'sql': f"""
+            SELECT q.question_text, q.question_type, q.options, q.correct_answer_index,
+                   q.correct_answer, q.acceptable_answers, q.word_limit, q.placeholder, q.sort_order
+            FROM {SCHEMA}.questions q
+            JOIN {SCHEMA}.passages p ON q.passage_id = p.id::text
+            WHERE p.lesson_id = %s
+            ORDER BY q.sort_order, q.id
+        """,
+        'param_sql': f"SELECT lesson_id FROM {SCHEMA}.passages WHERE approval_status = 'approved' LIMIT 1"
+    },
+    {
+        'name': 'passages_by_level',
+        'source': 'postgres-to-dynamodb-unified.py fetch_passages_with_questions, get-approved-passages.py',
+        'sql': f"""
+            SELECT
+                l.id as lesson_id, l.title, l.description, l.topic, l.proficiency_level,
+                l.estimated_duration, l.approval_status,
+                p.id as passage_id, p.title, p.content, p.sort_order, p.approval_status,
+                p.word_count, p.reading_level, p.source
+            FROM {SCHEMA}.lessons l
+            INNER JOIN {SCHEMA}.passages p ON p.lesson_id = l.id
+            WHERE l.approval_status = 'approved'
+                AND p.approval_status = 'approved'
+                AND l.proficiency_level LIKE 'A%'
+            ORDER BY l.topic, l.id, p.sort_order
+        """
+    },
+    {
+        'name': 'passage_questions',
+        'source': 'postgres-to-dynamodb-unified.py, get-approved-passages.py, passage-migration.py (per passage)',
+        'sql': f"""
+            SELECT q.id, q.question_text, q.question_type, q.options, q.correct_answer_index,
+                   q.correct_answer, q.acceptable_answers, q.word_limit, q.placeholder,
+                   q.sort_order, q.points, q.approval_status
+            FROM {SCHEMA}.questions q
+            WHERE q.passage_id = %s::text
+                AND q.approval_status = 'approved'
+            ORDER BY q.sort_order, q.id
+        """,
+        'param_sql': f"SELECT id FROM {SCHEMA}.passages WHERE approval_status = 'approved' LIMIT 1"
+    },
+    {
+        'name': 'complete_passages',
+        'source': 'passage/passage-migration.py complete_query with s3/shards/ndjson sinks (shared COMPLETE_PASSAGES_QUERY)',
+        'sql': complete_passages_query()
+    },
+    {
+        'name': 'complete_passages_capped',
+        'source': 'passage/passage-migration.py complete_query, DynamoDB-only runs (shared COMPLETE_PASSAGES_QUERY)',
+        'sql': complete_passages_query(DYNAMODB_PASSAGE_LIMIT)
+    },
+    {
+        'name': 'topics',
+        'source': 'postgres-to-dynamodb-unified.py fetch_topics, passage-migration.py fetch_topics',
+        'sql': f"""
+            SELECT DISTINCT topic FROM {SCHEMA}.lessons
+            WHERE approval_status = 'approved' AND topic IS NOT NULL AND topic != ''
+            ORDER BY topic
+        """
+    }
+]
+
+CONDITION_KEYS = ('Hash Cond', 'Merge Cond', 'Join Filter', 'Index Cond', 'Recheck Cond', 'Filter')
+JOIN_CONDITION_KEYS = ('Hash Cond', 'Merge Cond', 'Join Filter')
+
+# (p.id)::text - a column cast inside a plan condition
+CAST_PATTERN = re.compile(r'\((?:(\w+)\.)?(\w+)\)::([a-z][a-z ]*[a-z])')
+# (approval_status)::text = 'approved'::text, proficiency_level ~~ 'A%'::text, lesson_id = 42
+PREDICATE_PATTERN = re.compile(r"\(?(?:(\w+)\.)?(\w+)\)?(?:::[a-z ]+)? (=|~~) (?:'((?:[^']|'')*)'|(-?\d+(?:\.\d+)?)\b)")
+# p.lesson_id, (q.passage_id)::text in a join condition
+COLUMN_REF_PATTERN = re.compile(r'\b(\w+)\.(\w+)\b')
+
+# Casts between these are binary-compatible and do not stop index use
+TEXT_TYPES = {'text', 'character varying', 'character'}
+
+
+def walk_plan(node, ancestors=()):
+    """Yield (node, ancestors) for every node in an EXPLAIN JSON plan"""
+    yield node, ancestors
+    for child in node.get('Plans', []):
+        yield from walk_plan(child, ancestors + (node,))
+
+
+class QueryPlanAuditor:
+    def __init__(self, conn, queries=None):
+        self.conn = conn
+        self.queries = queries or EXTRACTION_QUERIES
+        self.report = []
+        self._column_types = {}
+        self._existing_indexes = None
+        self.hypopg = False
+
+    def add_to_report(self, text):
+        """Add text to the report"""
+        self.report.append(text)
+        print(text)
+
+    def explain(self, sql, params=None, analyze=True):
+        """Return the top-level EXPLAIN JSON object for a query"""
+        options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+        with self.conn.cursor() as cursor:
+            cursor.execute(f'EXPLAIN ({options}) {sql}', params)
+            result = cursor.fetchone()[0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]
+
+    def resolve_params(self, query):
+        """Representative parameter values for a per-lesson/per-passage query"""
+        if not query.get('param_sql'):
+            return None
+        with self.conn.cursor() as cursor:
+            cursor.execute(query['param_sql'])
+            row = cursor.fetchone()
+        return tuple(row) if row else None
+
+    def column_type(self, table_name, column_name):
+        """information_schema data type of a column (cached)"""
+        key = (table_name, column_name)
+        if key not in self._column_types:
+            with self.conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT data_type FROM information_schema.columns
+                    WHERE table_schema = %s AND table_name = %s AND column_name = %s
+                """, (SCHEMA, table_name, column_name))
+                row = cursor.fetchone()
+            self._column_types[key] = row[0] if row else None
+        return self._column_types[key]
+
+    def existing_indexes(self):
+        """Index definitions already present in the schema, keyed by table"""
+        if self._existing_indexes is None:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute("SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = %s", (SCHEMA,))
+                self._existing_indexes = {}
+                for row in cursor.fetchall():
+                    self._existing_indexes.setdefault(row['tablename'], []).append(row['indexdef'])
+        return self._existing_indexes
+
+    def index_exists(self, table_name, body):
+        """True when an existing index already has this key list and predicate"""
+        normalized = re.sub(r'[\s()"]|::[a-z ]+', '', body).lower()
+        for indexdef in self.existing_indexes().get(table_name, []):
+            existing = re.sub(r'[\s()"]|::[a-z ]+', '', indexdef.split(' USING btree ', 1)[-1]).lower()
+            if existing == normalized:
+                return True
+        return False
+
+    def analyze_plan(self, explain_result, params=None):
+        """Findings and candidate indexes for one EXPLAIN ANALYZE result
+        
+        Equality filters on a query parameter become index keys; equality filters on
+        constants ('approved') become partial-index predicates.
+        """
+        root = explain_result['Plan']
+        param_values = {str(value) for value in params or ()}
+        aliases = {}
+        for node, _ in walk_plan(root):
+            if 'Relation Name' in node:
+                aliases[node.get('Alias', node['Relation Name'])] = node['Relation Name']
+
+        findings = []
+        candidates = {}
+
+        def add_candidate(table_name, key_sql, where_sql, reason, scan_ms):
+            body = f"({key_sql})" + (f" WHERE {where_sql}" if where_sql else '')
+            if self.index_exists(table_name, body):
+                return
+            entry = candidates.setdefault((table_name, body), {
+                'table': table_name, 'body': body, 'reasons': [], 'scan_ms': 0.0
+            })
+            if reason not in entry['reasons']:
+                entry['reasons'].append(reason)
+            entry['scan_ms'] += scan_ms
+
+        for node, ancestors in walk_plan(root):
+            node_type = node['Node Type']
+            node_ms = node.get('Actual Total Time', 0) * node.get('Actual Loops', 1)
+
+            # Casts on columns inside join and filter conditions
+            for key in CONDITION_KEYS:
+                for alias, column, target in CAST_PATTERN.findall(node.get(key, '')):
+                    table_name = aliases.get(alias) or node.get('Relation Name')
+                    if not table_name:
+                        continue
+                    source_type = self.column_type(table_name, column)
+                    if source_type is None or (source_type in TEXT_TYPES and target in TEXT_TYPES):
+                        continue
+                    findings.append(('❌', 'Cast', f"`{table_name}.{column}` ({source_type}) cast to {target} in "
+                                     f"{key}: `{node[key]}` - an index on `{column}` cannot serve this comparison"))
+                    add_candidate(table_name, f"({column}::{target})", None,
+                                  f"expression index for {key.lower()} `{column}::{target}` "
+                                  f"(or compare against `{column}` without the cast)", node_ms)
+
+            # Sequential scans
+            if node_type == 'Seq Scan':
+                table_name = node['Relation Name']
+                alias = node.get('Alias', table_name)
+                loops = node.get('Actual Loops', 1)
+                removed = node.get('Rows Removed by Filter', 0) * loops
+                kept = node.get('Actual Rows', 0) * loops
+                filter_sql = node.get('Filter', '')
+                findings.append(('⚠️', 'Seq Scan', f"`{table_name}` - {kept:,} rows kept, {removed:,} removed by filter "
+                                 f"({node_ms:.1f} ms over {loops:,} loop(s))" +
+                                 (f", filter `{filter_sql}`" if filter_sql else '')))
+
+                lookups, equalities, prefixes = [], [], []
+                for _, column, operator, text_value, number in PREDICATE_PATTERN.findall(filter_sql):
+                    value = text_value or number
+                    if operator == '~~':
+                        if not (value.endswith('%') and '%' not in value[:-1] and '_' not in value):
+                            continue
+                        target = prefixes
+                    elif value in param_values:
+                        target = lookups
+                    else:
+                        target = equalities
+                    literal = value if number else f"'{value}'"
+                    if (column, literal) not in target:
+                        target.append((column, literal))
+
+                # Columns of this relation the enclosing joins look it up by
+                join_columns = []
+                for ancestor in ancestors:
+                    for key in JOIN_CONDITION_KEYS:
+                        for ref_alias, column in COLUMN_REF_PATTERN.findall(ancestor.get(key, '')):
+                            if ref_alias == alias and column not in join_columns:
+                                join_columns.append(column)
+
+                key_columns = list(dict.fromkeys(column for column, _ in lookups))
+                for column in dict.fromkeys(column for column, _ in prefixes):
+                    if column not in key_columns:
+                        key_columns.append(f"{column} text_pattern_ops")
+                # Join columns are the key when nothing else is; otherwise INCLUDE them (covering index)
+                join_columns = [column for column in join_columns
+                                if column not in key_columns and f"{column} text_pattern_ops" not in key_columns]
+                include_columns = join_columns if key_columns else []
+                if not key_columns:
+                    key_columns = join_columns
+                where_parts = [f"{column} = {literal}" for column, literal in equalities]
+                if not key_columns and equalities:
+                    key_columns = list(dict.fromkeys(column for column, _ in equalities))
+                    where_parts = []
+                if key_columns:
+                    kind = 'partial ' if where_parts else ''
+                    if prefixes:
+                        kind += 'prefix (text_pattern_ops) '
+                    if include_columns:
+                        kind += 'covering '
+                    key_sql = ', '.join(key_columns)
+                    if include_columns:
+                        key_sql += f") INCLUDE ({', '.join(include_columns)}"
+                    add_candidate(table_name, key_sql, ' AND '.join(where_parts),
+                                  f"{kind}index replacing the seq scan on `{table_name}`", node_ms)
+
+            # Sorts and hashes that spilled to disk
+            if node_type == 'Sort' and node.get('Sort Space Type') == 'Disk':
+                findings.append(('❌', 'Disk Sort', f"sort on `{', '.join(node.get('Sort Key', []))}` spilled "
+                                 f"{node.get('Sort Space Used', 0):,} kB to disk - raise work_mem above "
+                                 f"{node.get('Sort Space Used', 0) * 2 // 1024 + 1} MB or index the sort key"))
+            if node_type == 'Hash' and node.get('Hash Batches', 1) > 1:
+                findings.append(('⚠️', 'Hash Spill', f"hash table used {node['Hash Batches']} batches "
+                                 f"(peak {node.get('Peak Memory Usage', 0):,} kB) - raise work_mem"))
+
+        return findings, list(candidates.values())
+
+    def what_if(self, sql, params, candidates):
+        """Estimated total cost without and with each candidate as a hypopg hypothetical index"""
+        baseline = self.explain(sql, params, analyze=False)['Plan']['Total Cost']
+        results = []
+        with self.conn.cursor() as cursor:
+            for candidate in candidates:
+                cursor.execute("SELECT indexrelid FROM hypopg_create_index(%s)",
+                               (f"CREATE INDEX ON {SCHEMA}.{candidate['table']} {candidate['body']}",))
+                index_oid = cursor.fetchone()[0]
+                try:
+                    plan = self.explain(sql, params, analyze=False)
+                finally:
+                    cursor.execute("SELECT hypopg_drop_index(%s)", (index_oid,))
+                used = f"<{index_oid}>" in json.dumps(plan)
+                results.append((candidate, plan['Plan']['Total Cost'], used))
+        return baseline, results
+
+    def audit_query(self, query):
+        """EXPLAIN ANALYZE one registered query and report its findings and candidates"""
+        self.add_to_report(f"## `{query['name']}`")
+        self.add_to_report(f"**Source:** {query['source']}")
+        self.add_to_report("")
+
+        params = self.resolve_params(query)
+        if query.get('param_sql') and params is None:
+            self.add_to_report("⚠️ No representative parameter found - skipped")
+            self.add_to_report("")
+            return [], []
+
+        try:
+            result = self.explain(query['sql'], params)
+        finally:
+            # EXPLAIN ANALYZE executes the query; never keep anything it did
+            self.conn.rollback()
+
+        root = result['Plan']
+        self.add_to_report(tabulate([
+            ['Execution time', f"{result.get('Execution Time', 0):.2f} ms"],
+            ['Planning time', f"{result.get('Planning Time', 0):.2f} ms"],
+            ['Rows', f"{root.get('Actual Rows', 0):,}"],
+            ['Shared hit / read blocks', f"{root.get('Shared Hit Blocks', 0):,} / {root.get('Shared Read Blocks', 0):,}"],
+            ['Temp written blocks', f"{root.get('Temp Written Blocks', 0):,}"]
+        ], headers=['Metric', 'Value'], tablefmt='pipe'))
+        self.add_to_report("")
+
+        findings, candidates = self.analyze_plan(result, params)
+        if not findings:
+            self.add_to_report("✅ No sequential scans, casts or disk spills")
+        for icon, kind, detail in findings:
+            self.add_to_report(f"- {icon} **{kind}:** {detail}")
+        self.add_to_report("")
+
+        if candidates:
+            execution_ms = result.get('Execution Time', 0) or 1
+            rows = []
+            if self.hypopg:
+                baseline, costed = self.what_if(query['sql'], params, candidates)
+                self.conn.rollback()
+                for candidate, cost, used in costed:
+                    candidate['used'] = used
+                    candidate['saving'] = max(0.0, (baseline - cost) / baseline * 100) if baseline else 0.0
+                    rows.append([f"`{candidate['body']}` on `{candidate['table']}`", '; '.join(candidate['reasons']),
+                                 f"{baseline:,.1f} → {cost:,.1f}", 'yes' if used else 'no', f"{candidate['saving']:.0f}%"])
+                headers = ['Candidate', 'Why', 'Est. cost (hypopg)', 'Used', 'Saving']
+            else:
+                for candidate in candidates:
+                    candidate['saving'] = min(100.0, candidate['scan_ms'] / execution_ms * 100)
+                    rows.append([f"`{candidate['body']}` on `{candidate['table']}`", '; '.join(candidate['reasons']),
+                                 f"{candidate['scan_ms']:.1f} ms", f"≤{candidate['saving']:.0f}%"])
+                headers = ['Candidate', 'Why', 'Replaced scan time', 'Saving (upper bound)']
+            self.add_to_report("#### Candidate Indexes")
+            self.add_to_report(tabulate(rows, headers=headers, tablefmt='pipe'))
+            self.add_to_report("")
+
+        return findings, candidates
+
+    def run(self):
+        """Audit every registered query and finish with the consolidated index DDL"""
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")
+            self.hypopg = cursor.fetchone() is not None
+
+        self.add_to_report("# Extraction Query Plan Audit")
+        self.add_to_report(f"**Generated:** {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        self.add_to_report(f"**What-if costing:** {'hypopg hypothetical indexes' if self.hypopg else 'hypopg not installed - savings are upper bounds from EXPLAIN ANALYZE scan times'}")
+        self.add_to_report("")
+
+        recommended = {}
+        for query in self.queries:
+            _, candidates = self.audit_query(query)
+            for candidate in candidates:
+                # hypopg showed the planner would not pick it for this query
+                if candidate.get('used') is False:
+                    continue
+                entry = recommended.setdefault((candidate['table'], candidate['body']), {
+                    'candidate': candidate, 'queries': [], 'saving': 0.0
+                })
+                entry['queries'].append(query['name'])
+                entry['saving'] = max(entry['saving'], candidate.get('saving', 0.0))
+
+        self.add_to_report("## Recommended Indexes")
+        if not recommended:
+            self.add_to_report("✅ No index changes recommended")
+            return self.report
+
+        self.add_to_report("Ranked by the largest saving on any query that benefits:")
+        self.add_to_report("")
+        self.add_to_report("```sql")
+        ranked = sorted(recommended.values(), key=lambda entry: (-entry['saving'], entry['candidate']['table']))
+        for i, entry in enumerate(ranked, 1):
+            candidate = entry['candidate']
+            self.add_to_report(f"-- {entry['saving']:.0f}% saving; helps: {', '.join(entry['queries'])}")
+            self.add_to_report(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audit_{candidate['table']}_{i} "
+                               f"ON {SCHEMA}.{candidate['table']} {candidate['body']};")
+        self.add_to_report("```")
+        return self.report
+
+    def save_report(self, filename):
+        """Save the report to a file"""
+        with open(filename, 'w') as f:
+            f.write('\n'.join(self.report))
+
+        print(f"\n📄 Report saved to: {filename}")
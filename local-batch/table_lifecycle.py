@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+DynamoDB Table Lifecycle
+Single declaration of the migration table schemas, plus concurrent create/delete/update.
+
+Every request (all tables, all regions) is issued up front, then all tables are waited on
+in parallel with boto3 waiters, so setup and teardown take as long as the slowest table
+instead of the sum of all tables.
+
+Usage:
+    python3 table_lifecycle.py create dev
+    python3 table_lifecycle.py create dev,prod
+    python3 table_lifecycle.py delete prod --tables pni-lessons,pni-passages,pni-topics,pni-cache-metadata
+    python3 table_lifecycle.py update all --billing-mode PAY_PER_REQUEST
+    python3 table_lifecycle.py status all
+"""
+
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+import boto3
+from botocore.exceptions import ClientError, WaiterError
+
+ENVIRONMENT_REGIONS = {
+    'dev': 'us-east-1',
+    'prod': 'eu-west-1'
+}
+
+# The only place the table definitions live; keys match the items written by the migration
+TABLE_SCHEMAS = {
+    'pni-passages': {
+        'KeySchema': [
+            {'AttributeName': 'lesson_id', 'KeyType': 'HASH'},
+            {'AttributeName': 'passage_id', 'KeyType': 'RANGE'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'lesson_id', 'AttributeType': 'N'},
+            {'AttributeName': 'passage_id', 'AttributeType': 'S'},
+            {'AttributeName': 'proficiency', 'AttributeType': 'S'}
+        ],
+        'GlobalSecondaryIndexes': [
+            {
+                'IndexName': 'proficiency-index',
+                'KeySchema': [
+                    {'AttributeName': 'proficiency', 'KeyType': 'HASH'}
+                ],
+                'Projection': {'ProjectionType': 'ALL'}
+            }
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    'pni-topics': {
+        'KeySchema': [
+            {'AttributeName': 'topic', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'topic', 'AttributeType': 'S'}
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    },
+    'pni-cache-metadata': {
+        'KeySchema': [
+            {'AttributeName': 'cache_type', 'KeyType': 'HASH'}
+        ],
+        'AttributeDefinitions': [
+            {'AttributeName': 'cache_type', 'AttributeType': 'S'}
+        ],
+        'BillingMode': 'PAY_PER_REQUEST'
+    }
+}
+
+MIGRATION_TABLES = list(TABLE_SCHEMAS)
+
+# Waiter polling: short delay so each table is noticed soon after it settles
+WAITER_CONFIG = {'Delay': 5, 'MaxAttempts': 120}
+
+
+def print_progress(message: str, level: str = "INFO"):
+    """Print formatted progress messages"""
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def resolve_regions(spec: str) -> List[str]:
+    """'dev', 'prod', 'dev,prod', 'all' or explicit region names"""
+    if spec == 'all':
+        return list(ENVIRONMENT_REGIONS.values())
+    regions = []
+    for part in (p.strip() for p in spec.split(',') if p.strip()):
+        region = ENVIRONMENT_REGIONS.get(part, part)
+        if region not in regions:
+            regions.append(region)
+    return regions
+
+
+class TableLifecycle:
+    """Create, delete and update a set of tables in several regions concurrently"""
+
+    def __init__(self, regions: List[str], tables: List[str] = None, session=None):
+        self.session = session or boto3.Session()
+        self.regions = regions
+        self.tables = tables or MIGRATION_TABLES
+        # Low-level clients are thread-safe; one per region is shared by all workers
+        self.clients = {region: self.session.client('dynamodb', region_name=region) for region in regions}
+        self.targets = [(region, table) for region in regions for table in self.tables]
+
+    def _for_each(self, func) -> Dict[tuple, Any]:
+        """Run func(region, table) for every target at once; results keyed by (region, table)"""
+        with ThreadPoolExecutor(max_workers=max(1, len(self.targets))) as executor:
+            futures = {target: executor.submit(func, *target) for target in self.targets}
+            return {target: future.result() for target, future in futures.items()}
+
+    def _wait(self, waiter_name: str, pending: List[tuple]) -> Dict[tuple, str]:
+        """Wait on all pending tables in parallel; 'ok' or the waiter error per table"""
+        def wait(region, table):
+            try:
+                self.clients[region].get_waiter(waiter_name).wait(TableName=table, WaiterConfig=WAITER_CONFIG)
+                return 'ok'
+            except WaiterError as e:
+                return f"error: {e}"
+
+        if not pending:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            futures = {target: executor.submit(wait, *target) for target in pending}
+            return {target: future.result() for target, future in futures.items()}
+
+    def _report(self, action: str, results: Dict[tuple, str], start: float) -> bool:
+        for (region, table), result in sorted(results.items()):
+            icon = '❌' if result.startswith('error') else '✅'
+            level = 'ERROR' if result.startswith('error') else 'INFO'
+            print_progress(f"{icon} {region}/{table}: {result}", level)
+        failed = sum(1 for result in results.values() if result.startswith('error'))
+        print_progress(f"{action}: {len(results) - failed}/{len(results)} tables ok in {time.time() - start:.1f}s")
+        return failed == 0
+
+    def create(self, wait: bool = True) -> bool:
+        """Create every missing table; existing tables are left as they are"""
+        start = time.time()
+
+        def create_one(region, table):
+            try:
+                self.clients[region].create_table(TableName=table, **TABLE_SCHEMAS[table])
+                return 'created'
+            except KeyError:
+                return f"error: no schema declared for {table}"
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ResourceInUseException':
+                    return 'exists'
+                return f"error: {e.response['Error']['Code']}: {e.response['Error']['Message']}"
+
+        print_progress(f"Creating {len(self.targets)} tables in {', '.join(self.regions)}...")
+        results = self._for_each(create_one)
+        if wait:
+            # Existing tables may still be CREATING/UPDATING, so wait on them as well
+            pending = [target for target, result in results.items() if not result.startswith('error')]
+            for target, result in self._wait('table_exists', pending).items():
+                if result != 'ok':
+                    results[target] = result
+                elif results[target] == 'created':
+                    results[target] = 'created (active)'
+        return self._report('Create', results, start)
+
+    def delete(self, wait: bool = True) -> bool:
+        """Delete every table that exists"""
+        start = time.time()
+
+        def delete_one(region, table):
+            try:
+                self.clients[region].delete_table(TableName=table)
+                return 'deleting'
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                    return 'not found'
+                return f"error: {e.response['Error']['Code']}: {e.response['Error']['Message']}"
+
+        print_progress(f"Deleting {len(self.targets)} tables in {', '.join(self.regions)}...")
+        results = self._for_each(delete_one)
+        if wait:
+            pending = [target for target, result in results.items() if result == 'deleting']
+            for target, result in self._wait('table_not_exists', pending).items():
+                results[target] = 'deleted' if result == 'ok' else result
+        return self._report('Delete', results, start)
+
+    def update(self, wait: bool = True, **update_args) -> bool:
+        """Apply the same UpdateTable arguments (e.g. BillingMode) to every table"""
+        start = time.time()
+
+        def update_one(region, table):
+            try:
+                self.clients[region].update_table(TableName=table, **update_args)
+                return 'updating'
+            except ClientError as e:
+                return f"error: {e.response['Error']['Code']}: {e.response['Error']['Message']}"
+
+        print_progress(f"Updating {len(self.targets)} tables in {', '.join(self.regions)}: {update_args}")
+        results = self._for_each(update_one)
+        if wait:
+            pending = [target for target, result in results.items() if result == 'updating']
+            for target, result in self._wait('table_exists', pending).items():
+                results[target] = 'updated (active)' if result == 'ok' else result
+        return self._report('Update', results, start)
+
+    def status(self) -> Dict[tuple, str]:
+        """TableStatus per target ('NOT_FOUND' for missing tables)"""
+        def describe(region, table):
+            try:
+                return self.clients[region].describe_table(TableName=table)['Table']['TableStatus']
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                    return 'NOT_FOUND'
+                return f"error: {e.response['Error']['Code']}"
+
+        return self._for_each(describe)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent DynamoDB table lifecycle for the migration tables')
+    parser.add_argument('action', choices=['create', 'delete', 'update', 'status'])
+    parser.add_argument('regions', nargs='?', default='dev',
+                        help="Environment(s) or region(s): 'dev', 'prod', 'dev,prod', 'all', 'eu-west-1' (default: dev)")
+    parser.add_argument('--tables', help=f"Comma-separated tables (default: {','.join(MIGRATION_TABLES)})")
+    parser.add_argument('--no-wait', action='store_true', help='Issue the requests without waiting')
+    parser.add_argument('--billing-mode', choices=['PAY_PER_REQUEST', 'PROVISIONED'], help='update: billing mode')
+    parser.add_argument('--read-capacity', type=int, help='update: provisioned read capacity units')
+    parser.add_argument('--write-capacity', type=int, help='update: provisioned write capacity units')
+    args = parser.parse_args()
+
+    tables = [t.strip() for t in args.tables.split(',') if t.strip()] if args.tables else None
+    aws_profile = os.getenv('AWS_PROFILE')
+    session = boto3.Session(profile_name=aws_profile) if aws_profile else boto3.Session()
+    lifecycle = TableLifecycle(resolve_regions(args.regions), tables, session)
+
+    if args.action == 'status':
+        for (region, table), status in sorted(lifecycle.status().items()):
+            print(f"  {region}/{table}: {status}")
+        return
+
+    if args.action == 'create':
+        ok = lifecycle.create(wait=not args.no_wait)
+    elif args.action == 'delete':
+        ok = lifecycle.delete(wait=not args.no_wait)
+    else:
+        update_args = {}
+        if args.billing_mode:
+            update_args['BillingMode'] = args.billing_mode
+        if args.read_capacity or args.write_capacity:
+            update_args['ProvisionedThroughput'] = {
+                'ReadCapacityUnits': args.read_capacity or 1,
+                'WriteCapacityUnits': args.write_capacity or 1
+            }
+        if not update_args:
+            parser.error('update needs --billing-mode and/or --read-capacity/--write-capacity')
+        ok = lifecycle.update(wait=not args.no_wait, **update_args)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
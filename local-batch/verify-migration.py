@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Migration Verifier
+Compares pni-passages in DynamoDB with what postgres-to-dynamodb-unified.py would write
+from PostgreSQL, item by item, and reports exact missing, extra and mismatched passages.
+
+- PostgreSQL: one set-based query returns a content hash per publishable passage and a
+  digest per lesson (same approval, proficiency and has-questions rules as the migration)
+- DynamoDB: parallel segmented scans (Segment/TotalSegments), projecting only the keys
+  and the attributes that feed the content hash, with full pagination
+- Lessons whose digests match are settled at once; the rest are compared per passage
+- Topics and cache metadata are checked too; exit status is non-zero on any difference
+
+Usage:
+    python3 verify-migration.py dev
+    python3 verify-migration.py prod --segments 16 --deep --output verify-prod.json
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Tuple
+
+import boto3
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+PASSAGES_TABLE = 'pni-passages'
+TOPICS_TABLE = 'pni-topics'
+CACHE_METADATA_TABLE = 'pni-cache-metadata'
+
+ENVIRONMENT_REGIONS = {
+    'dev': 'us-east-1',
+    'prod': 'eu-west-1'
+}
+
+# Unit/record separators keep field boundaries unambiguous in the hashed string
+FIELD_SEPARATOR = '\x1f'
+QUESTION_SEPARATOR = '\x1d'
+QUESTION_FIELD_SEPARATOR = '\x1e'
+
+# Item attributes hashed on both sides, in order; --deep adds the question ids and texts,
+# sorted by question id on both sides (writers order by sort_order, which may tie)
+HASHED_ATTRIBUTES = ['lesson_title', 'lesson_topic', 'proficiency', 'passage_title', 'passage_content',
+                     'passage_sort_order', 'question_count', 'total_points']
+
+# Publishable passages with their content hash and lesson digest, computed in PostgreSQL.
+# Mirrors fetch_passages_with_questions/clean_passage_item in postgres-to-dynamodb-unified.py:
+# approved lesson and passage, A/B/C proficiency, at least one approved question.
+PASSAGE_HASH_QUERY = """
+WITH question_totals AS (
+    SELECT
+        q.passage_id,
+        COUNT(*) as question_count,
+        COALESCE(SUM(q.points), 0) as total_points,
+        STRING_AGG(q.id::text || chr(30) || COALESCE(q.question_text, ''), chr(29)
+                   ORDER BY q.id::text COLLATE "C") as questions
+    FROM practise_improve_pilot.questions q
+    WHERE q.approval_status = 'approved'
+    GROUP BY q.passage_id
+),
+passage_hashes AS (
+    SELECT
+        l.id as lesson_id,
+        p.id::text as passage_id,
+        md5(concat_ws(chr(31),
+            COALESCE(l.title, ''),
+            COALESCE(l.topic, ''),
+            CASE LEFT(l.proficiency_level, 1)
+                WHEN 'A' THEN 'beginner' WHEN 'B' THEN 'intermediate' WHEN 'C' THEN 'advanced'
+            END,
+            COALESCE(p.title, ''),
+            COALESCE(p.content, ''),
+            COALESCE(p.sort_order::text, ''),
+            qt.question_count::text,
+            qt.total_points::text
+            {deep_column}
+        )) as content_hash
+    FROM practise_improve_pilot.lessons l
+    INNER JOIN practise_improve_pilot.passages p ON p.lesson_id = l.id
+    INNER JOIN question_totals qt ON qt.passage_id = p.id::text
+    WHERE l.approval_status = 'approved'
+        AND p.approval_status = 'approved'
+        AND LEFT(l.proficiency_level, 1) IN ('A', 'B', 'C')
+),
+lesson_digests AS (
+    SELECT
+        lesson_id,
+        md5(STRING_AGG(passage_id || ':' || content_hash, ',' ORDER BY passage_id COLLATE "C")) as lesson_digest
+    FROM passage_hashes
+    GROUP BY lesson_id
+)
+SELECT ph.lesson_id, ph.passage_id, ph.content_hash, ld.lesson_digest
+FROM passage_hashes ph
+JOIN lesson_digests ld ON ld.lesson_id = ph.lesson_id
+"""
+
+TOPICS_QUERY = """
+SELECT DISTINCT TRIM(topic) as topic
+FROM practise_improve_pilot.lessons
+WHERE approval_status = 'approved' AND topic IS NOT NULL AND TRIM(topic) != ''
+"""
+
+
+def print_progress(message: str, level: str = "INFO"):
+    """Print formatted progress messages"""
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{timestamp}] {level}: {message}")
+
+
+def get_postgres_config(environment: str) -> Dict[str, Any]:
+    """PostgreSQL credentials from ~/.aws/credentials, database by environment"""
+    config = configparser.ConfigParser()
+    config.read(os.path.expanduser('~/.aws/credentials'))
+    profile = os.getenv('PG_AWS_PROFILE', 'postgres-creds')
+
+    return {
+        'host': config.get(profile, 'pg_host'),
+        'port': config.get(profile, 'pg_port', fallback='5432'),
+        'database': os.getenv('PG_DATABASE') or ('genaicoe_postgresql' if environment == 'dev' else 'prod'),
+        'user': config.get(profile, 'pg_user'),
+        'password': config.get(profile, 'pg_password')
+    }
+
+
+def lesson_digest(passage_hashes: Dict[str, str]) -> str:
+    """Digest of one lesson's {passage_id: content_hash}, identical to the SQL lesson_digest"""
+    joined = ','.join(f"{passage_id}:{passage_hashes[passage_id]}"
+                      for passage_id in sorted(passage_hashes, key=lambda p: p.encode('utf-8')))
+    return hashlib.md5(joined.encode('utf-8')).hexdigest()
+
+
+def attribute_text(value: Dict[str, Any]) -> str:
+    """Low-level DynamoDB attribute value as the text PostgreSQL hashes"""
+    if 'S' in value:
+        return value['S']
+    if 'N' in value:
+        number = value['N']
+        return str(int(float(number))) if '.' in number or 'e' in number.lower() else number
+    return ''
+
+
+def item_content_hash(item: Dict[str, Any], deep: bool) -> str:
+    """Content hash of a projected low-level pni-passages item, identical to the SQL content_hash"""
+    fields = [attribute_text(item.get(name, {})) for name in HASHED_ATTRIBUTES]
+    if deep:
+        questions = sorted(
+            (attribute_text(q.get('question_id', {})), attribute_text(q.get('question', {})))
+            for q in (question.get('M', {}) for question in item.get('questions', {}).get('L', []))
+        )
+        fields.append(QUESTION_SEPARATOR.join(
+            question_id + QUESTION_FIELD_SEPARATOR + text for question_id, text in questions
+        ))
+    return hashlib.md5(FIELD_SEPARATOR.join(fields).encode('utf-8')).hexdigest()
+
+
+def fetch_postgres_hashes(environment: str, deep: bool) -> Tuple[Dict[int, Dict[str, str]], Dict[int, str], set]:
+    """({lesson_id: {passage_id: content_hash}}, {lesson_id: lesson_digest}, topics) from PostgreSQL"""
+    deep_column = ", qt.questions" if deep else ''
+    conn = psycopg2.connect(**get_postgres_config(environment))
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(PASSAGE_HASH_QUERY.format(deep_column=deep_column))
+            passages, digests = {}, {}
+            for row in cursor.fetchall():
+                lesson_id = int(row['lesson_id'])
+                passages.setdefault(lesson_id, {})[row['passage_id']] = row['content_hash']
+                digests[lesson_id] = row['lesson_digest']
+
+            cursor.execute(TOPICS_QUERY)
+            topics = {row['topic'] for row in cursor.fetchall()}
+    finally:
+        conn.close()
+    return passages, digests, topics
+
+
+def scan_segment(region: str, table_name: str, segment: int, total_segments: int,
+                 projection: str = None, names: Dict[str, str] = None) -> List[Dict[str, Any]]:
+    """Scan one segment to the end, following LastEvaluatedKey (own client per thread)"""
+    client = boto3.session.Session().client('dynamodb', region_name=region)
+    params = {'TableName': table_name, 'Segment': segment, 'TotalSegments': total_segments}
+    if projection:
+        params['ProjectionExpression'] = projection
+        params['ExpressionAttributeNames'] = names
+
+    items = []
+    while True:
+        response = client.scan(**params)
+        items.extend(response['Items'])
+        if 'LastEvaluatedKey' not in response:
+            return items
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def parallel_scan(region: str, table_name: str, segments: int, attributes: List[str] = None) -> List[Dict[str, Any]]:
+    """All items of a table from `segments` concurrent segment scans"""
+    projection, names = None, None
+    if attributes:
+        names = {f"#a{i}": name for i, name in enumerate(attributes)}
+        projection = ', '.join(names)
+
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [executor.submit(scan_segment, region, table_name, segment, segments, projection, names)
+                   for segment in range(segments)]
+        return [item for future in futures for item in future.result()]
+
+
+def fetch_dynamodb_hashes(region: str, segments: int, deep: bool) -> Tuple[Dict[int, Dict[str, str]], int]:
+    """({lesson_id: {passage_id: content_hash}}, item count) from pni-passages"""
+    attributes = ['lesson_id', 'passage_id'] + HASHED_ATTRIBUTES + (['questions'] if deep else [])
+    items = parallel_scan(region, PASSAGES_TABLE, segments, attributes)
+
+    passages = {}
+    for item in items:
+        lesson_id = int(item['lesson_id']['N'])
+        passages.setdefault(lesson_id, {})[item['passage_id']['S']] = item_content_hash(item, deep)
+    return passages, len(items)
+
+
+def compare(expected: Dict[int, Dict[str, str]], expected_digests: Dict[int, str],
+            actual: Dict[int, Dict[str, str]]) -> Dict[str, Any]:
+    """Missing, extra and mismatched passages; lessons with equal digests are skipped wholesale"""
+    result = {'lessons_matched': 0, 'lessons_different': 0, 'missing': [], 'extra': [], 'mismatched': []}
+
+    for lesson_id in sorted(set(expected) | set(actual)):
+        expected_passages = expected.get(lesson_id, {})
+        actual_passages = actual.get(lesson_id, {})
+
+        if lesson_id in expected_digests and actual_passages and \
+                lesson_digest(actual_passages) == expected_digests[lesson_id]:
+            result['lessons_matched'] += 1
+            continue
+
+        result['lessons_different'] += 1
+        for passage_id in sorted(set(expected_passages) - set(actual_passages)):
+            result['missing'].append({'lesson_id': lesson_id, 'passage_id': passage_id})
+        for passage_id in sorted(set(actual_passages) - set(expected_passages)):
+            result['extra'].append({'lesson_id': lesson_id, 'passage_id': passage_id})
+        for passage_id in sorted(set(expected_passages) & set(actual_passages)):
+            if expected_passages[passage_id] != actual_passages[passage_id]:
+                result['mismatched'].append({'lesson_id': lesson_id, 'passage_id': passage_id})
+
+    return result
+
+
+def check_tables_active(region: str) -> Dict[str, str]:
+    """TableStatus of every migration table (NOT_FOUND when missing)"""
+    client = boto3.client('dynamodb', region_name=region)
+    statuses = {}
+    for table_name in (PASSAGES_TABLE, TOPICS_TABLE, CACHE_METADATA_TABLE):
+        try:
+            statuses[table_name] = client.describe_table(TableName=table_name)['Table']['TableStatus']
+        except client.exceptions.ResourceNotFoundException:
+            statuses[table_name] = 'NOT_FOUND'
+    return statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verify pni-passages against PostgreSQL, passage by passage')
+    parser.add_argument('environment', choices=['dev', 'prod'], help='Environment to verify')
+    parser.add_argument('--segments', type=int, default=8, help='Parallel scan segments (default: 8)')
+    parser.add_argument('--deep', action='store_true',
+                        help='Also hash question ids and texts (projects the questions attribute)')
+    parser.add_argument('--show', type=int, default=20, help='Differences listed per category (default: 20)')
+    parser.add_argument('--output', help='Write the full result as JSON to this file')
+    args = parser.parse_args()
+
+    region = ENVIRONMENT_REGIONS[args.environment]
+    start = time.time()
+    print_progress(f"Verifying {args.environment} ({region}) with {args.segments} scan segments"
+                   f"{' (deep: including questions)' if args.deep else ''}")
+
+    statuses = check_tables_active(region)
+    for table_name, status in statuses.items():
+        print_progress(f"{table_name}: {status}", "INFO" if status == 'ACTIVE' else "ERROR")
+    if any(status != 'ACTIVE' for status in statuses.values()):
+        sys.exit(1)
+
+    # PostgreSQL and DynamoDB are read concurrently
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        postgres_future = executor.submit(fetch_postgres_hashes, args.environment, args.deep)
+        dynamodb_future = executor.submit(fetch_dynamodb_hashes, region, args.segments, args.deep)
+        topics_future = executor.submit(parallel_scan, region, TOPICS_TABLE, args.segments, ['topic'])
+        metadata_future = executor.submit(parallel_scan, region, CACHE_METADATA_TABLE, 1, ['cache_type'])
+
+        expected, expected_digests, expected_topics = postgres_future.result()
+        actual, item_count = dynamodb_future.result()
+        actual_topics = {item['topic']['S'] for item in topics_future.result()}
+        metadata_types = {item['cache_type']['S'] for item in metadata_future.result() if 'cache_type' in item}
+
+    result = compare(expected, expected_digests, actual)
+    result['expected_passages'] = sum(len(passages) for passages in expected.values())
+    result['dynamodb_items'] = item_count
+    result['missing_topics'] = sorted(expected_topics - actual_topics)
+    result['extra_topics'] = sorted(actual_topics - expected_topics)
+    result['cache_metadata_present'] = 'lesson_cache' in metadata_types
+    result['elapsed_seconds'] = round(time.time() - start, 2)
+
+    print_progress(f"PostgreSQL: {result['expected_passages']} publishable passages in {len(expected)} lessons")
+    print_progress(f"DynamoDB:   {item_count} items in {PASSAGES_TABLE}, {len(actual_topics)} topics")
+    print_progress(f"Lessons: {result['lessons_matched']} matching digests, {result['lessons_different']} different")
+
+    for category in ('missing', 'extra', 'mismatched'):
+        entries = result[category]
+        level = "INFO" if not entries else "ERROR"
+        print_progress(f"{category.capitalize()} passages: {len(entries)}", level)
+        for entry in entries[:args.show]:
+            print(f"    lesson_id={entry['lesson_id']} passage_id={entry['passage_id']}")
+        if len(entries) > args.show:
+            print(f"    ... {len(entries) - args.show} more (use --output for the full list)")
+
+    if result['missing_topics']:
+        print_progress(f"Topics missing from {TOPICS_TABLE}: {result['missing_topics']}", "ERROR")
+    if result['extra_topics']:
+        # Incremental migrations never delete topics, so stale ones are reported but tolerated
+        print_progress(f"Topics in {TOPICS_TABLE} with no approved lesson: {result['extra_topics']}", "WARNING")
+    if not result['cache_metadata_present']:
+        print_progress(f"{CACHE_METADATA_TABLE}: no lesson_cache item", "ERROR")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print_progress(f"Full result written to {args.output}")
+
+    ok = not (result['missing'] or result['extra'] or result['mismatched'] or result['missing_topics']
+              or not result['cache_metadata_present'])
+    print_progress(f"Verification {'passed' if ok else 'FAILED'} in {result['elapsed_seconds']}s",
+                   "SUCCESS" if ok else "ERROR")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
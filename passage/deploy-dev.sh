@@ -34,6 +34,8 @@ TEMP_DIR=$(mktemp -d)
 
 # Copy Lambda function
 cp "$SCRIPT_DIR/passage-migration.py" "$TEMP_DIR/lambda_function.py"
+cp "$SCRIPT_DIR/passage_sinks.py" "$TEMP_DIR/"
+cp "$SCRIPT_DIR/passage_queries.py" "$TEMP_DIR/"
 
 log "Installing dependencies..."
 pip3 install -r "$SCRIPT_DIR/requirements.txt" -t "$TEMP_DIR" --quiet
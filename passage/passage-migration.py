@@ -9,11 +9,13 @@ Environment Detection:
 - us-east-1 region = dev environment
 """
 
+import hashlib
 import json
 import os
+import time
 import logging
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
@@ -28,6 +30,12 @@ except ImportError as e:
     logger.error(f"Missing required module: {e}")
     raise
 
+from passage_sinks import (
+    DynamoDBSink, S3StreamingSink, ShardedSnapshotSink, NdjsonFileSink, NullSink,
+    FULL_CORPUS_SINKS, parse_sink_names, run_sinks
+)
+from passage_queries import DYNAMODB_PASSAGE_LIMIT, complete_passages_query
+
 
 def get_environment_from_region() -> str:
     """Determine environment based on AWS region"""
@@ -59,39 +67,9 @@ def get_database_config(environment: str) -> Dict[str, Any]:
     return config
 
 
-def upload_json_to_s3(data: Dict[str, Any], environment: str) -> bool:
-    """Upload the data as JSON to S3 for comparison"""
-    bucket_name = os.getenv('S3_BUCKET', 'pi-app-data')
-    s3_key = f"passage-migration-{environment}.json"
-    
-    try:
-        s3_client = boto3.client('s3')
-        
-        logger.info(f"Uploading comparison data to s3://{bucket_name}/{s3_key}")
-        
-        # Convert data to JSON string with proper formatting
-        json_content = json.dumps(data, indent=2, default=str, ensure_ascii=False)
-        
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=s3_key,
-            Body=json_content.encode('utf-8'),
-            ACL='public-read',
-            ContentType='application/json',
-            Metadata={
-                'uploaded-by': 'passage-migration-lambda',
-                'environment': environment,
-                'upload-timestamp': datetime.now().isoformat(),
-                'purpose': 'data-comparison'
-            }
-        )
-        
-        logger.info(f"Successfully uploaded comparison data to s3://{bucket_name}/{s3_key}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"S3 upload failed: {e}")
-        return False
+def get_s3_client():
+    """Create the S3 client - S3_ENDPOINT_URL points it at a local S3 stand-in (MinIO, moto) for testing"""
+    return boto3.client('s3', endpoint_url=os.getenv('S3_ENDPOINT_URL') or None)
 
 
 def get_dynamodb_config(environment: str) -> Dict[str, str]:
@@ -209,8 +187,8 @@ def get_dynamodb_config(environment: str) -> Dict[str, str]:
 #             create_cache_metadata_table())
 
 
-def fetch_passages_complete(environment: str) -> List[Dict]:
-    """Fetch passages with complete data using single query with JSON aggregation"""
+def fetch_passages_complete(environment: str, limit: Optional[int] = None) -> List[Dict]:
+    """Fetch passages with complete data using single query with JSON aggregation (at most limit rows)"""
     
     # Get database config and connect
     db_config = get_database_config(environment)
@@ -228,67 +206,7 @@ def fetch_passages_complete(environment: str) -> List[Dict]:
         
         # Single query to get ALL passage data including questions
         # Match original logic: ALL proficiency levels + filter for passages with questions
-        complete_query = """
-        SELECT 
-            -- Lesson information
-            l.id as lesson_id,
-            l.title as lesson_title,
-            l.summary as lesson_description,
-            l.topic as lesson_topic,
-            l.proficiency_level as lesson_proficiency,
-            l.estimated_duration as lesson_estimated_duration,
-            l.approval_status as lesson_approval_status,
-            
-            -- Passage information
-            p.id as passage_id,
-            p.title as passage_title,
-            p.content as passage_content,
-            p.sort_order as passage_sort_order,
-            p.approval_status as passage_approval_status,
-            p.word_count as passage_word_count,
-            p.reading_level as passage_reading_level,
-            p.source as passage_source,
-            
-            -- Aggregated questions for this passage
-            JSON_AGG(
-                JSON_BUILD_OBJECT(
-                    'question_id', q.id,
-                    'question', q.question_text,
-                    'type', q.question_type,
-                    'options', q.options,
-                    'correct', q.correct_answer_index,
-                    'correctAnswer', q.correct_answer,
-                    'acceptableAnswers', q.acceptable_answers,
-                    'wordLimit', q.word_limit,
-                    'placeholder', q.placeholder,
-                    'sort_order', q.sort_order,
-                    'points', COALESCE(q.points, 0),
-                    'question_approval_status', q.approval_status
-                ) ORDER BY q.sort_order
-            ) as questions
-            
-        FROM practise_improve_pilot.lessons l
-        INNER JOIN practise_improve_pilot.passages p ON p.lesson_id = l.id
-        INNER JOIN practise_improve_pilot.questions q ON q.passage_id = p.id::text 
-        WHERE l.approval_status = 'approved' 
-            AND p.approval_status = 'approved'
-            AND q.approval_status = 'approved'
-            AND p.title IS NOT NULL
-            AND p.content IS NOT NULL
-            AND (
-                l.proficiency_level LIKE 'A%' OR 
-                l.proficiency_level LIKE 'B%' OR 
-                l.proficiency_level LIKE 'C%'
-            )
-        GROUP BY 
-            l.id, l.title, l.summary, l.topic, l.proficiency_level, 
-            l.estimated_duration, l.approval_status,
-            p.id, p.title, p.content, p.sort_order, p.approval_status,
-            p.word_count, p.reading_level, p.source
-        ORDER BY 
-            l.proficiency_level, l.topic, l.id, p.sort_order
-        LIMIT 50;
-        """
+        complete_query = complete_passages_query(limit)
         
         logger.info("  📊 Executing single query for complete passage data...")
         results = connection.run(complete_query)
@@ -506,53 +424,6 @@ def fetch_topics(connection) -> List[str]:
 
 
 # DYNAMODB WRITE FUNCTIONS - OPTIMIZED FOR COST EFFICIENCY
-def batch_write_passages(passages: List[Dict], table_name: str, dynamodb):
-    """Write passages to DynamoDB in batches - optimized for cost efficiency"""
-    table = dynamodb.Table(table_name)
-    
-    logger.info(f"Writing {len(passages)} passages to {table_name}...")
-    
-    # DynamoDB batch write limit is 25 items
-    batch_size = 25
-    successful_writes = 0
-    
-    for i in range(0, len(passages), batch_size):
-        batch = passages[i:i + batch_size]
-        
-        try:
-            with table.batch_writer() as batch_writer:
-                for passage in batch:
-                    # Clean up the passage data and ensure proper types
-                    clean_passage = {}
-                    for k, v in passage.items():
-                        if v is not None:
-                            # Ensure numeric fields are numbers
-                            if k in ['lesson_id', 'passage_word_count', 'question_count', 'total_points']:
-                                clean_passage[k] = int(v) if v != '' else 0
-                            # passage_id should remain as string (UUID)
-                            elif k == 'passage_id':
-                                clean_passage[k] = str(v)
-                            # Ensure string fields are strings
-                            elif k in ['proficiency', 'lesson_title', 'passage_title']:
-                                clean_passage[k] = str(v)
-                            # Convert empty strings to None (skip them)
-                            elif v == '':
-                                continue
-                            else:
-                                clean_passage[k] = v
-                    
-                    batch_writer.put_item(Item=clean_passage)
-                    successful_writes += 1
-                    
-            logger.info(f"Batch {i//batch_size + 1}: Wrote {len(batch)} passages")
-            
-        except Exception as e:
-            logger.error(f"Error writing batch {i//batch_size + 1}: {e}")
-            raise
-    
-    logger.info(f"Successfully wrote {successful_writes} passages to {table_name}")
-
-
 def batch_write_topics(topics: List[str], table_name: str, dynamodb):
     """Write topics to DynamoDB - optimized for cost efficiency"""
     table = dynamodb.Table(table_name)
@@ -594,6 +465,89 @@ def write_cache_metadata(table_name: str, config: Dict[str, str], dynamodb):
 #     logger.info("Cache metadata written to DynamoDB")
 
 
+# Cheap change detector for the source tables: row counts and an order-independent
+# checksum over the full row content (updated_at is not maintained on UPDATE, so it
+# cannot be trusted). One scan per table, before any extraction.
+SOURCE_FINGERPRINT_QUERY = """
+SELECT 'lessons', COUNT(*), COALESCE(SUM(hashtext(t::text)::bigint), 0)::text
+FROM practise_improve_pilot.lessons t
+UNION ALL
+SELECT 'passages', COUNT(*), COALESCE(SUM(hashtext(t::text)::bigint), 0)::text
+FROM practise_improve_pilot.passages t
+UNION ALL
+SELECT 'questions', COUNT(*), COALESCE(SUM(hashtext(t::text)::bigint), 0)::text
+FROM practise_improve_pilot.questions t;
+"""
+
+FINGERPRINT_CACHE_TYPE = 'source_fingerprint'
+
+
+def compute_source_fingerprint(environment: str) -> str:
+    """Fingerprint the lessons/passages/questions tables (and the selected sinks) with a single aggregate query"""
+    db_config = get_database_config(environment)
+    connection = pg8000.native.Connection(
+        user=db_config['user'],
+        password=db_config['password'],
+        host=db_config['host'],
+        port=db_config['port'],
+        database=db_config['database']
+    )
+    try:
+        rows = connection.run(SOURCE_FINGERPRINT_QUERY)
+    finally:
+        connection.close()
+    
+    # Changing the sink selection must trigger a run even when the data is unchanged
+    state = {'sources': rows, 'sinks': parse_sink_names(os.getenv('PASSAGE_SINKS'))}
+    return hashlib.sha256(json.dumps(state, default=str).encode('utf-8')).hexdigest()
+
+
+def get_stored_fingerprint(table_name: str, dynamodb) -> Optional[str]:
+    """Read the fingerprint recorded by the last successful migration"""
+    item = dynamodb.Table(table_name).get_item(Key={'cache_type': FINGERPRINT_CACHE_TYPE}).get('Item')
+    return item.get('fingerprint') if item else None
+
+
+def store_fingerprint(fingerprint: str, table_name: str, dynamodb):
+    """Record the fingerprint of the source data that was just migrated"""
+    dynamodb.Table(table_name).put_item(Item={
+        'cache_type': FINGERPRINT_CACHE_TYPE,
+        'fingerprint': fingerprint,
+        'lastUpdated': int(datetime.now().timestamp() * 1000)
+    })
+
+
+def build_sinks(sink_names: List[str], environment: str, dynamo_config: Dict[str, str], dynamodb) -> List:
+    """Create the configured passage sinks for one extraction pass"""
+    sinks = []
+    for name in sink_names:
+        if name == 'dynamodb':
+            sinks.append(DynamoDBSink(dynamodb, dynamo_config['passages_table']))
+        elif name == 's3':
+            compress = os.getenv('S3_EXPORT_GZIP', 'true').lower() == 'true'
+            sinks.append(S3StreamingSink(
+                get_s3_client(),
+                os.getenv('S3_BUCKET', 'pi-app-data'),
+                f"passage-migration-{environment}.ndjson" + ('.gz' if compress else ''),
+                environment,
+                compress=compress,
+                part_size=int(os.getenv('S3_EXPORT_PART_SIZE_MB', '8')) * 1024 * 1024,
+                max_in_flight=int(os.getenv('S3_EXPORT_CONCURRENCY', '4'))
+            ))
+        elif name == 'shards':
+            sinks.append(ShardedSnapshotSink(
+                get_s3_client(),
+                os.getenv('S3_BUCKET', 'pi-app-data'),
+                f"passages/{environment}",
+                environment
+            ))
+        elif name == 'ndjson':
+            sinks.append(NdjsonFileSink(os.getenv('NDJSON_OUTPUT_PATH', f"passages-{environment}.ndjson")))
+        elif name == 'null':
+            sinks.append(NullSink())
+    return sinks
+
+
 def migrate_passages(environment: str) -> Dict[str, Any]:
     """Main migration function - writes to DynamoDB with cost optimization"""
     
@@ -610,9 +564,13 @@ def migrate_passages(environment: str) -> Dict[str, Any]:
         logger.info("Verifying DynamoDB tables exist...")
         # Note: Table creation is rare and only happens once per environment
         
+        # Full-corpus sinks need every passage; the row cap only applies to DynamoDB-only runs
+        sink_names = parse_sink_names(os.getenv('PASSAGE_SINKS'))
+        limit = None if any(name in FULL_CORPUS_SINKS for name in sink_names) else DYNAMODB_PASSAGE_LIMIT
+        
         # Fetch data from PostgreSQL using optimized single query
-        logger.info("Fetching data from PostgreSQL...")
-        passages = fetch_passages_complete(environment)
+        logger.info(f"Fetching data from PostgreSQL ({f'limit {limit}' if limit else 'all passages'})...")
+        passages = fetch_passages_complete(environment, limit)
         
         logger.info(f"Fetched {len(passages)} passages with complete data")
         
@@ -626,24 +584,21 @@ def migrate_passages(environment: str) -> Dict[str, Any]:
             database=db_config['database']
         )
         
-        logger.info("Writing data to DynamoDB...")
-        
-        # Write passages and topics to DynamoDB (cost-optimized)
-        batch_write_passages(passages, dynamo_config['passages_table'], dynamodb)
+        # Stream the single extraction to every configured sink concurrently
+        logger.info(f"Writing passages to sinks: {', '.join(sink_names)}")
+        sink_results = run_sinks(passages, build_sinks(sink_names, environment, dynamo_config, dynamodb))
         
         # Get topics only if passages were successfully written
         topics = fetch_topics(connection)
-        batch_write_topics(topics, dynamo_config['topics_table'], dynamodb)
         
         # Close connection
         connection.close()
         
-        # Write metadata (single item write)
-        write_cache_metadata(dynamo_config['cache_metadata_table'], dynamo_config, dynamodb)
-        
-        # COMMENTED OUT - S3 output for cost optimization
-        # logger.info("Creating JSON output for comparison...")
-        # upload_success = upload_json_to_s3(output_data, environment)
+        if 'dynamodb' in sink_names:
+            batch_write_topics(topics, dynamo_config['topics_table'], dynamodb)
+            
+            # Write metadata (single item write)
+            write_cache_metadata(dynamo_config['cache_metadata_table'], dynamo_config, dynamodb)
         
         return {
             'success': True,
@@ -651,12 +606,7 @@ def migrate_passages(environment: str) -> Dict[str, Any]:
             'region': dynamo_config['region'],
             'total_passages': len(passages),
             'total_topics': len(topics),
-            'dynamodb_writes': {
-                'passages': len(passages),
-                'topics': len(topics),
-                'metadata': 1
-            },
-            'note': 'Data written to DynamoDB tables - S3 output disabled for cost optimization'
+            'sinks': sink_results
         }
         
     except Exception as e:
@@ -680,10 +630,38 @@ def lambda_handler(event, context):
                 })
             }
         
+        # Skip the run entirely when the source tables have not changed since the last migration
+        start_time = time.time()
+        force = bool((event or {}).get('force'))
+        dynamo_config = get_dynamodb_config(environment)
+        dynamodb = boto3.resource('dynamodb', region_name=dynamo_config['region'])
+        
+        fingerprint = None
+        try:
+            fingerprint = compute_source_fingerprint(environment)
+            if not force and fingerprint == get_stored_fingerprint(dynamo_config['cache_metadata_table'], dynamodb):
+                elapsed_ms = int((time.time() - start_time) * 1000)
+                logger.info(f"Source unchanged (fingerprint {fingerprint[:12]}) - skipping migration ({elapsed_ms} ms)")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Source data unchanged - migration skipped',
+                        'fingerprint': fingerprint,
+                        'elapsed_ms': elapsed_ms
+                    })
+                }
+        except Exception as e:
+            logger.warning(f"Source fingerprint check failed, running full migration: {e}")
+        
         logger.info(f"Starting passage migration for DynamoDB ({environment} environment)")
         
         result = migrate_passages(environment)
         
+        # Only record the fingerprint once the migration has succeeded
+        if fingerprint:
+            store_fingerprint(fingerprint, dynamo_config['cache_metadata_table'], dynamodb)
+            result['fingerprint'] = fingerprint
+        
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -712,8 +690,15 @@ def main():
                        help='Environment (dev or prod) - overrides region detection')
     parser.add_argument('--region', choices=['us-east-1', 'eu-west-1'], 
                        help='AWS region (us-east-1=dev, eu-west-1=prod)')
+    parser.add_argument('--sinks',
+                       help="Comma-separated sinks fed by one extraction: dynamodb,s3,shards,ndjson,null (default: dynamodb)")
+    parser.add_argument('--force', action='store_true',
+                       help='Run the migration even if the source fingerprint is unchanged')
     args = parser.parse_args()
     
+    if args.sinks:
+        os.environ['PASSAGE_SINKS'] = args.sinks
+    
     # Set environment variable for region if provided
     if args.region:
         os.environ['AWS_REGION'] = args.region
@@ -731,7 +716,7 @@ def main():
     class MockContext:
         pass
     
-    event = {}
+    event = {'force': args.force}
     context = MockContext()
     
     response = lambda_handler(event, context)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Passage Queries
+Extraction SQL shared by passage-migration.py and local-batch/query_plan_auditor.py,
+so the audited plan is the plan of the query that actually runs.
+"""
+
+from typing import Optional
+
+# Historical cap of the DynamoDB-only migration; full-corpus sinks (s3, shards, ndjson) read everything
+DYNAMODB_PASSAGE_LIMIT = 50
+
+# Every approved passage with its approved questions aggregated, ordered for the export
+COMPLETE_PASSAGES_QUERY = """
+SELECT 
+    -- Lesson information
+    l.id as lesson_id,
+    l.title as lesson_title,
+    l.summary as lesson_description,
+    l.topic as lesson_topic,
+    l.proficiency_level as lesson_proficiency,
+    l.estimated_duration as lesson_estimated_duration,
+    l.approval_status as lesson_approval_status,
+
+    -- Passage information
+    p.id as passage_id,
+    p.title as passage_title,
+    p.content as passage_content,
+    p.sort_order as passage_sort_order,
+    p.approval_status as passage_approval_status,
+    p.word_count as passage_word_count,
+    p.reading_level as passage_reading_level,
+    p.source as passage_source,
+
+    -- Aggregated questions for this passage
+    JSON_AGG(
+        JSON_BUILD_OBJECT(
+            'question_id', q.id,
+            'question', q.question_text,
+            'type', q.question_type,
+            'options', q.options,
+            'correct', q.correct_answer_index,
+            'correctAnswer', q.correct_answer,
+            'acceptableAnswers', q.acceptable_answers,
+            'wordLimit', q.word_limit,
+            'placeholder', q.placeholder,
+            'sort_order', q.sort_order,
+            'points', COALESCE(q.points, 0),
+            'question_approval_status', q.approval_status
+        ) ORDER BY q.sort_order, q.id
+    ) as questions
+
+FROM practise_improve_pilot.lessons l
+INNER JOIN practise_improve_pilot.passages p ON p.lesson_id = l.id
+INNER JOIN practise_improve_pilot.questions q ON q.passage_id = p.id::text 
+WHERE l.approval_status = 'approved' 
+    AND p.approval_status = 'approved'
+    AND q.approval_status = 'approved'
+    AND p.title IS NOT NULL
+    AND p.content IS NOT NULL
+    AND (
+        l.proficiency_level LIKE 'A%' OR 
+        l.proficiency_level LIKE 'B%' OR 
+        l.proficiency_level LIKE 'C%'
+    )
+GROUP BY 
+    l.id, l.title, l.summary, l.topic, l.proficiency_level, 
+    l.estimated_duration, l.approval_status,
+    p.id, p.title, p.content, p.sort_order, p.approval_status,
+    p.word_count, p.reading_level, p.source
+ORDER BY 
+    l.proficiency_level, l.topic, l.id, p.sort_order
+"""
+
+
+def complete_passages_query(limit: Optional[int] = None) -> str:
+    """COMPLETE_PASSAGES_QUERY, capped at limit rows when given"""
+    return COMPLETE_PASSAGES_QUERY + (f"LIMIT {int(limit)}\n" if limit else '')
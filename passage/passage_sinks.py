@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Passage Sinks
+Destinations for passage records produced by a single extraction pass.
+
+Every sink receives the same stream of passage records. run_sinks() feeds one
+iteration of the records to all configured sinks concurrently, so extra outputs
+(S3 JSON, local NDJSON files) cost no additional PostgreSQL load.
+
+Available sinks:
+- dynamodb  Passages table via BatchWrite
+- s3        Streaming multipart upload of (optionally gzip-compressed) NDJSON to S3
+- shards    Immutable gzip JSON shards per (proficiency, topic) plus a manifest in S3
+- ndjson    Local newline-delimited JSON file
+- null      Discards records, measures throughput (benchmarking)
+"""
+
+import gzip
+import hashlib
+import json
+import queue
+import re
+import threading
+import time
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Iterable, Optional, Tuple
+
+logger = logging.getLogger()
+
+# Records buffered per sink before the producer blocks
+SINK_QUEUE_SIZE = 1000
+
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+_END_OF_STREAM = object()
+# Sent instead of _END_OF_STREAM when the producer fails: sinks abort rather than publish
+_ABORT_STREAM = object()
+
+SINK_NAMES = ['dynamodb', 's3', 'shards', 'ndjson', 'null']
+# Sinks that publish the whole corpus and must never be fed a capped extraction
+FULL_CORPUS_SINKS = ['s3', 'shards', 'ndjson']
+
+# Shards are content-addressed and never change; the manifest is revalidated often
+SHARD_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MANIFEST_CACHE_CONTROL = 'public, max-age=60'
+
+
+def encode_ndjson_line(record: Dict[str, Any]) -> bytes:
+    """Encode one record as a compact UTF-8 JSON line"""
+    return (json.dumps(record, default=str, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def clean_passage_item(passage: Dict[str, Any]) -> Dict[str, Any]:
+    """Clean up the passage data and ensure proper types for DynamoDB"""
+    clean_passage = {}
+    for k, v in passage.items():
+        if v is not None:
+            # Ensure numeric fields are numbers
+            if k in ['lesson_id', 'passage_word_count', 'question_count', 'total_points']:
+                clean_passage[k] = int(v) if v != '' else 0
+            # passage_id should remain as string (UUID)
+            elif k == 'passage_id':
+                clean_passage[k] = str(v)
+            # Ensure string fields are strings
+            elif k in ['proficiency', 'lesson_title', 'passage_title']:
+                clean_passage[k] = str(v)
+            # Convert empty strings to None (skip them)
+            elif v == '':
+                continue
+            else:
+                clean_passage[k] = v
+    return clean_passage
+
+
+class PassageSink:
+    """Base class for passage sinks - records are shared between sinks and must not be mutated"""
+
+    name = 'sink'
+
+    def __init__(self):
+        self.records = 0
+
+    def open(self):
+        """Prepare the sink before the first record"""
+
+    def write(self, passage: Dict[str, Any]):
+        """Consume one passage record"""
+        raise NotImplementedError
+
+    def close(self) -> Dict[str, Any]:
+        """Flush pending output and return a summary of what was written"""
+        return {}
+
+    def abort(self):
+        """Release resources after a failed write - nothing is published"""
+
+
+class DynamoDBSink(PassageSink):
+    """Write passages to the DynamoDB passages table"""
+
+    name = 'dynamodb'
+
+    def __init__(self, dynamodb, table_name: str):
+        super().__init__()
+        self.table_name = table_name
+        self.table = dynamodb.Table(table_name)
+        self.batch_writer = None
+
+    def open(self):
+        logger.info(f"Writing passages to {self.table_name}...")
+        self.batch_writer = self.table.batch_writer()
+        self.batch_writer.__enter__()
+
+    def write(self, passage: Dict[str, Any]):
+        self.batch_writer.put_item(Item=clean_passage_item(passage))
+        self.records += 1
+
+    def close(self) -> Dict[str, Any]:
+        self.batch_writer.__exit__(None, None, None)
+        logger.info(f"Successfully wrote {self.records} passages to {self.table_name}")
+        return {'table': self.table_name}
+
+
+class S3StreamingSink(PassageSink):
+    """Stream passages to S3 as NDJSON through a multipart upload with parallel part uploads
+
+    Memory stays bounded at roughly part_size * (max_in_flight + 1) regardless of corpus size.
+    """
+
+    name = 's3'
+
+    def __init__(self, s3_client, bucket_name: str, s3_key: str, environment: str,
+                 compress: bool = True, part_size: int = 8 * 1024 * 1024, max_in_flight: int = 4):
+        super().__init__()
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.s3_key = s3_key
+        self.environment = environment
+        self.compress = compress
+        self.part_size = part_size
+        self.max_in_flight = max(1, max_in_flight)
+        self.compressor = None
+        self.buffer = bytearray()
+        self.upload_id = None
+        self.part_futures = []
+        self.executor = None
+        self.slots = None
+        self.raw_bytes = 0
+        self.uploaded_bytes = 0
+
+    def _object_args(self) -> Dict[str, Any]:
+        """Common arguments for put_object and create_multipart_upload"""
+        args = {
+            'Bucket': self.bucket_name,
+            'Key': self.s3_key,
+            'ContentType': 'application/x-ndjson',
+            'Metadata': {
+                'uploaded-by': 'passage-migration-lambda',
+                'environment': self.environment,
+                'upload-timestamp': datetime.now().isoformat()
+            }
+        }
+        if self.compress:
+            args['ContentEncoding'] = 'gzip'
+        return args
+
+    def open(self):
+        # wbits=31 produces a gzip container instead of a raw zlib stream
+        self.compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if self.compress else None
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        self.slots = threading.BoundedSemaphore(self.max_in_flight)
+        logger.info(f"Streaming passages to s3://{self.bucket_name}/{self.s3_key}")
+
+    def write(self, passage: Dict[str, Any]):
+        line = encode_ndjson_line(passage)
+        self.raw_bytes += len(line)
+        self._append(self.compressor.compress(line) if self.compressor else line)
+        self.records += 1
+
+    def _append(self, data: bytes):
+        self.buffer += data
+        if len(self.buffer) >= self.part_size:
+            self._flush_part()
+
+    def _flush_part(self):
+        """Hand the buffered bytes to an upload worker, blocking while all slots are busy"""
+        for future in self.part_futures:
+            if future.done() and future.exception():
+                raise future.exception()
+
+        if self.upload_id is None:
+            response = self.s3_client.create_multipart_upload(**self._object_args())
+            self.upload_id = response['UploadId']
+
+        body = bytes(self.buffer)
+        self.buffer = bytearray()
+        self.uploaded_bytes += len(body)
+        self.slots.acquire()
+        part_number = len(self.part_futures) + 1
+        self.part_futures.append(self.executor.submit(self._upload_part, part_number, body))
+
+    def _upload_part(self, part_number: int, body: bytes) -> Dict[str, Any]:
+        try:
+            response = self.s3_client.upload_part(
+                Bucket=self.bucket_name,
+                Key=self.s3_key,
+                UploadId=self.upload_id,
+                PartNumber=part_number,
+                Body=body
+            )
+            return {'PartNumber': part_number, 'ETag': response['ETag']}
+        finally:
+            self.slots.release()
+
+    def close(self) -> Dict[str, Any]:
+        try:
+            if self.compressor:
+                self.buffer += self.compressor.flush()
+
+            if self.upload_id is None:
+                # Small exports fit in one part - a plain PUT is cheaper than a multipart upload
+                body = bytes(self.buffer)
+                self.s3_client.put_object(Body=body, **self._object_args())
+                self.uploaded_bytes = len(body)
+                parts = 1
+            else:
+                if self.buffer:
+                    self._flush_part()
+                completed_parts = [future.result() for future in self.part_futures]
+                self.s3_client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=self.s3_key,
+                    UploadId=self.upload_id,
+                    MultipartUpload={'Parts': completed_parts}
+                )
+                parts = len(completed_parts)
+        except Exception:
+            self.abort()
+            raise
+        finally:
+            self.executor.shutdown(wait=True)
+
+        logger.info(f"Uploaded {self.records} passages ({self.uploaded_bytes} bytes in {parts} parts) "
+                    f"to s3://{self.bucket_name}/{self.s3_key}")
+        return {
+            'location': f"s3://{self.bucket_name}/{self.s3_key}",
+            'bytes': self.uploaded_bytes,
+            'raw_bytes': self.raw_bytes,
+            'parts': parts
+        }
+
+    def abort(self):
+        if self.executor:
+            self.executor.shutdown(wait=True)
+        if self.upload_id is not None:
+            try:
+                self.s3_client.abort_multipart_upload(
+                    Bucket=self.bucket_name, Key=self.s3_key, UploadId=self.upload_id
+                )
+            except Exception as e:
+                logger.warning(f"Failed to abort multipart upload {self.upload_id}: {e}")
+            self.upload_id = None
+
+
+class ShardedSnapshotSink(PassageSink):
+    """Publish immutable gzip JSON shards per (proficiency, topic) plus a manifest with hashes and sizes
+
+    Shard keys embed the content hash, so clients and CDNs can cache them indefinitely.
+    Shards whose hash matches the previous manifest are not uploaded again.
+    """
+
+    name = 'shards'
+
+    def __init__(self, s3_client, bucket_name: str, prefix: str, environment: str):
+        super().__init__()
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix.rstrip('/')
+        self.environment = environment
+        self.manifest_key = f"{self.prefix}/manifest.json"
+        self.shards: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+
+    def write(self, passage: Dict[str, Any]):
+        shard_key = (str(passage.get('proficiency') or 'unknown'), str(passage.get('lesson_topic') or 'general'))
+        self.shards.setdefault(shard_key, []).append(passage)
+        self.records += 1
+
+    @staticmethod
+    def _slug(value: str) -> str:
+        return re.sub(r'[^a-z0-9]+', '-', value.lower()).strip('-') or 'general'
+
+    def _load_previous_manifest(self) -> Dict[str, Any]:
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.manifest_key)
+            return json.loads(response['Body'].read())
+        except Exception as e:
+            # Missing manifest (first run) or unreadable - publish every shard
+            logger.info(f"No previous shard manifest at s3://{self.bucket_name}/{self.manifest_key}: {e}")
+            return {}
+
+    def _put(self, key: str, body: bytes, cache_control: str, compressed: bool):
+        args = {
+            'Bucket': self.bucket_name,
+            'Key': key,
+            'Body': body,
+            'ACL': 'public-read',
+            'ContentType': 'application/json',
+            'CacheControl': cache_control,
+            'Metadata': {
+                'uploaded-by': 'passage-migration-lambda',
+                'environment': self.environment
+            }
+        }
+        if compressed:
+            args['ContentEncoding'] = 'gzip'
+        self.s3_client.put_object(**args)
+
+    def close(self) -> Dict[str, Any]:
+        previous = self._load_previous_manifest()
+        previous_hashes = {shard['key']: shard['sha256'] for shard in previous.get('shards', [])}
+
+        shard_entries = []
+        uploaded = 0
+        for (proficiency, topic) in sorted(self.shards):
+            passages = sorted(
+                self.shards[(proficiency, topic)],
+                key=lambda p: (str(p.get('lesson_id')), p.get('passage_sort_order') or 0, str(p.get('passage_id')))
+            )
+            # Deterministic encoding so unchanged content always hashes the same
+            content = json.dumps(
+                {'proficiency': proficiency, 'topic': topic, 'passages': passages},
+                default=str, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+            ).encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()
+            key = f"{self.prefix}/shards/{self._slug(proficiency)}/{self._slug(topic)}.{digest[:16]}.json.gz"
+            body = gzip.compress(content, mtime=0)
+
+            if previous_hashes.get(key) != digest:
+                self._put(key, body, SHARD_CACHE_CONTROL, compressed=True)
+                uploaded += 1
+
+            shard_entries.append({
+                'proficiency': proficiency,
+                'topic': topic,
+                'key': key,
+                'sha256': digest,
+                'bytes': len(body),
+                'raw_bytes': len(content),
+                'passages': len(passages)
+            })
+
+        manifest_changed = [
+            (shard['key'], shard['sha256']) for shard in previous.get('shards', [])
+        ] != [(shard['key'], shard['sha256']) for shard in shard_entries]
+
+        if manifest_changed:
+            manifest = {
+                'environment': self.environment,
+                'generated_at': datetime.now().isoformat(),
+                'total_shards': len(shard_entries),
+                'total_passages': self.records,
+                'shards': shard_entries
+            }
+            self._put(self.manifest_key, json.dumps(manifest, indent=2).encode('utf-8'),
+                      MANIFEST_CACHE_CONTROL, compressed=False)
+
+        logger.info(f"Published {uploaded} of {len(shard_entries)} passage shards "
+                    f"({len(shard_entries) - uploaded} unchanged) to s3://{self.bucket_name}/{self.prefix}/")
+        return {
+            'location': f"s3://{self.bucket_name}/{self.manifest_key}",
+            'shards': len(shard_entries),
+            'shards_uploaded': uploaded,
+            'shards_unchanged': len(shard_entries) - uploaded,
+            'manifest_updated': manifest_changed
+        }
+
+
+class NdjsonFileSink(PassageSink):
+    """Write one JSON passage per line to a local file"""
+
+    name = 'ndjson'
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.file = None
+        self.bytes_written = 0
+
+    def open(self):
+        self.file = open(self.path, 'wb')
+
+    def write(self, passage: Dict[str, Any]):
+        line = encode_ndjson_line(passage)
+        self.file.write(line)
+        self.bytes_written += len(line)
+        self.records += 1
+
+    def close(self) -> Dict[str, Any]:
+        self.file.close()
+        logger.info(f"Wrote {self.records} passages to {self.path}")
+        return {'location': self.path, 'bytes': self.bytes_written}
+
+    def abort(self):
+        if self.file:
+            self.file.close()
+
+
+class NullSink(PassageSink):
+    """Discard records after encoding them - measures pipeline throughput"""
+
+    name = 'null'
+
+    def __init__(self):
+        super().__init__()
+        self.bytes_encoded = 0
+
+    def write(self, passage: Dict[str, Any]):
+        self.bytes_encoded += len(encode_ndjson_line(passage))
+        self.records += 1
+
+    def close(self) -> Dict[str, Any]:
+        return {'bytes': self.bytes_encoded}
+
+
+def _abort_sink(sink: PassageSink):
+    """Abort a sink, logging (not raising) cleanup failures so the original error surfaces"""
+    try:
+        sink.abort()
+    except Exception as e:
+        logger.warning(f"Sink '{sink.name}' failed to abort: {e}")
+
+
+def _drain(sink: PassageSink, records: queue.Queue, start_time: float,
+           summaries: Dict[str, Dict[str, Any]], errors: List[BaseException]):
+    """Consume records for one sink until the end of the stream, then close (or abort) it"""
+    failed = False
+    while True:
+        passage = records.get()
+        if passage is _END_OF_STREAM:
+            break
+        if passage is _ABORT_STREAM:
+            failed = True
+            break
+        if failed:
+            # Keep draining so the producer never blocks on a dead sink
+            continue
+        try:
+            sink.write(passage)
+        except Exception as e:
+            logger.error(f"Sink '{sink.name}' failed: {e}")
+            errors.append(e)
+            failed = True
+
+    if failed:
+        _abort_sink(sink)
+        return
+    try:
+        summary = {'sink': sink.name, 'records': sink.records}
+        summary.update(sink.close())
+        summary['seconds'] = round(time.time() - start_time, 3)
+        summaries[sink.name] = summary
+    except Exception as e:
+        logger.error(f"Sink '{sink.name}' failed to close: {e}")
+        errors.append(e)
+
+
+def run_sinks(passages: Iterable[Dict[str, Any]], sinks: List[PassageSink]) -> List[Dict[str, Any]]:
+    """Stream passages once to every sink concurrently and return per-sink summaries"""
+    start_time = time.time()
+    opened: List[PassageSink] = []
+    try:
+        for sink in sinks:
+            sink.open()
+            opened.append(sink)
+    except Exception:
+        # e.g. an orphaned multipart upload if a later sink cannot open
+        for sink in opened:
+            _abort_sink(sink)
+        raise
+
+    summaries: Dict[str, Dict[str, Any]] = {}
+    errors: List[BaseException] = []
+    queues = [queue.Queue(maxsize=SINK_QUEUE_SIZE) for _ in sinks]
+    workers = [
+        threading.Thread(target=_drain, args=(sink, records, start_time, summaries, errors),
+                         name=f"sink-{sink.name}", daemon=True)
+        for sink, records in zip(sinks, queues)
+    ]
+    for worker in workers:
+        worker.start()
+
+    end_of_stream = _ABORT_STREAM
+    try:
+        for passage in passages:
+            for records in queues:
+                records.put(passage)
+        end_of_stream = _END_OF_STREAM
+    finally:
+        # A failed producer must not publish partial output (multipart complete, manifest swap)
+        for records in queues:
+            records.put(end_of_stream)
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        raise errors[0]
+
+    return [summaries[sink.name] for sink in sinks]
+
+
+def parse_sink_names(value: Optional[str]) -> List[str]:
+    """Parse a comma-separated sink list such as 'dynamodb,s3,ndjson'"""
+    names = [name.strip().lower() for name in (value or 'dynamodb').split(',') if name.strip()]
+    unknown = [name for name in names if name not in SINK_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown sink(s): {', '.join(unknown)}. Available: {', '.join(SINK_NAMES)}")
+    return list(dict.fromkeys(names))
@@ -24,6 +24,8 @@ USER_PROGRESS_TABLE="user-progress"
 LESSONS_TABLE="pni-lessons"
 PASSAGES_TABLE="pni-passages"
 DEFAULT_USER_ID="default-user"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SCAN_SEGMENTS=${SCAN_SEGMENTS:-4}
 
 # Helper functions
 print_header() {
@@ -63,39 +65,19 @@ check_aws_cli() {
     print_success "AWS CLI is configured and ready"
 }
 
+# Bulk user-progress operations (paginated queries, batched writes, segmented scans)
+progress_admin() {
+    python3 "$SCRIPT_DIR/progress_admin.py" --region "$AWS_REGION" --table "$USER_PROGRESS_TABLE" "$@"
+}
+
 # User Progress Management
 delete_user_progress() {
     local user_id=${1:-$DEFAULT_USER_ID}
     
     print_header "Deleting User Progress for: $user_id"
     
-    # Get all progress items for the user
-    local items=$(aws dynamodb query \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --key-condition-expression "userId = :userId" \
-        --expression-attribute-values '{":userId":{"S":"'$user_id'"}}' \
-        --region "$AWS_REGION" \
-        --output json 2>/dev/null | jq -r '.Items[]')
-    
-    if [ -z "$items" ]; then
-        print_warning "No progress found for user: $user_id"
-        return
-    fi
-    
-    # Delete all items
-    echo "$items" | jq -r '{userId: .userId.S, progressKey: .progressKey.S}' | while read -r item; do
-        local userId=$(echo "$item" | jq -r '.userId')
-        local progressKey=$(echo "$item" | jq -r '.progressKey')
-        
-        aws dynamodb delete-item \
-            --table-name "$USER_PROGRESS_TABLE" \
-            --key '{"userId":{"S":"'$userId'"},"progressKey":{"S":"'$progressKey'"}}' \
-            --region "$AWS_REGION" 2>/dev/null
-        
-        print_success "Deleted progress: $progressKey"
-    done
-    
-    print_success "All progress deleted for user: $user_id"
+    # Paginated query + BatchWriteItem (25 per request, unprocessed items retried)
+    progress_admin delete "$user_id" --yes || print_error "Failed to delete user progress"
 }
 
 list_user_progress() {
@@ -103,23 +85,44 @@ list_user_progress() {
     
     print_header "User Progress for: $user_id"
     
-    aws dynamodb query \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --key-condition-expression "userId = :userId" \
-        --expression-attribute-values '{":userId":{"S":"'$user_id'"}}' \
-        --region "$AWS_REGION" \
-        --output table 2>/dev/null || print_error "Failed to retrieve user progress"
+    progress_admin list "$user_id" || print_error "Failed to retrieve user progress"
 }
 
 list_all_users() {
     print_header "All Users in Database"
     
-    aws dynamodb scan \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --projection-expression "userId" \
-        --region "$AWS_REGION" \
-        --output json 2>/dev/null | \
-        jq -r '.Items[].userId.S' | sort | uniq || print_error "Failed to retrieve users"
+    progress_admin users --segments "$SCAN_SEGMENTS" || print_error "Failed to retrieve users"
+}
+
+export_user_progress() {
+    local user_id=${1:-$DEFAULT_USER_ID}
+    local output_file=$2
+    
+    print_header "Exporting User Progress for: $user_id"
+    
+    if [ -n "$output_file" ]; then
+        progress_admin export "$user_id" --output "$output_file" || print_error "Failed to export user progress"
+    else
+        progress_admin export "$user_id" || print_error "Failed to export user progress"
+    fi
+}
+
+import_user_progress() {
+    local input_file=$1
+    local user_id=$2
+    
+    print_header "Importing User Progress from: $input_file"
+    
+    if [ ! -f "$input_file" ]; then
+        print_error "File not found: $input_file"
+        return
+    fi
+    
+    if [ -n "$user_id" ]; then
+        progress_admin import "$input_file" --user "$user_id" || print_error "Failed to import user progress"
+    else
+        progress_admin import "$input_file" || print_error "Failed to import user progress"
+    fi
 }
 
 # Lesson Management
@@ -293,6 +296,8 @@ show_menu() {
     echo "1)  List user progress"
     echo "2)  Delete user progress"
     echo "3)  List all users"
+    echo "15) Export user progress"
+    echo "16) Import user progress"
     echo ""
     echo -e "${CYAN}LESSON MANAGEMENT:${NC}"
     echo "4)  List all lessons"
@@ -317,7 +322,7 @@ show_menu() {
     echo ""
     echo "0)  Exit"
     echo ""
-    echo -n "Select an option [0-14]: "
+    echo -n "Select an option [0-16]: "
 }
 
 # Read user input
@@ -429,6 +434,22 @@ read_input() {
                 print_success "AWS region changed to: $AWS_REGION"
             fi
             ;;
+        15)
+            echo ""
+            echo -n "Enter user ID to export (press Enter for default: $DEFAULT_USER_ID): "
+            read user_id
+            echo -n "Output file (press Enter for progress-<user>-<timestamp>.ndjson): "
+            read output_file
+            export_user_progress "${user_id:-$DEFAULT_USER_ID}" "$output_file"
+            ;;
+        16)
+            echo ""
+            echo -n "Enter export file to import: "
+            read input_file
+            echo -n "Import as user ID (press Enter to keep the exported user ID): "
+            read user_id
+            import_user_progress "$input_file" "$user_id"
+            ;;
         0)
             print_success "Goodbye!"
             exit 0
@@ -481,6 +502,8 @@ USER_PROGRESS_TABLE="user-progress"
 LESSONS_TABLE="pni-lessons"
 PASSAGES_TABLE="pni-passages"
 DEFAULT_USER_ID="default-user"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SCAN_SEGMENTS=${SCAN_SEGMENTS:-4}
 
 # Helper functions
 print_header() {
@@ -520,39 +543,19 @@ check_aws_cli() {
     print_success "AWS CLI is configured and ready"
 }
 
+# Bulk user-progress operations (paginated queries, batched writes, segmented scans)
+progress_admin() {
+    python3 "$SCRIPT_DIR/progress_admin.py" --region "$AWS_REGION" --table "$USER_PROGRESS_TABLE" "$@"
+}
+
 # User Progress Management
 delete_user_progress() {
     local user_id=${1:-$DEFAULT_USER_ID}
     
     print_header "Deleting User Progress for: $user_id"
     
-    # Get all progress items for the user
-    local items=$(aws dynamodb query \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --key-condition-expression "userId = :userId" \
-        --expression-attribute-values '{":userId":{"S":"'$user_id'"}}' \
-        --region "$AWS_REGION" \
-        --output json 2>/dev/null | jq -r '.Items[]')
-    
-    if [ -z "$items" ]; then
-        print_warning "No progress found for user: $user_id"
-        return
-    fi
-    
-    # Delete all items
-    echo "$items" | jq -r '{userId: .userId.S, progressKey: .progressKey.S}' | while read -r item; do
-        local userId=$(echo "$item" | jq -r '.userId')
-        local progressKey=$(echo "$item" | jq -r '.progressKey')
-        
-        aws dynamodb delete-item \
-            --table-name "$USER_PROGRESS_TABLE" \
-            --key '{"userId":{"S":"'$userId'"},"progressKey":{"S":"'$progressKey'"}}' \
-            --region "$AWS_REGION" 2>/dev/null
-        
-        print_success "Deleted progress: $progressKey"
-    done
-    
-    print_success "All progress deleted for user: $user_id"
+    # Paginated query + BatchWriteItem (25 per request, unprocessed items retried)
+    progress_admin delete "$user_id" --yes || print_error "Failed to delete user progress"
 }
 
 list_user_progress() {
@@ -560,23 +563,44 @@ list_user_progress() {
     
     print_header "User Progress for: $user_id"
     
-    aws dynamodb query \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --key-condition-expression "userId = :userId" \
-        --expression-attribute-values '{":userId":{"S":"'$user_id'"}}' \
-        --region "$AWS_REGION" \
-        --output table 2>/dev/null || print_error "Failed to retrieve user progress"
+    progress_admin list "$user_id" || print_error "Failed to retrieve user progress"
 }
 
 list_all_users() {
     print_header "All Users in Database"
     
-    aws dynamodb scan \
-        --table-name "$USER_PROGRESS_TABLE" \
-        --projection-expression "userId" \
-        --region "$AWS_REGION" \
-        --output json 2>/dev/null | \
-        jq -r '.Items[].userId.S' | sort | uniq || print_error "Failed to retrieve users"
+    progress_admin users --segments "$SCAN_SEGMENTS" || print_error "Failed to retrieve users"
+}
+
+export_user_progress() {
+    local user_id=${1:-$DEFAULT_USER_ID}
+    local output_file=$2
+    
+    print_header "Exporting User Progress for: $user_id"
+    
+    if [ -n "$output_file" ]; then
+        progress_admin export "$user_id" --output "$output_file" || print_error "Failed to export user progress"
+    else
+        progress_admin export "$user_id" || print_error "Failed to export user progress"
+    fi
+}
+
+import_user_progress() {
+    local input_file=$1
+    local user_id=$2
+    
+    print_header "Importing User Progress from: $input_file"
+    
+    if [ ! -f "$input_file" ]; then
+        print_error "File not found: $input_file"
+        return
+    fi
+    
+    if [ -n "$user_id" ]; then
+        progress_admin import "$input_file" --user "$user_id" || print_error "Failed to import user progress"
+    else
+        progress_admin import "$input_file" || print_error "Failed to import user progress"
+    fi
 }
 
 # Lesson Management
@@ -750,6 +774,8 @@ show_menu() {
     echo "1)  List user progress"
     echo "2)  Delete user progress"
     echo "3)  List all users"
+    echo "15) Export user progress"
+    echo "16) Import user progress"
     echo ""
     echo -e "${CYAN}LESSON MANAGEMENT:${NC}"
     echo "4)  List all lessons"
@@ -774,7 +800,7 @@ show_menu() {
     echo ""
     echo "0)  Exit"
     echo ""
-    echo -n "Select an option [0-14]: "
+    echo -n "Select an option [0-16]: "
 }
 
 # Read user input
@@ -886,6 +912,22 @@ read_input() {
                 print_success "AWS region changed to: $AWS_REGION"
             fi
             ;;
+        15)
+            echo ""
+            echo -n "Enter user ID to export (press Enter for default: $DEFAULT_USER_ID): "
+            read user_id
+            echo -n "Output file (press Enter for progress-<user>-<timestamp>.ndjson): "
+            read output_file
+            export_user_progress "${user_id:-$DEFAULT_USER_ID}" "$output_file"
+            ;;
+        16)
+            echo ""
+            echo -n "Enter export file to import: "
+            read input_file
+            echo -n "Import as user ID (press Enter to keep the exported user ID): "
+            read user_id
+            import_user_progress "$input_file" "$user_id"
+            ;;
         0)
             print_success "Goodbye!"
             exit 0
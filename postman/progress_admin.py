@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+User Progress Admin
+Bulk operations on the user-progress table (userId / progressKey) for dynamodb-manager.sh.
+
+- list      Every progress item of a user (paginated query)
+- delete    All of a user's items via BatchWriteItem, retrying UnprocessedItems
+- users     Distinct users with item counts from parallel segmented scans
+- export    A user's items as NDJSON in DynamoDB JSON (lossless, re-importable)
+- import    Items from an export, optionally under another userId
+
+Usage:
+    python3 progress_admin.py list default-user
+    python3 progress_admin.py delete default-user --yes
+    python3 progress_admin.py users --segments 8
+    python3 progress_admin.py export default-user --output default-user.ndjson
+    python3 progress_admin.py import default-user.ndjson --user test-user
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Iterable
+
+import boto3
+
+USER_PROGRESS_TABLE = 'user-progress'
+BATCH_WRITE_LIMIT = 25
+MAX_BATCH_ATTEMPTS = 8
+
+
+def get_client(region: str):
+    """Low-level DynamoDB client (its own session, so it is safe to create per thread)"""
+    return boto3.session.Session().client('dynamodb', region_name=region)
+
+
+def query_user_items(client, table_name: str, user_id: str, key_only: bool = False) -> Iterator[Dict[str, Any]]:
+    """Yield every item of a user, following LastEvaluatedKey"""
+    params = {
+        'TableName': table_name,
+        'KeyConditionExpression': '#u = :u',
+        'ExpressionAttributeNames': {'#u': 'userId'},
+        'ExpressionAttributeValues': {':u': {'S': user_id}}
+    }
+    if key_only:
+        params['ProjectionExpression'] = '#u, #k'
+        params['ExpressionAttributeNames']['#k'] = 'progressKey'
+
+    while True:
+        response = client.query(**params)
+        yield from response['Items']
+        if 'LastEvaluatedKey' not in response:
+            return
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def batch_write(client, table_name: str, requests: Iterable[Dict[str, Any]]) -> int:
+    """BatchWriteItem in chunks of 25, resubmitting UnprocessedItems with jittered backoff"""
+    written = 0
+    chunk = []
+
+    def flush(pending):
+        for attempt in range(MAX_BATCH_ATTEMPTS):
+            response = client.batch_write_item(RequestItems={table_name: pending})
+            pending = response.get('UnprocessedItems', {}).get(table_name, [])
+            if not pending:
+                return
+            time.sleep(min(5.0, 0.05 * 2 ** attempt) * (0.5 + random.random()))
+        raise RuntimeError(f"{len(pending)} items still unprocessed after {MAX_BATCH_ATTEMPTS} attempts")
+
+    for request in requests:
+        chunk.append(request)
+        if len(chunk) == BATCH_WRITE_LIMIT:
+            flush(chunk)
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+        written += len(chunk)
+    return written
+
+
+def delete_user(client, table_name: str, user_id: str) -> int:
+    """Delete all of a user's progress items; returns the number deleted"""
+    keys = list(query_user_items(client, table_name, user_id, key_only=True))
+    return batch_write(client, table_name, ({'DeleteRequest': {'Key': key}} for key in keys))
+
+
+def scan_user_segment(region: str, table_name: str, segment: int, total_segments: int) -> Counter:
+    """Item counts per userId in one scan segment"""
+    client = get_client(region)
+    params = {
+        'TableName': table_name,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'ProjectionExpression': '#u',
+        'ExpressionAttributeNames': {'#u': 'userId'}
+    }
+    counts = Counter()
+    while True:
+        response = client.scan(**params)
+        counts.update(item['userId']['S'] for item in response['Items'] if 'userId' in item)
+        if 'LastEvaluatedKey' not in response:
+            return counts
+        params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def list_users(region: str, table_name: str, segments: int) -> Counter:
+    """Item counts per userId across the whole table from concurrent segment scans"""
+    with ThreadPoolExecutor(max_workers=segments) as executor:
+        futures = [executor.submit(scan_user_segment, region, table_name, segment, segments)
+                   for segment in range(segments)]
+        total = Counter()
+        for future in futures:
+            total.update(future.result())
+    return total
+
+
+def _encode_binary(value: Any) -> Any:
+    """Low-level attribute value with bytes as base64, for JSON"""
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, dict):
+        return {k: _encode_binary(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_binary(v) for v in value]
+    return value
+
+
+def _decode_binary(value: Any, binary: bool = False) -> Any:
+    """Inverse of _encode_binary ('B' and 'BS' values back to bytes)"""
+    if binary and isinstance(value, str):
+        return base64.b64decode(value)
+    if isinstance(value, dict):
+        return {k: _decode_binary(v, k in ('B', 'BS')) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_binary(v, binary) for v in value]
+    return value
+
+
+def export_user(client, table_name: str, user_id: str, output_path: str) -> int:
+    """Write a user's items to an NDJSON file in DynamoDB JSON"""
+    count = 0
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for item in query_user_items(client, table_name, user_id):
+            f.write(json.dumps(_encode_binary(item), ensure_ascii=False, sort_keys=True) + '\n')
+            count += 1
+    return count
+
+
+def read_export(path: str, user_id: str = None) -> Iterator[Dict[str, Any]]:
+    """Items from an export file, with userId replaced when user_id is given"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = _decode_binary(json.loads(line))
+            if user_id:
+                item['userId'] = {'S': user_id}
+            yield item
+
+
+def import_items(client, table_name: str, path: str, user_id: str = None) -> int:
+    """Put every item of an export file (existing items with the same key are replaced)"""
+    return batch_write(client, table_name, ({'PutRequest': {'Item': item}} for item in read_export(path, user_id)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk user-progress administration')
+    parser.add_argument('--region', default=os.getenv('AWS_REGION', 'eu-west-1'),
+                        help='AWS region (default: $AWS_REGION or eu-west-1)')
+    parser.add_argument('--table', default=USER_PROGRESS_TABLE, help=f'Table name (default: {USER_PROGRESS_TABLE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help="List a user's progress items")
+    list_parser.add_argument('user_id')
+
+    delete_parser = commands.add_parser('delete', help="Delete all of a user's progress items")
+    delete_parser.add_argument('user_id')
+    delete_parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+
+    users_parser = commands.add_parser('users', help='List all users with item counts')
+    users_parser.add_argument('--segments', type=int, default=4, help='Parallel scan segments (default: 4)')
+
+    export_parser = commands.add_parser('export', help="Export a user's progress to NDJSON")
+    export_parser.add_argument('user_id')
+    export_parser.add_argument('--output', help='Output file (default: progress-<user>-<timestamp>.ndjson)')
+
+    import_parser = commands.add_parser('import', help='Import progress from an export file')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--user', help='Import under this userId instead of the exported one')
+
+    args = parser.parse_args()
+    client = get_client(args.region)
+    start = time.time()
+
+    if args.command == 'list':
+        count = 0
+        for item in query_user_items(client, args.table, args.user_id):
+            count += 1
+            attributes = {k: next(iter(v.values())) for k, v in item.items() if k not in ('userId', 'progressKey')}
+            print(f"  {item['progressKey']['S']}: {json.dumps(_encode_binary(attributes), default=str)}")
+        print(f"📊 {count} progress items for {args.user_id}")
+
+    elif args.command == 'delete':
+        if not args.yes:
+            confirm = input(f"Delete ALL progress for {args.user_id} from {args.table} ({args.region})? (yes/no): ")
+            if confirm != 'yes':
+                print("ℹ️  Operation cancelled")
+                return
+        deleted = delete_user(client, args.table, args.user_id)
+        if deleted:
+            print(f"✅ Deleted {deleted} progress items for {args.user_id} in {time.time() - start:.1f}s")
+        else:
+            print(f"⚠️  No progress found for user: {args.user_id}")
+
+    elif args.command == 'users':
+        counts = list_users(args.region, args.table, max(1, args.segments))
+        for user_id in sorted(counts):
+            print(f"  {user_id} ({counts[user_id]} items)")
+        print(f"📊 {len(counts)} users, {sum(counts.values())} items ({time.time() - start:.1f}s)")
+
+    elif args.command == 'export':
+        output = args.output or f"progress-{args.user_id}-{time.strftime('%Y%m%d_%H%M%S')}.ndjson"
+        count = export_user(client, args.table, args.user_id, output)
+        print(f"✅ Exported {count} progress items for {args.user_id} to {output}")
+
+    elif args.command == 'import':
+        count = import_items(client, args.table, args.path, args.user)
+        target = f" as {args.user}" if args.user else ''
+        print(f"✅ Imported {count} progress items{target} from {args.path} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ {e}")
+        sys.exit(1)
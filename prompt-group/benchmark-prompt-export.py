@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Prompt Export Benchmark
+Times the export path (grouping + YAML emission) at 1x, 10x and 100x today's prompt
+count, comparing the original fetchall + pure-Python yaml.dump path with streamed
+grouping + the libyaml emitter. Also checks that both outputs load to the same data.
+
+Usage:
+    python3 benchmark-prompt-export.py ../local-batch/prompts.dev.yaml
+    python3 benchmark-prompt-export.py ../local-batch/prompts.dev.yaml --scales 1 10 100 1000
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from prompt_bundle import (
+    YAML_DUMPER, YAML_DUMP_OPTIONS, compute_prompt_digest, dump_prompts_yaml, group_prompt_rows
+)
+
+
+def generate_rows(yaml_data, scale):
+    """Yield (category, title, content) rows in query order, with each prompt repeated `scale` times"""
+    for category in sorted(k for k in yaml_data if k != 'metadata'):
+        for copy in range(scale):
+            for title in sorted(yaml_data[category]):
+                suffix = f" #{copy}" if copy else ''
+                yield category, f"{title}{suffix}", yaml_data[category][title]
+
+
+def legacy_export(rows, environment):
+    """Original exporter: fetchall, group, yaml.dump with the pure-Python Dumper"""
+    results = list(rows)
+    categories = {}
+    for category, title, content in results:
+        if category not in categories:
+            categories[category] = {}
+        categories[category][title] = content
+    yaml_data = {
+        'metadata': {
+            'environment': environment.upper(),
+            'export_timestamp': '',
+            'total_categories': len(categories),
+            'total_prompts': len(results)
+        }
+    }
+    for category in sorted(categories.keys()):
+        yaml_data[category] = categories[category]
+    return yaml.dump(yaml_data, **YAML_DUMP_OPTIONS)
+
+
+def streamed_export(rows, environment):
+    """Current exporter: group rows as they stream, emit per top-level key"""
+    return dump_prompts_yaml(group_prompt_rows(rows, environment))
+
+
+def measure(func, *args):
+    """Return (result, seconds, peak MiB) - tracemalloc slows both paths, compare relatively"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def check_equivalence(legacy_yaml, streamed_yaml):
+    """Both outputs must load to the same prompts (export_timestamp aside)"""
+    legacy = yaml.load(legacy_yaml, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    streamed = yaml.load(streamed_yaml, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    return compute_prompt_digest(legacy) == compute_prompt_digest(streamed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark prompt export grouping and YAML emission')
+    parser.add_argument('yaml_file', help='Exported prompts YAML file used as the row source')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='Prompt count multipliers (default: 1 10 100)')
+    args = parser.parse_args()
+
+    with open(args.yaml_file, encoding='utf-8') as f:
+        source = yaml.safe_load(f)
+    environment = source.get('metadata', {}).get('environment', 'dev').lower()
+
+    print(f"🧪 YAML dumper: {YAML_DUMPER.__name__}")
+
+    # The per-key emission with the pure-Python Dumper must be byte-identical to the old dump
+    sample = list(generate_rows(source, 1))
+    grouped = group_prompt_rows(sample, environment)
+    grouped['metadata']['export_timestamp'] = ''
+    identical = dump_prompts_yaml(grouped, dumper=yaml.Dumper) == legacy_export(sample, environment)
+    print(f"{'✅' if identical else '❌'} Per-key emission byte-identical to yaml.dump (pure Dumper)\n")
+
+    print(f"{'Scale':>6} {'Prompts':>9} {'Legacy s':>10} {'Legacy MiB':>11} {'Stream s':>10} {'Stream MiB':>11} {'Equal':>6}")
+    print("-" * 70)
+    all_equal = identical
+    for scale in args.scales:
+        legacy_yaml, legacy_time, legacy_peak = measure(legacy_export, generate_rows(source, scale), environment)
+        streamed_yaml, streamed_time, streamed_peak = measure(streamed_export, generate_rows(source, scale), environment)
+        equal = check_equivalence(legacy_yaml, streamed_yaml)
+        all_equal = all_equal and equal
+        prompts = sum(1 for _ in generate_rows(source, scale))
+        print(f"{scale:>5}x {prompts:>9,} {legacy_time:>10.3f} {legacy_peak:>11.1f} "
+              f"{streamed_time:>10.3f} {streamed_peak:>11.1f} {'yes' if equal else 'NO':>6}")
+
+    sys.exit(0 if all_equal else 1)
+
+
+if __name__ == "__main__":
+    main()
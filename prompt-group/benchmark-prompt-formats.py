@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Prompt Format Benchmark
+Compares parse and load latency of the YAML and JSON prompt artifacts.
+
+Usage:
+    python3 benchmark-prompt-formats.py ../local-batch/prompts.prod.yaml
+    python3 benchmark-prompt-formats.py ../local-batch/prompts.prod.yaml --environment prod
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from prompt_bundle import encode_prompt_json
+
+
+def time_call(func, iterations):
+    """Return (median, p95) latency in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark YAML vs JSON prompt artifacts')
+    parser.add_argument('yaml_file', help='Exported prompts YAML file (e.g. prompts.prod.yaml)')
+    parser.add_argument('--iterations', type=int, default=200, help='Iterations per measurement (default: 200)')
+    parser.add_argument('--environment', choices=['dev', 'prod'],
+                        help='Also time PromptLoader cold/warm loads against the published bundle')
+    args = parser.parse_args()
+
+    with open(args.yaml_file, 'rb') as f:
+        yaml_body = f.read()
+    data = yaml.safe_load(yaml_body)
+    json_body = encode_prompt_json(data)
+
+    json_file = os.path.splitext(args.yaml_file)[0] + '.json'
+    if not os.path.exists(json_file):
+        json_file = None
+
+    print(f"📄 YAML: {len(yaml_body):,} bytes | JSON: {len(json_body):,} bytes")
+    print(f"🔁 {args.iterations} iterations per measurement\n")
+
+    cases = [('yaml SafeLoader (parse)', lambda: yaml.load(yaml_body, Loader=yaml.SafeLoader))]
+    if hasattr(yaml, 'CSafeLoader'):
+        cases.append(('yaml CSafeLoader (parse)', lambda: yaml.load(yaml_body, Loader=yaml.CSafeLoader)))
+    else:
+        print("⚠️  libyaml not available - CSafeLoader skipped")
+    cases.append(('json (parse)', lambda: json.loads(json_body)))
+
+    def load_yaml_file():
+        with open(args.yaml_file, 'rb') as f:
+            return yaml.safe_load(f.read())
+    cases.append(('yaml file (load)', load_yaml_file))
+
+    if json_file:
+        def load_json_file():
+            with open(json_file, 'rb') as f:
+                return json.loads(f.read())
+        cases.append(('json file (load)', load_json_file))
+
+    print(f"{'Case':<28} {'median ms':>10} {'p95 ms':>10}")
+    print("-" * 50)
+    for name, func in cases:
+        median, p95 = time_call(func, args.iterations)
+        print(f"{name:<28} {median:>10.3f} {p95:>10.3f}")
+
+    if args.environment:
+        from prompt_loader import PromptLoader
+
+        print(f"\n☁️  PromptLoader against published {args.environment} bundle")
+        for artifact in ('yaml', 'json'):
+            loader = PromptLoader(args.environment, artifact=artifact)
+            start = time.perf_counter()
+            loader.load()
+            cold = (time.perf_counter() - start) * 1000
+            warm, warm_p95 = time_call(loader.load, min(args.iterations, 20))
+            print(f"{artifact:<6} cold {cold:>8.1f} ms | warm (304) median {warm:>7.1f} ms, p95 {warm_p95:>7.1f} ms | "
+                  f"downloads {loader.stats['downloads']}, not modified {loader.stats['not_modified']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -46,6 +46,7 @@ TEMP_DIR=$(mktemp -d)
 
 # Copy the Lambda function
 cp "$SCRIPT_DIR/prompt-group-migration.py" "$TEMP_DIR/lambda_function.py"
+cp "$SCRIPT_DIR/prompt_bundle.py" "$TEMP_DIR/"
 
 # Create requirements.txt with pg8000 (pure Python PostgreSQL driver)
 cat > "$TEMP_DIR/requirements.txt" << EOF
@@ -8,11 +8,13 @@ Environment Detection:
 - us-east-1 region = dev environment
 """
 
+import hashlib
 import json
 import os
+import time
 import logging
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # Configure logging
 logger = logging.getLogger()
@@ -20,13 +22,18 @@ logger.setLevel(logging.INFO)
 
 try:
     import pg8000.native
-    import yaml
     import boto3
     from botocore.exceptions import ClientError, NoCredentialsError
 except ImportError as e:
     logger.error(f"Missing required module: {e}")
     raise
 
+from prompt_bundle import (
+    DIGEST_METADATA_KEY, JSON_CONTENT_TYPE, YAML_CONTENT_TYPE, build_template_bundle,
+    compute_prompt_digest, dump_prompts_yaml, encode_prompt_json, get_published_digest,
+    group_prompt_rows, publish_category_shards, publish_prompt_version
+)
+
 
 def get_environment_from_region() -> str:
     """Determine environment based on AWS region"""
@@ -58,14 +65,24 @@ def get_database_config(environment: str) -> Dict[str, Any]:
     return config
 
 
-def upload_to_s3(yaml_content: str, environment: str) -> bool:
-    """Upload the generated YAML content to S3"""
+def upload_to_s3(yaml_content: str, environment: str, digest: str) -> str:
+    """Upload the generated YAML content to S3 unless the published payload digest already matches
+    
+    Returns 'uploaded', 'unchanged' or 'failed'.
+    """
     bucket_name = os.getenv('S3_BUCKET', 'pi-app-data')
     s3_key = f"prompts.{environment}.yaml"
     
     try:
         s3_client = boto3.client('s3')
         
+        try:
+            if get_published_digest(s3_client, bucket_name, s3_key) == digest:
+                logger.info(f"Prompts unchanged (digest {digest[:12]}) - upload to s3://{bucket_name}/{s3_key} avoided")
+                return 'unchanged'
+        except Exception as e:
+            logger.warning(f"Could not read published digest, uploading anyway: {e}")
+        
         logger.info(f"Uploading to s3://{bucket_name}/{s3_key}")
         
         s3_client.put_object(
@@ -77,16 +94,79 @@ def upload_to_s3(yaml_content: str, environment: str) -> bool:
             Metadata={
                 'uploaded-by': 'prompt-migration-lambda',
                 'environment': environment,
-                'upload-timestamp': datetime.now().isoformat()
+                'upload-timestamp': datetime.now().isoformat(),
+                DIGEST_METADATA_KEY: digest
             }
         )
         
         logger.info(f"Successfully uploaded to s3://{bucket_name}/{s3_key}")
-        return True
+        return 'uploaded'
         
     except Exception as e:
         logger.error(f"S3 upload failed: {e}")
-        return False
+        return 'failed'
+
+
+# Cheap change detector for the prompt tables: row counts and an order-independent
+# checksum over the full row content (updated_at is not maintained on UPDATE, so it
+# cannot be trusted). One scan per table, before any extraction.
+SOURCE_FINGERPRINT_QUERY = """
+SELECT 'prompt_groups', COUNT(*), COALESCE(SUM(hashtext(t::text)::bigint), 0)::text
+FROM practise_improve_pilot.prompt_groups t
+UNION ALL
+SELECT 'prompts', COUNT(*), COALESCE(SUM(hashtext(t::text)::bigint), 0)::text
+FROM practise_improve_pilot.prompts t;
+"""
+
+
+def compute_source_fingerprint(environment: str) -> str:
+    """Fingerprint the prompt_groups/prompts tables with a single aggregate query"""
+    db_config = get_database_config(environment)
+    connection = pg8000.native.Connection(
+        user=db_config['user'],
+        password=db_config['password'],
+        host=db_config['host'],
+        port=db_config['port'],
+        database=db_config['database']
+    )
+    try:
+        rows = connection.run(SOURCE_FINGERPRINT_QUERY)
+    finally:
+        connection.close()
+    
+    return hashlib.sha256(json.dumps(rows, default=str).encode('utf-8')).hexdigest()
+
+
+def get_fingerprint_key(environment: str) -> str:
+    """S3 key holding the fingerprint of the last successful export"""
+    return f"prompt-group-fingerprint-{environment}.json"
+
+
+def get_stored_fingerprint(environment: str) -> Optional[str]:
+    """Read the fingerprint recorded by the last successful export"""
+    bucket_name = os.getenv('S3_BUCKET', 'pi-app-data')
+    try:
+        response = boto3.client('s3').get_object(Bucket=bucket_name, Key=get_fingerprint_key(environment))
+        return json.loads(response['Body'].read()).get('fingerprint')
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def store_fingerprint(fingerprint: str, environment: str):
+    """Record the fingerprint of the source data that was just exported"""
+    bucket_name = os.getenv('S3_BUCKET', 'pi-app-data')
+    boto3.client('s3').put_object(
+        Bucket=bucket_name,
+        Key=get_fingerprint_key(environment),
+        Body=json.dumps({
+            'fingerprint': fingerprint,
+            'environment': environment,
+            'updated': datetime.now().isoformat()
+        }).encode('utf-8'),
+        ContentType='application/json'
+    )
 
 
 def export_prompts(environment: str) -> Dict[str, Any]:
@@ -114,53 +194,78 @@ def export_prompts(environment: str) -> Dict[str, Any]:
         INNER JOIN practise_improve_pilot.prompts p ON pg.id = p.group_id
         WHERE pg.is_active = true 
           AND p.is_active = true
-        ORDER BY pg.category, pg.title;
+        ORDER BY pg.category, pg.title, pg.id, p.version, p.id;
         """
         
         logger.info(f"Fetching prompts from {environment} environment")
-        results = connection.run(query)
-        
-        # Group by category
-        categories = {}
-        for category, title, content in results:
-            if category not in categories:
-                categories[category] = {}
-            categories[category][title] = content
-        
-        # Prepare YAML structure
-        yaml_data = {
-            'metadata': {
-                'environment': environment.upper(),
-                'export_timestamp': datetime.now().isoformat(),
-                'total_categories': len(categories),
-                'total_prompts': len(results)
-            }
-        }
         
-        # Add categories in sorted order
-        for category in sorted(categories.keys()):
-            yaml_data[category] = categories[category]
-        
-        # Convert to YAML string
-        yaml_content = yaml.dump(
-            yaml_data, 
-            default_flow_style=False, 
-            allow_unicode=True,
-            sort_keys=False, 
-            width=100, 
-            indent=2
-        )
+        # pg8000.native returns the full result set; group it and let the row list go
+        duplicates = []
+        yaml_data = group_prompt_rows(connection.run(query), environment, duplicates)
+        categories = [category for category in yaml_data if category != 'metadata']
+        for category, title in duplicates:
+            logger.warning(f"Duplicate active prompt title '{category} / {title}' - last row by group id and version kept")
+        
+        # Pre-parse templates; fails the export before anything is uploaded
+        templates = build_template_bundle(yaml_data)
+        
+        # Convert to YAML string (libyaml emitter when available)
+        yaml_content = dump_prompts_yaml(yaml_data)
+        
+        # Upload to S3 (skipped when the prompt payload is unchanged)
+        digest = compute_prompt_digest(yaml_data)
+        upload_status = upload_to_s3(yaml_content, environment, digest)
         
-        # Upload to S3
-        upload_success = upload_to_s3(yaml_content, environment)
+        # Publish the immutable content-addressed version and move the pointer manifest
+        version_result = None
+        try:
+            version_result = publish_prompt_version(
+                boto3.client('s3'),
+                os.getenv('S3_BUCKET', 'pi-app-data'),
+                environment,
+                digest,
+                {
+                    'yaml': (yaml_content.encode('utf-8'), YAML_CONTENT_TYPE),
+                    'json': (encode_prompt_json(yaml_data), JSON_CONTENT_TYPE),
+                    'templates.json': (encode_prompt_json(templates), JSON_CONTENT_TYPE)
+                },
+                'prompt-migration-lambda'
+            )
+            logger.info(f"Prompt version {digest[:16]}: {len(version_result['uploaded'])} objects uploaded, "
+                        f"pointer {'updated' if version_result['pointer_updated'] else 'unchanged'}")
+        except Exception as e:
+            logger.error(f"Versioned prompt publish failed: {e}")
+            upload_status = 'failed'
+        
+        # Per-category shards so consumers can fetch only the categories they use
+        shard_result = None
+        try:
+            shard_result = publish_category_shards(
+                boto3.client('s3'),
+                os.getenv('S3_BUCKET', 'pi-app-data'),
+                environment,
+                yaml_data,
+                'prompt-migration-lambda'
+            )
+            logger.info(f"Category shards: {len(shard_result['uploaded'])} uploaded, "
+                        f"{shard_result['unchanged']} unchanged")
+        except Exception as e:
+            logger.error(f"Category shard publish failed: {e}")
+            upload_status = 'failed'
         
         return {
             'success': True,
             'environment': environment,
-            'total_prompts': len(results),
+            'total_prompts': yaml_data['metadata']['total_prompts'],
             'total_categories': len(categories),
-            'categories': sorted(categories.keys()),
-            's3_upload': upload_success
+            'categories': categories,
+            'duplicate_titles': [f"{category} / {title}" for category, title in duplicates],
+            'content_digest': digest,
+            's3_upload': upload_status != 'failed',
+            's3_upload_status': upload_status,
+            'uploads_avoided': 1 if upload_status == 'unchanged' else 0,
+            'version': version_result,
+            'category_shards': shard_result
         }
         
     except Exception as e:
@@ -187,10 +292,36 @@ def lambda_handler(event, context):
                 })
             }
         
+        # Skip the run entirely when the prompt tables have not changed since the last export
+        start_time = time.time()
+        force = bool((event or {}).get('force'))
+        
+        fingerprint = None
+        try:
+            fingerprint = compute_source_fingerprint(environment)
+            if not force and fingerprint == get_stored_fingerprint(environment):
+                elapsed_ms = int((time.time() - start_time) * 1000)
+                logger.info(f"Source unchanged (fingerprint {fingerprint[:12]}) - skipping export ({elapsed_ms} ms)")
+                return {
+                    'statusCode': 200,
+                    'body': json.dumps({
+                        'message': 'Source data unchanged - prompt migration skipped',
+                        'fingerprint': fingerprint,
+                        'elapsed_ms': elapsed_ms
+                    })
+                }
+        except Exception as e:
+            logger.warning(f"Source fingerprint check failed, running full export: {e}")
+        
         logger.info(f"Starting prompt migration for {environment} environment")
         
         result = export_prompts(environment)
         
+        # Only record the fingerprint once the export and upload have succeeded
+        if fingerprint and result.get('s3_upload'):
+            store_fingerprint(fingerprint, environment)
+            result['fingerprint'] = fingerprint
+        
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -219,6 +350,8 @@ def main():
                        help='Environment (dev or prod) - overrides region detection')
     parser.add_argument('--region', choices=['us-east-1', 'eu-west-1'], 
                        help='AWS region (us-east-1=dev, eu-west-1=prod)')
+    parser.add_argument('--force', action='store_true',
+                       help='Run the export even if the source fingerprint is unchanged')
     args = parser.parse_args()
     
     # Set environment variable for region if provided
@@ -238,7 +371,7 @@ def main():
     class MockContext:
         pass
     
-    event = {}
+    event = {'force': args.force}
     context = MockContext()
     
     response = lambda_handler(event, context)
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Prompt Bundle Helpers
+Shared by the prompt exporters:
+- prompt-group/prompt-group-migration.py (Lambda, packaged alongside lambda_function.py)
+- local-batch/99-prompt-group-migration.py (local utility)
+"""
+
+import hashlib
+import io
+import json
+import re
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, TextIO, Tuple
+
+import yaml
+from botocore.exceptions import ClientError
+
+# S3 user metadata key (x-amz-meta-content-digest) holding the payload digest
+DIGEST_METADATA_KEY = 'content-digest'
+
+# libyaml emitter when PyYAML was built with it. Long double-quoted scalars are
+# folded differently from the pure-Python Dumper, but both load to the same data
+YAML_DUMPER = getattr(yaml, 'CDumper', yaml.Dumper)
+YAML_DUMP_OPTIONS = {
+    'default_flow_style': False,
+    'allow_unicode': True,
+    'sort_keys': False,
+    'width': 100,
+    'indent': 2
+}
+
+# Artifact formats published for every version
+YAML_CONTENT_TYPE = 'application/x-yaml'
+JSON_CONTENT_TYPE = 'application/json'
+
+# Placeholders the consuming services know how to fill
+KNOWN_PLACEHOLDERS = frozenset([
+    'userAnswer', 'correctAnswer', 'isCorrect', 'level',
+    'lessonTitle', 'score', 'percentage', 'totalQuestions'
+])
+
+# "{" directly followed by an identifier starts a placeholder; other braces
+# (e.g. JSON examples in question_generation prompts) are literal text
+PLACEHOLDER_START = re.compile(r'\{([A-Za-z_][A-Za-z0-9_]*)')
+
+
+class TemplateError(ValueError):
+    """Raised when prompt templates contain malformed or unknown placeholders"""
+
+
+# Versioned objects never change once written; the pointer is revalidated often
+VERSION_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+POINTER_CACHE_CONTROL = 'public, max-age=60'
+
+
+def group_prompt_rows(rows: Iterable[Tuple[str, str, str]], environment: str,
+                      duplicates: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Any]:
+    """Group (category, title, content) rows as they stream from the cursor into the export structure
+
+    A later row with the same category and title replaces the earlier one; pass a
+    list as `duplicates` to collect the (category, title) pairs where that happened.
+    """
+    categories = {}
+    total_prompts = 0
+    for category, title, content in rows:
+        prompts = categories.setdefault(category, {})
+        if duplicates is not None and title in prompts:
+            duplicates.append((category, title))
+        prompts[title] = content
+        total_prompts += 1
+
+    # Metadata first, then categories in sorted order
+    yaml_data = {
+        'metadata': {
+            'environment': environment.upper(),
+            'export_timestamp': datetime.now().isoformat(),
+            'total_categories': len(categories),
+            'total_prompts': total_prompts
+        }
+    }
+    for category in sorted(categories.keys()):
+        yaml_data[category] = categories[category]
+    return yaml_data
+
+
+def write_prompts_yaml(yaml_data: Dict[str, Any], stream: TextIO, dumper=YAML_DUMPER):
+    """Emit the export one top-level key at a time - same output as dumping the whole dict"""
+    for key, value in yaml_data.items():
+        yaml.dump({key: value}, stream, Dumper=dumper, **YAML_DUMP_OPTIONS)
+
+
+def dump_prompts_yaml(yaml_data: Dict[str, Any], dumper=YAML_DUMPER) -> str:
+    """Render the export as a YAML string"""
+    buffer = io.StringIO()
+    write_prompts_yaml(yaml_data, buffer, dumper)
+    return buffer.getvalue()
+
+
+def compute_prompt_digest(yaml_data: Dict[str, Any]) -> str:
+    """SHA-256 over the prompt payload only - metadata.export_timestamp is left out"""
+    metadata = {k: v for k, v in yaml_data.get('metadata', {}).items() if k != 'export_timestamp'}
+    prompts = {k: v for k, v in yaml_data.items() if k != 'metadata'}
+    canonical = json.dumps(
+        {'metadata': metadata, 'prompts': prompts},
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def encode_prompt_json(yaml_data: Dict[str, Any]) -> bytes:
+    """Compact JSON with the same structure as the YAML export - parses far faster than YAML"""
+    return json.dumps(yaml_data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def parse_template(text: str) -> List[Dict[str, str]]:
+    """Split a prompt template into literal {'text': ...} and {'field': ...} segments"""
+    segments = []
+    position = 0
+    for match in PLACEHOLDER_START.finditer(text):
+        field = match.group(1)
+        if text[match.end():match.end() + 1] != '}':
+            raise TemplateError(f"malformed placeholder '{{{field}' at offset {match.start()}")
+        if field not in KNOWN_PLACEHOLDERS:
+            raise TemplateError(f"unknown placeholder '{{{field}}}' at offset {match.start()}")
+        if match.start() > position:
+            segments.append({'text': text[position:match.start()]})
+        segments.append({'field': field})
+        position = match.end() + 1
+    if position < len(text):
+        segments.append({'text': text[position:]})
+    return segments
+
+
+def build_template_bundle(yaml_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-parse every prompt; raises TemplateError listing all bad templates"""
+    bundle = {'metadata': yaml_data.get('metadata', {})}
+    problems = []
+    for category, prompts in yaml_data.items():
+        if category == 'metadata':
+            continue
+        bundle[category] = {}
+        for title, text in prompts.items():
+            try:
+                segments = parse_template(text or '')
+            except TemplateError as e:
+                problems.append(f"{category} / {title}: {e}")
+                continue
+            bundle[category][title] = {
+                'text': text,
+                'placeholders': sorted({s['field'] for s in segments if 'field' in s}),
+                'segments': segments
+            }
+    if problems:
+        raise TemplateError('\n'.join(problems))
+    return bundle
+
+
+def render_template(segments: List[Dict[str, str]], values: Dict[str, Any]) -> str:
+    """Fill a pre-parsed template; raises KeyError naming the first missing value"""
+    parts = []
+    for segment in segments:
+        if 'text' in segment:
+            parts.append(segment['text'])
+        elif segment['field'] in values:
+            parts.append(str(values[segment['field']]))
+        else:
+            raise KeyError(f"missing value for placeholder '{segment['field']}'")
+    return ''.join(parts)
+
+
+def compute_prompt_digests(yaml_data: Dict[str, Any]) -> Dict[Tuple[str, str], str]:
+    """SHA-256 of each prompt's content keyed by (category, title), for cheap cross-export diffs"""
+    return {
+        (category, title): hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+        for category, prompts in yaml_data.items() if category != 'metadata'
+        for title, content in prompts.items()
+    }
+
+
+def get_published_digest(s3_client, bucket_name: str, s3_key: str) -> Optional[str]:
+    """Return the digest stored on the published object, or None if there is no object or no digest"""
+    try:
+        response = s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return None
+        raise
+    return response.get('Metadata', {}).get(DIGEST_METADATA_KEY)
+
+
+def get_version_key(environment: str, digest: str, extension: str) -> str:
+    """Content-addressed key for one immutable prompt bundle version"""
+    return f"prompts/{environment}/{digest[:16]}.{extension}"
+
+
+def get_pointer_key(environment: str) -> str:
+    """Key of the small pointer manifest naming the current version"""
+    return f"prompts/{environment}/current.json"
+
+
+def get_current_pointer(s3_client, bucket_name: str, environment: str) -> Dict[str, Any]:
+    """Read the current pointer manifest, or an empty dict before the first publish"""
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=get_pointer_key(environment))
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+            return {}
+        raise
+    return json.loads(response['Body'].read())
+
+
+def publish_prompt_version(s3_client, bucket_name: str, environment: str, digest: str,
+                           artifacts: Dict[str, Tuple[bytes, str]], uploaded_by: str) -> Dict[str, Any]:
+    """Publish immutable content-addressed artifacts and point current.json at them
+
+    artifacts maps a file extension to (body, content type), e.g. {'yaml': (body, 'application/x-yaml')}.
+    Artifacts already published under the same digest are not uploaded again.
+    """
+    pointer = get_current_pointer(s3_client, bucket_name, environment)
+    published = pointer.get('artifacts', {}) if pointer.get('version') == digest else {}
+
+    uploaded = []
+    pointer_artifacts = {}
+    for extension, (body, content_type) in artifacts.items():
+        key = get_version_key(environment, digest, extension)
+        if published.get(extension, {}).get('key') != key:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=key,
+                Body=body,
+                ACL='public-read',
+                ContentType=content_type,
+                CacheControl=VERSION_CACHE_CONTROL,
+                Metadata={
+                    'uploaded-by': uploaded_by,
+                    'environment': environment,
+                    DIGEST_METADATA_KEY: digest
+                }
+            )
+            uploaded.append(key)
+        pointer_artifacts[extension] = {'key': key, 'bytes': len(body), 'content_type': content_type}
+
+    pointer_updated = pointer.get('version') != digest or published != pointer_artifacts
+    if pointer_updated:
+        new_pointer = {
+            'environment': environment,
+            'version': digest,
+            'published_at': datetime.now().isoformat(),
+            'artifacts': pointer_artifacts
+        }
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=get_pointer_key(environment),
+            Body=json.dumps(new_pointer, indent=2).encode('utf-8'),
+            ACL='public-read',
+            ContentType='application/json',
+            CacheControl=POINTER_CACHE_CONTROL,
+            Metadata={
+                'uploaded-by': uploaded_by,
+                'environment': environment,
+                DIGEST_METADATA_KEY: digest
+            }
+        )
+
+    return {
+        'version': digest,
+        'pointer_key': get_pointer_key(environment),
+        'artifacts': pointer_artifacts,
+        'uploaded': uploaded,
+        'pointer_updated': pointer_updated
+    }
+
+
+def get_category_index_key(environment: str) -> str:
+    """Key of the index listing the current per-category shards"""
+    return f"prompts/{environment}/categories/index.json"
+
+
+def _category_slug(category: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', category.lower()).strip('-') or 'general'
+
+
+def publish_category_shards(s3_client, bucket_name: str, environment: str,
+                            yaml_data: Dict[str, Any], uploaded_by: str) -> Dict[str, Any]:
+    """Publish one immutable JSON object per category plus an index of titles, sizes and digests
+
+    Shards whose digest matches the current index are not uploaded again, and the
+    index is only rewritten when a shard was added, changed or removed.
+    """
+    index_key = get_category_index_key(environment)
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=index_key)
+        previous = json.loads(response['Body'].read()).get('categories', {})
+    except ClientError as e:
+        if e.response['Error']['Code'] not in ('404', 'NoSuchKey', 'NotFound'):
+            raise
+        previous = {}
+
+    categories = {}
+    uploaded = []
+    for category, prompts in yaml_data.items():
+        if category == 'metadata':
+            continue
+        body = encode_prompt_json({category: prompts})
+        digest = hashlib.sha256(body).hexdigest()
+        key = f"prompts/{environment}/categories/{_category_slug(category)}.{digest[:16]}.json"
+
+        if previous.get(category, {}).get('key') != key:
+            s3_client.put_object(
+                Bucket=bucket_name,
+                Key=key,
+                Body=body,
+                ACL='public-read',
+                ContentType=JSON_CONTENT_TYPE,
+                CacheControl=VERSION_CACHE_CONTROL,
+                Metadata={
+                    'uploaded-by': uploaded_by,
+                    'environment': environment,
+                    DIGEST_METADATA_KEY: digest
+                }
+            )
+            uploaded.append(key)
+
+        categories[category] = {
+            'key': key,
+            'digest': digest,
+            'bytes': len(body),
+            'titles': list(prompts.keys())
+        }
+
+    index_updated = categories != previous
+    if index_updated:
+        index = {
+            'environment': environment,
+            'published_at': datetime.now().isoformat(),
+            'categories': categories
+        }
+        s3_client.put_object(
+            Bucket=bucket_name,
+            Key=index_key,
+            Body=json.dumps(index, indent=2).encode('utf-8'),
+            ACL='public-read',
+            ContentType=JSON_CONTENT_TYPE,
+            CacheControl=POINTER_CACHE_CONTROL,
+            Metadata={
+                'uploaded-by': uploaded_by,
+                'environment': environment
+            }
+        )
+
+    return {
+        'index_key': index_key,
+        'uploaded': uploaded,
+        'unchanged': len(categories) - len(uploaded),
+        'index_updated': index_updated
+    }
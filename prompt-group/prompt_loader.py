@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Prompt Loader
+Cached loader for the prompt bundles published by the prompt exporters.
+
+Resolves prompts/{env}/current.json and loads the version it names. The pointer is
+revalidated with a conditional GET (If-None-Match), so an unchanged pointer costs a
+304 and no parse. Versioned artifacts are immutable and parsed once per process.
+
+    from prompt_loader import PromptLoader
+
+    loader = PromptLoader('prod')
+    template = loader.get_prompt('evaluation', 'Short answer')
+
+    # Only one category - fetches categories/index.json and that category's shard
+    feedback = PromptLoader('prod').load_category('feedback_generation')
+
+    # Pre-split templates (artifact='templates.json') render without re-scanning the text
+    loader = PromptLoader('prod', artifact='templates.json')
+    text = loader.render('general', 'EFL Teacher system prompt', level='B1')
+"""
+
+import json
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+from prompt_bundle import get_category_index_key, get_pointer_key, parse_template, render_template
+
+
+def parse_artifact(key: str, body: bytes) -> Dict[str, Any]:
+    """Parse a JSON or YAML prompt artifact based on its key"""
+    if key.endswith('.json'):
+        return json.loads(body)
+
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return yaml.load(body, Loader=loader)
+
+
+class PromptLoader:
+    """In-process prompt cache keyed by S3 ETag"""
+
+    def __init__(self, environment: str, bucket_name: str = 'pi-app-data',
+                 artifact: str = 'json', s3_client=None):
+        self.environment = environment
+        self.bucket_name = bucket_name
+        self.artifact = artifact
+        self.s3_client = s3_client or boto3.client('s3')
+        self.stats = {'requests': 0, 'not_modified': 0, 'downloads': 0, 'cache_hits': 0}
+        self._cache: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        self._current: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, immutable: bool = False) -> Dict[str, Any]:
+        """GET an object, reusing the cached parse when the ETag still matches"""
+        cached = self._cache.get(key)
+        if cached and immutable:
+            self.stats['cache_hits'] += 1
+            return cached[1]
+
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if cached:
+            params['IfNoneMatch'] = cached[0]
+
+        self.stats['requests'] += 1
+        try:
+            response = self.s3_client.get_object(**params)
+        except ClientError as e:
+            if cached and e.response['Error']['Code'] in ('304', 'NotModified'):
+                self.stats['not_modified'] += 1
+                return cached[1]
+            raise
+
+        self.stats['downloads'] += 1
+        data = parse_artifact(key, response['Body'].read())
+        self._cache[key] = (response['ETag'], data)
+        return data
+
+    def _replace_current(self, name: str, key: str):
+        """Drop the cached immutable object a pointer or index has moved away from"""
+        previous = self._current.get(name)
+        if previous and previous != key:
+            self._cache.pop(previous, None)
+        self._current[name] = key
+
+    def load(self) -> Dict[str, Any]:
+        """Return the current prompt bundle for this environment"""
+        with self._lock:
+            pointer_key = get_pointer_key(self.environment)
+            pointer = self._get(pointer_key)
+            artifacts = pointer['artifacts']
+            artifact = artifacts.get(self.artifact) or artifacts['yaml']
+
+            self._replace_current('bundle', artifact['key'])
+            return self._get(artifact['key'], immutable=True)
+
+    def load_category(self, category: str) -> Dict[str, Any]:
+        """Return a single category's prompts without downloading the full bundle"""
+        with self._lock:
+            index = self._get(get_category_index_key(self.environment))
+            shard = index['categories'].get(category)
+            if shard is None:
+                return {}
+            self._replace_current(category, shard['key'])
+            return self._get(shard['key'], immutable=True)[category]
+
+    def get_prompt(self, category: str, title: str) -> Optional[str]:
+        """Look up one prompt template by category and title"""
+        entry = self.load().get(category, {}).get(title)
+        if isinstance(entry, dict):
+            return entry['text']
+        return entry
+
+    def render(self, category: str, title: str, **values) -> str:
+        """Fill a prompt template's placeholders"""
+        entry = self.load()[category][title]
+        segments = entry['segments'] if isinstance(entry, dict) else parse_template(entry)
+        return render_template(segments, values)